@@ -0,0 +1,302 @@
+"""
+    Minimal asyncio HTTP/1.1 server of ASGI applications, for running
+    without a third-party ASGI server
+"""
+import asyncio
+
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from restiro.wsgi_server import DropConnection
+
+max_head_size = 64 * 1024
+
+
+class BadRequest(Exception):
+    pass
+
+
+def status_line(status: int) -> bytes:
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    return ('HTTP/1.1 %s %s\r\n' % (status, reason)).encode('latin-1')
+
+
+def parse_head(head: bytes):
+    """
+    Parse request line and headers
+
+    :return: Method, target, HTTP version and list of headers, header names
+             are lower case
+    """
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise BadRequest('Invalid request line')
+
+    if not version.startswith('HTTP/1.'):
+        raise BadRequest('Unsupported version %s' % version)
+
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(':')
+        if not separator:
+            raise BadRequest('Invalid header')
+        headers.append((name.strip().lower(), value.strip()))
+
+    return method, target, version[len('HTTP/'):], headers
+
+
+async def read_chunked(reader: asyncio.StreamReader) -> bytes:
+    body = bytearray()
+    while True:
+        size_line = await reader.readuntil(b'\r\n')
+        try:
+            size = int(size_line.split(b';', 1)[0], 16)
+        except ValueError:
+            raise BadRequest('Invalid chunk size')
+
+        if size == 0:
+            # Trailers
+            while await reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+            return bytes(body)
+
+        body += await reader.readexactly(size)
+        await reader.readexactly(2)
+
+
+class ResponseWriter:
+
+    def __init__(self, writer: asyncio.StreamWriter, head_only: bool):
+        self.writer = writer
+        self.head_only = head_only
+        self.started = False
+        self.chunked = False
+        self.keep_alive = True
+        self.finished = False
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            headers = [
+                (bytes(k).lower(), bytes(v))
+                for k, v in message.get('headers', ())
+            ]
+            names = {k for k, _ in headers}
+            self.chunked = b'content-length' not in names
+            if self.chunked:
+                headers.append((b'transfer-encoding', b'chunked'))
+            if not self.keep_alive:
+                headers.append((b'connection', b'close'))
+
+            self.writer.write(status_line(message['status']) + b''.join(
+                b'%s: %s\r\n' % (k, v) for k, v in headers
+            ) + b'\r\n')
+            self.started = True
+
+        elif message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if not self.head_only:
+                if self.chunked:
+                    if body:
+                        self.writer.write(b'%x\r\n%s\r\n' % (len(body), body))
+                    if not more_body:
+                        self.writer.write(b'0\r\n\r\n')
+                elif body:
+                    self.writer.write(body)
+
+            await self.writer.drain()
+            if not more_body:
+                self.finished = True
+
+
+class ConnectionProtocol(asyncio.StreamReaderProtocol):
+    """
+    Stream protocol which resolves ``disconnected`` when the client closes
+    or the connection is lost, so applications are told without reading
+    the stream
+    """
+
+    def __init__(self, *args, loop: asyncio.AbstractEventLoop, **kwargs):
+        super().__init__(*args, loop=loop, **kwargs)
+        self.disconnected = loop.create_future()
+
+    def _disconnect(self):
+        if not self.disconnected.done():
+            self.disconnected.set_result(None)
+
+    def eof_received(self):
+        self._disconnect()
+        return super().eof_received()
+
+    def connection_lost(self, exc):
+        self._disconnect()
+        super().connection_lost(exc)
+
+
+class HTTPServer:
+
+    def __init__(self, app, host: str = 'localhost', port: int = 3010,
+                 idle_timeout: float = 30.0):
+        """
+        Serve an ASGI application over HTTP/1.1 with keep-alive, request
+        bodies by ``Content-Length`` or chunked encoding and streamed
+        response bodies
+
+        :param app: ASGI application
+        :param host: Listen host
+        :param port: Listen port
+        :param idle_timeout: Seconds to keep an idle connection open
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> bool:
+        """
+        Handle a request of connection
+
+        :return: Keep the connection open or not
+        """
+        try:
+            head = await asyncio.wait_for(
+                reader.readuntil(b'\r\n\r\n'),
+                self.idle_timeout
+            )
+            method, target, http_version, headers = parse_head(head[:-4])
+            header_values = dict(headers)
+            if header_values.get('transfer-encoding', '').lower() == \
+                    'chunked':
+                body = await read_chunked(reader)
+            else:
+                body = await reader.readexactly(
+                    int(header_values.get('content-length') or 0)
+                )
+        except (BadRequest, ValueError, asyncio.LimitOverrunError):
+            writer.write(
+                status_line(400) +
+                b'Content-Length: 0\r\nConnection: close\r\n\r\n'
+            )
+            await writer.drain()
+            return False
+
+        path, _, query_string = target.partition('?')
+        connection = header_values.get('connection', '').lower()
+        keep_alive = connection != 'close' if http_version == '1.1' else \
+            connection == 'keep-alive'
+
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.1'},
+            'http_version': http_version,
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query_string.encode('latin-1'),
+            'root_path': '',
+            'headers': [
+                (k.encode('latin-1'), v.encode('latin-1'))
+                for k, v in headers
+            ],
+            'client': writer.get_extra_info('peername'),
+            'server': (self.host, self.port)
+        }
+        request_messages = [
+            {'type': 'http.request', 'body': body, 'more_body': False}
+        ]
+        response = ResponseWriter(writer, head_only=method == 'HEAD')
+        response.keep_alive = keep_alive
+        disconnected = writer.transport.get_protocol().disconnected
+        # Resolved when the response is sent or the application returns
+        cycle_ended = asyncio.get_running_loop().create_future()
+
+        def end_cycle():
+            if not cycle_ended.done():
+                cycle_ended.set_result(None)
+
+        async def receive():
+            if request_messages:
+                return request_messages.pop()
+
+            # The stream is never read here, it holds next requests
+            await asyncio.wait(
+                (disconnected, cycle_ended),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            await response.send(message)
+            if response.finished:
+                end_cycle()
+
+        try:
+            await self.app(scope, receive, send)
+        except DropConnection:
+            return False
+        except Exception:
+            if response.started:
+                return False
+
+            writer.write(
+                status_line(500) +
+                b'Content-Length: 0\r\nConnection: close\r\n\r\n'
+            )
+            await writer.drain()
+            return False
+
+        finally:
+            end_cycle()
+
+        return keep_alive and response.finished
+
+    async def serve(self, server_started=None):
+        """
+        Serve forever
+
+        :param server_started: Callable, called with the server when it
+                               is listening
+        """
+        loop = asyncio.get_running_loop()
+
+        def create_protocol():
+            return ConnectionProtocol(
+                asyncio.StreamReader(limit=max_head_size, loop=loop),
+                self.handle,
+                loop=loop
+            )
+
+        server = await loop.create_server(
+            create_protocol,
+            self.host,
+            self.port
+        )
+        if server_started is not None:
+            server_started(server)
+
+        async with server:
+            await server.serve_forever()
+
+
+def run(app, host: str = 'localhost', port: int = 3010):
+    asyncio.run(HTTPServer(app, host, port).serve())
@@ -0,0 +1,521 @@
+"""
+    Replay recorded requests against a server or an in-process WSGI app,
+    and report throughput, latency and status mismatches
+"""
+import asyncio
+import sys
+import time
+
+from http.client import HTTPConnection, HTTPSConnection
+from io import BytesIO
+from itertools import count
+from threading import Thread, local
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlencode, urlsplit
+
+from restiro import ExampleRequest, ResourceExample
+from restiro.latency import latency_summary
+
+#: Recorded headers which are not replayed
+skipped_headers = frozenset((
+    'host', 'content-length', 'connection', 'keep-alive',
+    'transfer-encoding'
+))
+
+
+def is_sqlite(filename: str) -> bool:
+    with open(filename, 'rb') as f:
+        return f.read(16) == b'SQLite format 3\x00'
+
+
+def load_examples(source: str,
+                  index: str = None) -> List[Tuple[str, ResourceExample]]:
+    """
+    Routes and examples of an examples store or ``index.json``, routes are
+    like ``GET /user/:user_id``
+
+    :param source: Examples store or ``index.json`` file
+    :param index: ``index.json`` to resolve route templates of a store,
+                  otherwise numeric and UUID path segments are parameters
+                  without names, e.g: ``GET /user/:``
+    """
+    from restiro.mock_server import load_docs_root
+    if is_sqlite(source):
+        from restiro.middlewares.routes import route_key
+        from restiro.sqlite_store import SQLiteStore
+        docs_root = load_docs_root(index) if index else None
+        store = SQLiteStore(source)
+
+        def get_route(example: ResourceExample) -> str:
+            method, path = example.request.method, example.request.path
+            resource = docs_root.find_resource(path, method) \
+                if docs_root is not None else None
+            return '%s %s' % (
+                method.upper(),
+                resource.path if resource else route_key(path)
+            )
+
+        try:
+            return [(get_route(example), example) for example in store.query()]
+        finally:
+            store.close()
+
+    docs_root = load_docs_root(source)
+    return [
+        ('%s %s' % (resource.method.upper(), resource.path), example)
+        for _, resource in docs_root.resources.items()
+        for example in resource.examples
+    ]
+
+
+def encode_request(request: ExampleRequest) -> Tuple[str, dict, bytes]:
+    """
+    Query string, headers and body of a recorded request
+    """
+    headers = {
+        k: str(v) for k, v in request.headers.items()
+        if k not in skipped_headers
+    }
+    if request.body_ref is not None:
+        body = request.body_ref.read()
+    elif request.body is not None:
+        body = request.body.encode()
+    elif request.form_params:
+        body = urlencode(request.form_params, doseq=True).encode()
+        headers.setdefault(
+            'content-type',
+            'application/x-www-form-urlencoded'
+        )
+    else:
+        body = b''
+    return urlencode(request.query_strings, doseq=True), headers, body
+
+
+class WSGITarget:
+
+    def __init__(self, app, host: str = 'localhost'):
+        """
+        In-process WSGI application
+
+        :param app: WSGI application
+        :param host: Value of ``Host`` header
+        """
+        self.app = app
+        self.host = host
+
+    def request(self, request: ExampleRequest) -> int:
+        query_string, headers, body = encode_request(request)
+        environ = {
+            'REQUEST_METHOD': request.method.upper(),
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request.path,
+            'QUERY_STRING': query_string,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in headers.items():
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+            else:
+                environ['HTTP_%s' % name.upper().replace('-', '_')] = value
+
+        statuses = []
+
+        def start_response(status, response_headers, exc_info=None):
+            statuses.append(status)
+
+        result = self.app(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(statuses[-1].split(' ', 1)[0])
+
+
+class HTTPTarget:
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        HTTP server, with a persistent connection per thread or task
+
+        :param url: Base URL, e.g: ``http://localhost:3010``
+        :param timeout: Seconds of socket timeout
+        """
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = local()
+
+    def get_target(self, request: ExampleRequest,
+                   query_string: str) -> str:
+        target = self.base_path + request.path
+        return '%s?%s' % (target, query_string) if query_string else target
+
+    def get_connection(self) -> HTTPConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection_class = HTTPSConnection \
+                if self.scheme == 'https' else HTTPConnection
+            connection = self._local.connection = connection_class(
+                self.host, self.port, timeout=self.timeout
+            )
+        return connection
+
+    def request(self, request: ExampleRequest) -> int:
+        query_string, headers, body = encode_request(request)
+        connection = self.get_connection()
+        try:
+            connection.request(
+                request.method.upper(),
+                self.get_target(request, query_string),
+                body=body or None,
+                headers=headers
+            )
+            response = connection.getresponse()
+            response.read()
+        except Exception:
+            connection.close()
+            self._local.connection = None
+            raise
+
+        if response.will_close:
+            connection.close()
+            self._local.connection = None
+        return response.status
+
+    def create_async_connection(self) -> 'AsyncHTTPConnection':
+        if self.scheme != 'http':
+            raise ValueError('Only http is supported with asyncio')
+        return AsyncHTTPConnection(self.host, self.port, self.timeout)
+
+
+class AsyncHTTPConnection:
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0):
+        """
+        Minimal persistent HTTP/1.1 client connection of asyncio
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def read_response(self) -> Tuple[int, bool]:
+        from restiro.asgi_server import read_chunked
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        version, status = lines[0].split(' ', 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            await read_chunked(self.reader)
+            will_close = False
+        elif 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+            will_close = False
+        elif int(status) in (204, 304) or 100 <= int(status) < 200:
+            will_close = False
+        else:
+            await self.reader.read()
+            will_close = True
+
+        connection = headers.get('connection', '').lower()
+        will_close = will_close or connection == 'close' or \
+            (version == 'HTTP/1.0' and connection != 'keep-alive')
+        return int(status), will_close
+
+    async def request(self, method: str, target: str, headers: dict,
+                      body: bytes) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                self.timeout
+            )
+
+        head = ['%s %s HTTP/1.1' % (method, target), 'Host: %s' % self.host]
+        head.extend('%s: %s' % header for header in headers.items())
+        if body or method not in ('GET', 'HEAD', 'DELETE', 'OPTIONS'):
+            head.append('Content-Length: %d' % len(body))
+        try:
+            self.writer.write(
+                ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+            )
+            status, will_close = await asyncio.wait_for(
+                self.read_response(),
+                self.timeout
+            )
+        except BaseException:
+            self.close()
+            raise
+
+        if will_close:
+            self.close()
+        return status
+
+
+class Sample:
+
+    def __init__(self, route: str, duration: float, expected_status: int,
+                 status: int = None, error: str = None):
+        """
+        Result of a replayed request
+
+        :param route: Route of resource, e.g: ``GET /user/:user_id``
+        :param duration: Seconds
+        :param expected_status: Recorded status
+        :param status: Replayed status, ``None`` on error
+        :param error: Error of request, e.g: connection refused
+        """
+        self.route = route
+        self.duration = duration
+        self.expected_status = expected_status
+        self.status = status
+        self.error = error
+
+    @property
+    def mismatched(self) -> bool:
+        return self.status != self.expected_status
+
+
+class BenchReport:
+
+    def __init__(self, samples: List[Sample], elapsed: float):
+        """
+        :param samples: Results of replayed requests
+        :param elapsed: Seconds of replaying
+        """
+        self.samples = samples
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self) -> float:
+        return len(self.samples) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mismatch_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(s.mismatched for s in self.samples) / len(self.samples)
+
+    @property
+    def errors(self) -> int:
+        return sum(s.error is not None for s in self.samples)
+
+    def resources(self) -> Dict[str, dict]:
+        """
+        Latency summary, count of mismatched statuses and errors per route
+        """
+        routes = {}
+        for sample in self.samples:
+            routes.setdefault(sample.route, []).append(sample)
+
+        return {
+            route: {
+                'latency': latency_summary([s.duration for s in samples]),
+                'mismatches': sum(s.mismatched for s in samples),
+                'errors': sum(s.error is not None for s in samples)
+            }
+            for route, samples in sorted(routes.items())
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': len(self.samples),
+            'elapsed': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 3),
+            'mismatch_rate': round(self.mismatch_rate, 6),
+            'errors': self.errors,
+            'resources': self.resources()
+        }
+
+    def format(self) -> str:
+        lines = [
+            '%-50s %8s %10s %10s %10s %10s' % (
+                'Resource', 'Count', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)',
+                'Mismatch'
+            )
+        ]
+        for route, summary in self.resources().items():
+            latency = summary['latency']
+            lines.append('%-50s %8d %10.3f %10.3f %10.3f %10d' % (
+                route,
+                latency['count'],
+                latency['p50'],
+                latency['p95'],
+                latency['p99'],
+                summary['mismatches']
+            ))
+        lines.append(
+            '%d requests in %.3f s, %.1f requests/s, '
+            'mismatch rate: %.2f%%, errors: %d' % (
+                len(self.samples),
+                self.elapsed,
+                self.throughput,
+                self.mismatch_rate * 100,
+                self.errors
+            )
+        )
+        return '\n'.join(lines)
+
+
+class Bench:
+
+    def __init__(self, examples: List[Tuple[str, ResourceExample]],
+                 target: Union[WSGITarget, HTTPTarget],
+                 concurrency: int = 4, rate: float = None,
+                 duration: float = 10.0, max_requests: int = None,
+                 use_asyncio: bool = False):
+        """
+        Replay recorded requests in their recorded order, round-robin,
+        until ``duration`` or ``max_requests``.
+
+        :param examples: Routes and examples, see :func:`load_examples`
+        :param target: Target of requests
+        :param concurrency: Count of threads or asyncio tasks
+        :param rate: Target requests per second, of all workers, default:
+                     as fast as possible
+        :param duration: Seconds of replaying
+        :param max_requests: Maximum count of requests
+        :param use_asyncio: Replay by asyncio tasks, requires an
+                            :class:`HTTPTarget`
+        """
+        if not examples:
+            raise ValueError('No example to replay')
+
+        if use_asyncio and not isinstance(target, HTTPTarget):
+            raise ValueError('asyncio requires a target URL')
+
+        self.examples = examples
+        self.target = target
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.use_asyncio = use_asyncio
+        self._counter = None
+        self._started_at = None
+
+    def next_request(self) -> Union[Tuple[str, ResourceExample, float],
+                                    None]:
+        """
+        Next route and example, with its due time, or ``None`` at the end
+        """
+        number = next(self._counter)
+        if self.max_requests is not None and number >= self.max_requests:
+            return None
+
+        offset = number / self.rate if self.rate else 0
+        if offset >= self.duration or \
+                time.perf_counter() - self._started_at >= self.duration:
+            return None
+
+        route, example = self.examples[number % len(self.examples)]
+        return route, example, self._started_at + offset
+
+    def run_thread(self, samples: List[Sample]):
+        while True:
+            item = self.next_request()
+            if item is None:
+                return
+
+            route, example, due = item
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            started_at = time.perf_counter()
+            status = error = None
+            try:
+                status = self.target.request(example.request)
+            except Exception as ex:
+                error = repr(ex)
+            samples.append(Sample(
+                route,
+                time.perf_counter() - started_at,
+                example.response.status,
+                status,
+                error
+            ))
+
+    async def run_task(self, samples: List[Sample]):
+        connection = self.target.create_async_connection()
+        try:
+            while True:
+                item = self.next_request()
+                if item is None:
+                    return
+
+                route, example, due = item
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                request = example.request
+                query_string, headers, body = encode_request(request)
+                started_at = time.perf_counter()
+                status = error = None
+                try:
+                    status = await connection.request(
+                        request.method.upper(),
+                        self.target.get_target(request, query_string),
+                        headers,
+                        body
+                    )
+                except Exception as ex:
+                    error = repr(ex)
+                samples.append(Sample(
+                    route,
+                    time.perf_counter() - started_at,
+                    example.response.status,
+                    status,
+                    error
+                ))
+        finally:
+            connection.close()
+
+    async def run_tasks(self, samples: List[Sample]):
+        await asyncio.gather(*(
+            self.run_task(samples) for _ in range(self.concurrency)
+        ))
+
+    def run(self) -> BenchReport:
+        samples = []
+        self._counter = count()
+        self._started_at = time.perf_counter()
+        if self.use_asyncio:
+            asyncio.run(self.run_tasks(samples))
+        else:
+            threads = [
+                Thread(target=self.run_thread, args=(samples,), daemon=True)
+                for _ in range(self.concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return BenchReport(samples, time.perf_counter() - self._started_at)
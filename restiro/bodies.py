@@ -0,0 +1,144 @@
+import mmap
+import shutil
+
+from hashlib import sha256
+from os import makedirs, replace
+from os.path import join, exists
+from tempfile import NamedTemporaryFile
+from typing import Union, Tuple
+
+bodies_dirname = 'bodies'
+
+
+def get_bodies_dir(base_dir: str):
+    return join(base_dir, bodies_dirname)
+
+
+def copy_bodies(examples, bodies_dir: str):
+    """
+    Copy sidecar body files referenced by examples into ``bodies_dir``,
+    existing files are kept
+    """
+    for example in examples:
+        for ref in example.body_refs:
+            destination = join(bodies_dir, ref.digest)
+            if exists(destination):
+                continue
+
+            makedirs(bodies_dir, exist_ok=True)
+            shutil.copyfile(ref.path, destination)
+
+
+class BodyRef:
+
+    def __init__(self, digest: str, size: int, directory: str = None):
+        """
+        Reference to a body stored in a content-addressed sidecar file
+
+        :param digest: SHA-256 hex digest of body, also the filename
+        :param size: Size of body in bytes
+        :param directory: Directory of sidecar files, bound on load
+        """
+        self.digest = digest
+        self.size = size
+        self.directory = directory
+
+    @property
+    def path(self):
+        if self.directory is None:
+            raise ValueError('Body directory is not bound %s' % self.digest)
+        return join(self.directory, self.digest)
+
+    def open(self) -> Union[mmap.mmap, bytes]:
+        """
+        Memory-map the sidecar file
+        """
+        if self.size == 0:
+            return b''
+
+        with open(self.path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self) -> bytes:
+        data = self.open()
+        try:
+            return data[:]
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024):
+        data = self.open()
+        try:
+            for offset in range(0, self.size, chunk_size):
+                yield data[offset:offset + chunk_size]
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def to_dict(self):
+        return {
+            'digest': self.digest,
+            'size': self.size
+        }
+
+    @classmethod
+    def create_from_dict(cls, data: dict, directory: str = None) -> 'BodyRef':
+        return cls(
+            digest=data['digest'],
+            size=data['size'],
+            directory=directory
+        )
+
+
+class BodyStore:
+
+    def __init__(self, directory: str, threshold: int = 64 * 1024,
+                 preview_size: int = 256):
+        """
+        Content-addressed storage of large and binary bodies
+
+        :param directory: Sidecar files directory, conventionally
+                          ``bodies`` in examples directory
+        :param threshold: Bodies larger than this size in bytes are stored
+                          in sidecar files
+        :param preview_size: Count of characters kept inline as preview
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.preview_size = preview_size
+
+    def put(self, data: bytes) -> BodyRef:
+        ref = BodyRef(
+            digest=sha256(data).hexdigest(),
+            size=len(data),
+            directory=self.directory
+        )
+        if exists(ref.path):
+            return ref
+
+        makedirs(self.directory, exist_ok=True)
+        with NamedTemporaryFile(dir=self.directory, delete=False) as f:
+            f.write(data)
+        replace(f.name, ref.path)
+        return ref
+
+    def store(self, data: bytes) -> Tuple[Union[str, None],
+                                          Union[BodyRef, None]]:
+        """
+        Store body if it's large or binary
+
+        :return: Inline body (or preview) and sidecar reference
+        """
+        try:
+            text = data.decode()
+        except UnicodeDecodeError:
+            text = None
+
+        if text is not None and len(data) <= self.threshold:
+            return text, None
+
+        return (
+            text[:self.preview_size] if text is not None else None,
+            self.put(data)
+        )
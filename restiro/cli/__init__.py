@@ -2,10 +2,13 @@ import argparse
 from importlib.util import find_spec
 
 from os import scandir, makedirs
-from os.path import dirname, isdir, basename, join, realpath
+from os.path import dirname, isdir, basename, join
 
 from restiro import Documentor
+from restiro.compression import compressions
 from restiro.helpers import validate_locale_name
+from restiro.retention import RetentionPolicy
+from restiro.sqlite_store import SQLiteStore
 
 
 def main():
@@ -27,8 +30,22 @@ def main():
     parser.add_argument(
         '--build-gettext', default=False, const=True, nargs='?',
         help='Build .POT templates')
+    parser.add_argument(
+        '--max-examples', type=int,
+        help='Maximum count of examples per resource')
+    parser.add_argument(
+        '-z', '--compression', choices=compressions,
+        help='Compress index of json and mock generators')
+    parser.add_argument(
+        '--streaming', action='store_true',
+        help='Build resource by resource to bound memory usage')
+    parser.add_argument(
+        '--store', help='Read examples from a SQLite examples store')
 
     args = parser.parse_args()
+    if args.streaming and args.store:
+        parser.error('--streaming does not support --store')
+
     title = args.title or args.src
     source_dir = dirname(find_spec(args.src).origin)
     locales_dir = args.locales
@@ -39,7 +56,14 @@ def main():
             title=title,
             base_uri=args.base_uri,
             source_dir=source_dir,
-            generator_type=args.generator
+            generator_type=args.generator,
+            retention=(
+                RetentionPolicy(args.max_examples)
+                if args.max_examples else None
+            ),
+            compression=args.compression,
+            streaming=args.streaming,
+            store=SQLiteStore(args.store) if args.store else None
         )
 
     if args.build_gettext:
@@ -71,29 +95,319 @@ def main():
         print('Documentation build success. (%s)' % output_base_dir)
 
 
-def mock():
+def ingest():
+    from restiro.ingest import Ingestion
+    parser = argparse.ArgumentParser(
+        description='Attach recorded examples to an existing index')
+    parser.add_argument(
+        'index', help='index.json or index.mock.json file')
+    parser.add_argument(
+        '-e', '--examples-dir', help='Examples directory')
+    parser.add_argument(
+        '--max-examples', type=int,
+        help='Maximum count of examples per resource')
+    parser.add_argument(
+        '--visible-only', action='store_true',
+        help='Ingest visible examples only')
+    args = parser.parse_args()
+
+    added = Ingestion(
+        index_file=args.index,
+        examples_dir=args.examples_dir,
+        retention=(
+            RetentionPolicy(args.max_examples)
+            if args.max_examples else None
+        ),
+        where=(lambda entry: entry.visible) if args.visible_only else None
+    ).run()
+
+    for key, count in sorted(added.items()):
+        print('%-60s %6d' % (key, count))
+    print('%d examples ingested into %d resources. (%s)' % (
+        sum(added.values()), len(added), args.index
+    ))
+
+
+def latency():
+    from restiro.latency import read_latencies, compare_latencies
+    parser = argparse.ArgumentParser(
+        description='Compare latency of resources against a baseline')
+    parser.add_argument(
+        'baseline', help='Baseline index.json')
+    parser.add_argument(
+        'current', help='Current index.json')
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=0.2,
+        help='Allowed relative increase of percentiles, default: 0.2')
+    parser.add_argument(
+        '--min-count', type=int, default=1,
+        help='Minimum count of samples to compare a resource, default: 1')
+    args = parser.parse_args()
+
+    regressions = compare_latencies(
+        read_latencies(args.baseline),
+        read_latencies(args.current),
+        threshold=args.threshold,
+        min_count=args.min_count
+    )
+    for regression in regressions:
+        print(regression)
+
+    if regressions:
+        print('%d latency regressions.' % len(regressions))
+        raise SystemExit(1)
+
+    print('No latency regression.')
+
+
+def bench():
     import json
-    from restiro.mock_server import MockServer, DocumentationRoot
-    from wsgiref.simple_server import make_server
+    from importlib import import_module
+    from restiro.bench import Bench, HTTPTarget, WSGITarget, load_examples
+    parser = argparse.ArgumentParser(
+        description='Replay recorded examples against a server')
+    parser.add_argument(
+        'source', help='SQLite examples store, or index.json file')
+    parser.add_argument(
+        '-i', '--index',
+        help='index.json to resolve route templates of a SQLite examples '
+             'store, otherwise routes have parameters without names')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
+        '-u', '--url', help='Base URL of server, e.g: http://localhost:3010')
+    target.add_argument(
+        '-a', '--app',
+        help='In-process WSGI application, e.g: package.module:app')
+    parser.add_argument(
+        '-c', '--concurrency', type=int, default=4,
+        help='Count of threads or asyncio tasks, default: 4')
+    parser.add_argument(
+        '--asyncio', action='store_true',
+        help='Replay by asyncio tasks instead of threads, requires --url')
+    parser.add_argument(
+        '-r', '--rate', type=float,
+        help='Target requests per second, default: as fast as possible')
+    parser.add_argument(
+        '-d', '--duration', type=float, default=10.0,
+        help='Seconds of replaying, default: 10')
+    parser.add_argument(
+        '-n', '--requests', type=int,
+        help='Maximum count of requests')
+    parser.add_argument(
+        '--json', action='store_true',
+        help='Print the report as JSON')
+    args = parser.parse_args()
+
+    if args.asyncio and not args.url:
+        parser.error('--asyncio requires --url')
+
+    if args.url:
+        target = HTTPTarget(args.url)
+    else:
+        module_name, _, attribute = args.app.partition(':')
+        target = WSGITarget(
+            getattr(import_module(module_name), attribute or 'app')
+        )
+
+    try:
+        examples = load_examples(args.source, index=args.index)
+        report = Bench(
+            examples,
+            target,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            max_requests=args.requests,
+            use_asyncio=args.asyncio
+        ).run()
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(report.format())
+
+
+def mock():
+    import signal
+    from restiro.mock_server import MockServer, load_docs_root
+    from restiro.mock_reload import Reloader
+    from restiro.faults import FaultProfiles, FaultProfile
     parser = argparse.ArgumentParser(description='Restiro Mock Server')
     parser.add_argument('--root', default='./index.json')
     parser.add_argument('--host', default='localhost')
     parser.add_argument('--port', type=int, default=3010)
+    parser.add_argument(
+        '--max-examples', type=int,
+        help='Maximum count of examples per resource')
+    parser.add_argument(
+        '--store', help='Serve examples of a SQLite examples store too')
+    parser.add_argument(
+        '--asgi', action='store_true',
+        help='Serve the ASGI mock server by uvicorn if installed, '
+             'otherwise by the built-in asyncio server')
+    parser.add_argument(
+        '--workers', type=int, default=0,
+        help='Count of pre-forked worker processes, the documentation is '
+             'loaded and indexed once before forking')
+    parser.add_argument(
+        '--watch', action='store_true',
+        help='Reload when the root file is changed, it is reloaded on '
+             'SIGHUP anyway')
+    parser.add_argument(
+        '--threads', type=int,
+        help='Serve by a threaded HTTP/1.1 server with persistent '
+             'connections, using this count of threads per process')
+    parser.add_argument(
+        '--idle-timeout', type=float, default=5.0,
+        help='Seconds to keep an idle connection of threaded server open, '
+             'default: 5')
+    parser.add_argument(
+        '--profiles',
+        help='JSON file of latency and fault injection profiles per route')
+    parser.add_argument(
+        '--latency',
+        help='Latency of default profile, in milliseconds, e.g: '
+             'fixed:20, uniform:10,50, normal:40,10, lognormal:40,0.5, '
+             'exponential:30, recorded')
+    parser.add_argument(
+        '--bandwidth', type=int,
+        help='Bytes per second of response bodies of default profile')
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help='Rate of error responses of default profile')
+    parser.add_argument(
+        '--error-status', type=int, default=503,
+        help='Status of error responses, default: 503')
+    parser.add_argument(
+        '--drop-rate', type=float, default=0.0,
+        help='Rate of dropped connections of default profile, ASGI '
+             'servers other than the built-in one respond by 500')
+    parser.add_argument(
+        '--seed', type=int, help='Seed of random faults')
+    parser.add_argument(
+        '--metrics', action='store_true',
+        help='Serve metrics in Prometheus text format on '
+             '/__restiro/metrics')
+    parser.add_argument(
+        '--metrics-dir',
+        help='Directory of metrics files of worker processes, default: a '
+             'temporary directory with --workers')
     args = parser.parse_args()
 
-    root_file = args.root or realpath
+    if (args.workers or args.threads) and args.asgi:
+        parser.error('--workers and --threads are not supported with --asgi')
+
+    store = SQLiteStore(args.store) if args.store else None
+
+    def load():
+        return load_docs_root(
+            args.root,
+            retention=(
+                RetentionPolicy(args.max_examples)
+                if args.max_examples else None
+            ),
+            store=store
+        )
+
+    profiles = None
+    if args.profiles:
+        profiles = FaultProfiles.load(args.profiles, seed=args.seed)
 
-    with open(root_file, 'r') as f:
-        root_data = json.load(f)
+    if args.latency or args.bandwidth or args.error_rate or args.drop_rate:
+        profiles = profiles or FaultProfiles(seed=args.seed)
+        try:
+            profiles.default = FaultProfile(
+                latency=args.latency,
+                bandwidth=args.bandwidth,
+                errors=(
+                    {args.error_status: args.error_rate}
+                    if args.error_rate else None
+                ),
+                drop_rate=args.drop_rate
+            )
+        except ValueError as ex:
+            parser.error(str(ex))
 
-    docs_root = DocumentationRoot.create_from_dict(root_data)
-    httpd = make_server(
-        app=MockServer(docs_root),
-        host=args.host,
-        port=args.port
+    if profiles is not None and not args.asgi and not args.threads:
+        # Injected delays of a request must not block the others
+        args.threads = 16
+
+    metrics = None
+    metrics_dir = args.metrics_dir
+    temp_metrics_dir = None
+    if args.metrics or metrics_dir:
+        from restiro.metrics import Metrics
+        if args.workers and not metrics_dir:
+            from tempfile import mkdtemp
+            metrics_dir = temp_metrics_dir = mkdtemp(prefix='restiro-')
+        if metrics_dir:
+            makedirs(metrics_dir, exist_ok=True)
+        metrics = Metrics(directory=metrics_dir)
+
+    if args.asgi:
+        from restiro.mock_asgi import ASGIMockServer
+        app = ASGIMockServer(load(), profiles=profiles, metrics=metrics)
+    else:
+        app = MockServer(load(), profiles=profiles, metrics=metrics)
+
+    reloader = Reloader(
+        app,
+        load,
+        filename=args.root if args.watch else None
     )
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reloader.request_reload)
+    reloader.start()
+
     print(
-        'Mock server is now running on https://%s:%s ...' %
+        'Mock server is now running on http://%s:%s ...' %
         (args.host, args.port)
     )
+
+    if args.asgi:
+        try:
+            import uvicorn
+        except ImportError:
+            from restiro.asgi_server import run
+            run(app, host=args.host, port=args.port)
+        else:
+            uvicorn.run(app, host=args.host, port=args.port)
+        return
+
+    if args.threads:
+        from restiro.wsgi_server import make_server
+        httpd = make_server(
+            app=app,
+            host=args.host,
+            port=args.port,
+            threads=args.threads,
+            idle_timeout=args.idle_timeout
+        )
+    else:
+        from wsgiref.simple_server import make_server
+        httpd = make_server(
+            app=app,
+            host=args.host,
+            port=args.port
+        )
+
+    if args.workers:
+        from restiro.prefork import PreforkServer
+        prefork = PreforkServer(
+            httpd,
+            workers=args.workers,
+            worker_exit=metrics.flush if metrics_dir else None
+        )
+        # Workers are forked from the reloaded parent
+        reloader.on_reload = prefork.roll
+        try:
+            prefork.serve_forever()
+        finally:
+            if temp_metrics_dir:
+                from shutil import rmtree
+                rmtree(temp_metrics_dir, ignore_errors=True)
+        return
+
     httpd.serve_forever()
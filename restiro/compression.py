@@ -0,0 +1,160 @@
+import io
+import gzip
+import lzma
+import zlib
+
+from typing import Union
+
+GZIP = 'gzip'
+ZLIB = 'zlib'
+LZMA = 'lzma'
+
+compressions = (GZIP, ZLIB, LZMA)
+compression_extensions = {
+    GZIP: '.gz',
+    ZLIB: '.zz',
+    LZMA: '.xz'
+}
+_extension_compressions = {
+    '.gz': GZIP,
+    '.zz': ZLIB,
+    '.zlib': ZLIB,
+    '.xz': LZMA,
+    '.lzma': LZMA
+}
+
+
+def compressed_filename(filename: str, compression: str = None):
+    if compression is None:
+        return filename
+    return '%s%s' % (filename, compression_extensions[compression])
+
+
+def extension_compression(filename: str) -> Union[str, None]:
+    for extension, compression in _extension_compressions.items():
+        if filename.endswith(extension):
+            return compression
+
+
+def detect_compression(filename: str) -> Union[str, None]:
+    """
+    Detect compression of file by extension, or by magic bytes
+    if the file exists
+    """
+    compression = extension_compression(filename)
+    if compression is not None:
+        return compression
+
+    try:
+        with open(filename, 'rb') as f:
+            head = f.read(6)
+    except FileNotFoundError:
+        return None
+
+    if head[:2] == b'\x1f\x8b':
+        return GZIP
+
+    if head[:6] == b'\xfd7zXZ\x00':
+        return LZMA
+
+    if len(head) >= 2 and head[0] & 0x0f == 8 and \
+            (head[0] << 8 | head[1]) % 31 == 0:
+        return ZLIB
+
+
+class ZlibReader(io.RawIOBase):
+    """
+    Streaming zlib decompressor, output is bounded by size of read buffer
+    """
+
+    def __init__(self, fileobj, chunk_size: int = 64 * 1024):
+        self._fileobj = fileobj
+        self._decompressor = zlib.decompressobj()
+        self.chunk_size = chunk_size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        decompressor = self._decompressor
+        while True:
+            if decompressor.unconsumed_tail:
+                data = decompressor.decompress(
+                    decompressor.unconsumed_tail,
+                    len(b)
+                )
+            elif decompressor.eof:
+                return 0
+            else:
+                chunk = self._fileobj.read(self.chunk_size)
+                if not chunk:
+                    raise EOFError(
+                        'Compressed file ended before the end-of-stream '
+                        'marker was reached'
+                    )
+                data = decompressor.decompress(chunk, len(b))
+
+            if data:
+                b[:len(data)] = data
+                return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.close()
+        super().close()
+
+
+class ZlibWriter(io.RawIOBase):
+
+    def __init__(self, fileobj, level: int = zlib.Z_DEFAULT_COMPRESSION):
+        self._fileobj = fileobj
+        self._compressor = zlib.compressobj(level)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._fileobj.write(self._compressor.compress(b))
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.write(self._compressor.flush())
+            self._fileobj.close()
+        super().close()
+
+
+def open_file(filename: str, mode: str = 'r', compression: str = None):
+    """
+    Open a text file, compressed or not.
+
+    On read, compression is detected by extension or magic bytes,
+    on write by extension unless ``compression`` is given.
+
+    :param filename: File path
+    :param mode: ``r``, ``w`` or ``a``
+    :param compression: ``gzip``, ``zlib`` or ``lzma``
+    """
+    if compression is None:
+        compression = detect_compression(filename) if mode == 'r' else \
+            extension_compression(filename)
+
+    if compression is None:
+        return open(filename, mode, encoding='utf-8')
+
+    if compression == GZIP:
+        return gzip.open(filename, '%st' % mode, encoding='utf-8')
+
+    if compression == LZMA:
+        return lzma.open(filename, '%st' % mode, encoding='utf-8')
+
+    if compression == ZLIB:
+        if mode == 'r':
+            raw = ZlibReader(open(filename, 'rb'))
+            return io.TextIOWrapper(io.BufferedReader(raw), encoding='utf-8')
+
+        if mode == 'w':
+            raw = ZlibWriter(open(filename, 'wb'))
+            return io.TextIOWrapper(io.BufferedWriter(raw), encoding='utf-8')
+
+    raise ValueError('Invalid compression %s for mode %s' % (compression, mode))
@@ -5,6 +5,8 @@ from importlib import import_module
 
 from restiro import Parser, DocumentationRoot
 from restiro.helpers import generate_pot
+from restiro.retention import RetentionPolicy
+from restiro.streaming import StreamingBuild
 from restiro.generators import BaseGenerator
 from restiro.constants import ansi_orange_fg, ansi_reset
 
@@ -12,13 +14,19 @@ from restiro.constants import ansi_orange_fg, ansi_reset
 class Documentor:
 
     def __init__(self, title: str, source_dir: str, base_uri: str=None,
-                 generator_type: str='markdown'):
+                 generator_type: str='markdown',
+                 retention: RetentionPolicy=None, compression: str=None,
+                 streaming: bool=False, store=None):
         self.title = title
         self.source_dir = source_dir
         self.base_uri = base_uri
         self.generator_type = generator_type
+        self.retention = retention
+        self.compression = compression
+        self.streaming = streaming
+        self.store = store
 
-    def initiate_docs_root(self, locale=None):
+    def initiate_docs_root(self, locale=None, load_examples=True):
         parsed_resources = Parser.load_from_path(self.source_dir)
         docs_root = DocumentationRoot(
             title=self.title,
@@ -26,7 +34,11 @@ class Documentor:
             locale=locale
         )
         docs_root.resources.update(parsed_resources)
-        docs_root.load_resource_examples()
+        if load_examples:
+            docs_root.load_resource_examples(
+                retention=self.retention,
+                store=self.store
+            )
         return docs_root
 
     @property
@@ -47,27 +59,60 @@ class Documentor:
         except ImportError:
             raise ValueError('Generator not detected %s' % self.generator_type)
 
-    def generate(self, output_dir: str, locales_dir=None, locale=None):
-        docs_root = self.initiate_docs_root(locale)
+    def generate(self, output_dir: str, locales_dir=None, locale=None,
+                 docs_root: DocumentationRoot=None):
+        """
+        Generate documentation into output directory
+
+        :param docs_root: Documentation root which examples are already
+                          attached, e.g: recorded in memory, default: parse
+                          sources and load examples
+        """
+        streaming = self.streaming and docs_root is None
+        if docs_root is None:
+            docs_root = self.initiate_docs_root(
+                locale,
+                load_examples=not streaming
+            )
+
         if locale:
             docs_root.translate_all(locales_dir, locale)
 
-        self.generator(
+        generator = self.generator(
             docs_root=docs_root,
-            destination_dir=output_dir
-        ).generate()
+            destination_dir=output_dir,
+            compression=self.compression
+        )
 
+        if streaming:
+            with StreamingBuild(docs_root, retention=self.retention) as build:
+                build.generate(generator)
+            self.print_summary(docs_root, build.example_counts)
+
+        else:
+            generator.generate()
+            self.print_summary(docs_root)
+
+    # noinspection PyMethodMayBeStatic
+    def print_summary(self, docs_root: DocumentationRoot,
+                      example_counts: dict=None):
         print('=== Build summary ===')
         example_free_resources = []
         for _, resource in docs_root.resources.items():
             print('>>', resource.summary_text[0])
 
-            if len(resource.examples) == 0:
+            if example_counts is None:
+                examples_count = len(resource.examples)
+            else:
+                examples_count = example_counts.get(resource.__key__, 0)
+            stats = resource.get_summary_text(examples_count)[1]
+
+            if examples_count == 0:
                 example_free_resources.append(resource)
-                print(f'{ansi_orange_fg}   {resource.summary_text[1]} {ansi_reset}')
+                print(f'{ansi_orange_fg}   {stats} {ansi_reset}')
 
             else:
-                print(f'   {resource.summary_text[1]}')
+                print(f'   {stats}')
 
             if len(resource.duplicated_parameters) > 0:
                 duplicated_params = ', '.join([param.name for param in resource.duplicated_parameters])
@@ -0,0 +1,236 @@
+"""
+    Latency and fault injection profiles of mock server
+"""
+import json
+import os
+
+from random import Random
+from typing import Dict, Union, Iterator, Tuple
+
+from restiro import ResourceExample
+from restiro.compression import open_file
+
+#: Latency distributions in milliseconds, by their parameters
+distributions = {
+    'fixed': lambda r, value: value,
+    'uniform': lambda r, low, high: r.uniform(low, high),
+    'normal': lambda r, mean, stddev: r.gauss(mean, stddev),
+    'lognormal': lambda r, median, sigma: median * r.lognormvariate(0, sigma),
+    'exponential': lambda r, mean: r.expovariate(1 / mean) if mean else 0,
+}
+
+#: Size of throttled slices, in seconds of bandwidth
+throttle_interval = 0.1
+
+
+class Latency:
+
+    def __init__(self, spec: str):
+        """
+        Latency distribution in milliseconds, e.g: ``fixed:20``,
+        ``uniform:10,50``, ``normal:40,10``, ``lognormal:40,0.5`` (median
+        and sigma), ``exponential:30`` (mean), or ``recorded`` for the
+        recorded duration of example, optionally scaled: ``recorded:2``
+
+        :param spec: Name and comma separated parameters of distribution
+        """
+        self.spec = spec
+        self.name, _, params = spec.partition(':')
+        try:
+            self.params = tuple(float(p) for p in params.split(',') if p)
+        except ValueError:
+            raise ValueError('Invalid latency %s' % spec)
+
+        if self.name == 'recorded':
+            arity = (0, 1)
+        elif self.name in distributions:
+            arity = (distributions[self.name].__code__.co_argcount - 1,)
+        else:
+            raise ValueError('Invalid latency distribution %s' % spec)
+
+        if len(self.params) not in arity:
+            raise ValueError('Invalid parameters of latency %s' % spec)
+
+    def sample(self, random: Random, example: ResourceExample) -> float:
+        """
+        Latency in seconds
+        """
+        if self.name == 'recorded':
+            factor = self.params[0] if self.params else 1
+            return (example.duration or 0) * factor
+
+        return max(distributions[self.name](random, *self.params), 0) / 1000
+
+    def __repr__(self):
+        return self.spec
+
+
+class Injection:
+
+    def __init__(self, delay: float = 0, status: int = None,
+                 drop: bool = False, bandwidth: int = None):
+        """
+        Faults injected into a response
+
+        :param delay: Seconds to wait before responding
+        :param status: Error status to respond instead of the example
+        :param drop: Close the connection without response
+        :param bandwidth: Bytes per second of response body
+        """
+        self.delay = delay
+        self.status = status
+        self.drop = drop
+        self.bandwidth = bandwidth
+
+    def throttle(self, chunks) -> Iterator[Tuple[bytes, float]]:
+        """
+        Slices of response body, with seconds to wait after each one
+        """
+        if not self.bandwidth:
+            for chunk in chunks:
+                yield chunk, 0
+            return
+
+        size = max(int(self.bandwidth * throttle_interval), 1)
+        for chunk in chunks:
+            for offset in range(0, len(chunk), size):
+                data = chunk[offset:offset + size]
+                yield data, len(data) / self.bandwidth
+
+
+class FaultProfile:
+
+    def __init__(self, latency: str = None, bandwidth: int = None,
+                 errors: Dict[int, float] = None, drop_rate: float = 0.0):
+        """
+        :param latency: Latency distribution, see :class:`Latency`
+        :param bandwidth: Bytes per second of response body
+        :param errors: Rates of error statuses, e.g: ``{503: 0.01}``
+        :param drop_rate: Rate of dropping connections without response,
+                          ASGI servers other than the bundled one
+                          respond by 500
+        """
+        self.latency = Latency(latency) if latency else None
+        self.bandwidth = bandwidth
+        self.errors = {
+            int(status): float(rate)
+            for status, rate in (errors or {}).items()
+        }
+        self.drop_rate = drop_rate
+        if drop_rate < 0 or any(r < 0 for r in self.errors.values()) or \
+                drop_rate + sum(self.errors.values()) > 1:
+            raise ValueError('Invalid rates of faults')
+
+    def inject(self, random: Random, example: ResourceExample) -> Injection:
+        injection = Injection(
+            delay=self.latency.sample(random, example)
+            if self.latency else 0,
+            bandwidth=self.bandwidth
+        )
+
+        # Faults are exclusive
+        if self.drop_rate or self.errors:
+            value = random.random()
+            if value < self.drop_rate:
+                injection.drop = True
+                return injection
+
+            value -= self.drop_rate
+            for status, rate in sorted(self.errors.items()):
+                if value < rate:
+                    injection.status = status
+                    break
+                value -= rate
+        return injection
+
+    def to_dict(self):
+        return {
+            'latency': self.latency.spec if self.latency else None,
+            'bandwidth': self.bandwidth,
+            'errors': {str(k): v for k, v in self.errors.items()},
+            'drop_rate': self.drop_rate
+        }
+
+    @classmethod
+    def create_from_dict(cls, data: dict) -> 'FaultProfile':
+        return cls(
+            latency=data.get('latency'),
+            bandwidth=data.get('bandwidth'),
+            errors=data.get('errors'),
+            drop_rate=data.get('drop_rate', 0.0)
+        )
+
+
+class FaultProfiles:
+
+    def __init__(self, routes: Dict[str, FaultProfile] = None,
+                 default: FaultProfile = None, seed=None):
+        """
+        Fault profiles of mock server per route, e.g:
+        ``GET /user/:user_id``, and the default one of other routes
+
+        :param routes: Profiles by route
+        :param default: Profile of routes which have no profile
+        :param seed: Seed of random, to reproduce faults. Forked
+                     processes, e.g: pre-forked workers, are reseeded by
+                     their pid, to not inject the same faults
+        """
+        self.routes = routes or {}
+        self.default = default
+        self.seed = seed
+        self.random = Random(seed)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reseed)
+
+    def _reseed(self):
+        self.random = Random(
+            None if self.seed is None else
+            '%s-%s' % (self.seed, os.getpid())
+        )
+
+    def get(self, route: str) -> Union[FaultProfile, None]:
+        return self.routes.get(route, self.default)
+
+    def inject(self, route: str,
+               example: ResourceExample) -> Union[Injection, None]:
+        profile = self.get(route)
+        return None if profile is None else \
+            profile.inject(self.random, example)
+
+    def to_dict(self):
+        return {
+            'default': self.default.to_dict() if self.default else None,
+            'routes': {k: v.to_dict() for k, v in self.routes.items()}
+        }
+
+    @classmethod
+    def create_from_dict(cls, data: dict, seed=None) -> 'FaultProfiles':
+        return cls(
+            routes={
+                route: FaultProfile.create_from_dict(profile)
+                for route, profile in data.get('routes', {}).items()
+            },
+            default=FaultProfile.create_from_dict(data['default'])
+            if data.get('default') else None,
+            seed=seed
+        )
+
+    @classmethod
+    def load(cls, filename: str, seed=None) -> 'FaultProfiles':
+        """
+        Load profiles of a JSON file, e.g::
+
+            {
+                "default": {"latency": "lognormal:20,0.5"},
+                "routes": {
+                    "GET /user/:user_id": {
+                        "latency": "recorded",
+                        "bandwidth": 65536,
+                        "errors": {"503": 0.01},
+                        "drop_rate": 0.001
+                    }
+                }
+            }
+        """
+        with open_file(filename) as f:
+            return cls.create_from_dict(json.load(f), seed=seed)
@@ -4,15 +4,18 @@ from os import makedirs
 from os.path import exists, dirname, join
 
 from restiro import DocumentationRoot, Resource, Document
+from restiro.bodies import get_bodies_dir, copy_bodies
 
 
 # noinspection PyMethodMayBeStatic
 class BaseGenerator:
     _files = []
 
-    def __init__(self, docs_root: DocumentationRoot, destination_dir: str):
+    def __init__(self, docs_root: DocumentationRoot, destination_dir: str,
+                 compression: str = None):
         self.destination_dir = destination_dir
         self.docs_root = docs_root
+        self.compression = compression
 
     def _ensure_file(self, filename: str):
         filename = join(self.destination_dir, filename)
@@ -27,14 +30,31 @@ class BaseGenerator:
             self._files.append(filename)
             return f
 
-    def generate_resources(self):
+    def iter_resources(self):
         resources_tree = self.docs_root.resources.__tree__.items()
         for resource_path, resource_methods in resources_tree:
             for resource_method, resources in resource_methods.items():
-                for resource in resources:
-                    f = self._ensure_file(self.get_resource_filename(resource))
-                    self.write_resource(f, resource)
-                    f.close()
+                yield from resources
+
+    def generate_resources(self):
+        for resource in self.iter_resources():
+            f = self._ensure_file(self.get_resource_filename(resource))
+            self.write_resource(f, resource)
+            f.close()
+
+    def iter_resources_streaming(self, load_examples):
+        """
+        Iterate resources with their examples loaded by ``load_examples``,
+        loaded examples are released when the next resource is requested
+        """
+        for resource in self.iter_resources():
+            attached_examples = resource.examples
+            resource.examples = load_examples(resource)
+            try:
+                yield resource
+                self.copy_bodies(resource.examples)
+            finally:
+                resource.examples = attached_examples
 
     def generate_documents(self):
         for document in self.docs_root.documents:
@@ -47,6 +67,17 @@ class BaseGenerator:
         self.write_index(f)
         f.close()
 
+    def copy_bodies(self, examples=None):
+        """
+        Copy sidecar body files referenced by examples into ``bodies``
+
+        :param examples: Examples to copy bodies, default: all examples
+        """
+        if examples is None:
+            examples = self.docs_root.iter_examples()
+
+        copy_bodies(examples, get_bodies_dir(self.destination_dir))
+
     def clean_destination(self):
         shutil.rmtree(self.destination_dir)
 
@@ -75,3 +106,18 @@ class BaseGenerator:
         self.generate_documents()
         self.generate_resources()
         self.generate_index()
+        self.copy_bodies()
+
+    def generate_streaming(self, load_examples):
+        """
+        Generate output while only one resource has examples in memory
+
+        :param load_examples: Callable which returns examples of a resource
+        """
+        self.clean_destination()
+        self.generate_documents()
+        for resource in self.iter_resources_streaming(load_examples):
+            f = self._ensure_file(self.get_resource_filename(resource))
+            self.write_resource(f, resource)
+            f.close()
+        self.generate_index()
@@ -1,12 +1,34 @@
 import json
 
+from os import makedirs
+from os.path import join
+
+from restiro.compression import open_file, compressed_filename
 from restiro.generators import BaseGenerator
 
 
 class JSONGenerator(BaseGenerator):
+    index_suffix = 'json'
 
     def get_index_filename(self):
-        return '%s.json' % super().get_index_filename()
+        return '%s.%s' % (super().get_index_filename(), self.index_suffix)
+
+    def _open_index(self):
+        makedirs(self.destination_dir, exist_ok=True)
+        filename = join(self.destination_dir, compressed_filename(
+            self.get_index_filename(),
+            self.compression
+        ))
+        return open_file(filename, 'w', self.compression)
+
+    def generate_index(self):
+        with self._open_index() as f:
+            self.write_index(f)
+
+    def generate_streaming(self, load_examples):
+        self.clean_destination()
+        with self._open_index() as f:
+            self.write_index_streaming(f, load_examples)
 
     def generate_documents(self):
         pass
@@ -22,3 +44,16 @@ class JSONGenerator(BaseGenerator):
 
     def write_index(self, file_stream):
         file_stream.write(json.dumps(self.docs_root.to_dict()))
+
+    def write_index_streaming(self, file_stream, load_examples):
+        head = self.docs_root.to_dict()
+        del head['resources']
+        file_stream.write(json.dumps(head)[:-1])
+        file_stream.write(', "resources": [')
+        for index, resource in enumerate(
+            self.iter_resources_streaming(load_examples)
+        ):
+            if index:
+                file_stream.write(', ')
+            file_stream.write(json.dumps(resource.to_dict()))
+        file_stream.write(']}')
@@ -7,6 +7,7 @@ from restiro import (
     ExampleRequest,
     ResourceExample
 )
+from restiro.bodies import BodyRef, bodies_dirname
 from restiro.models.parameters import Param
 from restiro.generators import BaseGenerator
 
@@ -14,11 +15,21 @@ from restiro.generators import BaseGenerator
 class MarkdownRepresentations:
 
     @staticmethod
-    def _repr_response_body(response: ExampleResponse):
+    def _repr_body_ref(body_ref: BodyRef):
+        if body_ref is None:
+            return ''
+        return '\n[Full body (%s bytes)](%s)\n' % (
+            body_ref.size,
+            '%s/%s' % (bodies_dirname, body_ref.digest)
+        )
+
+    @classmethod
+    def _repr_response_body(cls, response: ExampleResponse):
         syntax_language = response.body_format
-        return '```%s\n%s\n```' % (
+        return '```%s\n%s\n```%s' % (
             syntax_language.name if syntax_language else '',
-            response.body_json or response.body
+            response.body_json or response.body,
+            cls._repr_body_ref(response.body_ref)
         )
 
     @staticmethod
@@ -33,12 +44,13 @@ class MarkdownRepresentations:
             response.repr_headers()
         )
 
-    @staticmethod
-    def _repr_request_body(request: ExampleRequest):
+    @classmethod
+    def _repr_request_body(cls, request: ExampleRequest):
         syntax_language = request.body_format
-        return '```%s\n%s\n```' % (
+        return '```%s\n%s\n```%s' % (
             syntax_language.name if syntax_language else '',
-            request.body
+            request.body,
+            cls._repr_body_ref(request.body_ref)
         )
 
     @classmethod
@@ -137,6 +149,18 @@ class MarkdownGenerator(BaseGenerator, MarkdownRepresentations):
         if resource.description:
             f.write('%s\n\n' % resource.description)
 
+        latency = resource.latency
+        if latency:
+            f.write(
+                '**Latency:** p50 `%s ms`, p95 `%s ms`, p99 `%s ms` '
+                '(%s samples)\n\n' % (
+                    latency['p50'],
+                    latency['p95'],
+                    latency['p99'],
+                    latency['count']
+                )
+            )
+
         if len(resource.params) > 0:
             f.write('\n## Parameters\n\n')
             self.write_resource_parameters(f, resource)
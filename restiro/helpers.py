@@ -2,16 +2,18 @@
 import re
 import tempfile
 
-from os import makedirs
-from os.path import join
+from os import makedirs, scandir
+from os.path import join, basename
 from shutil import rmtree
 
 from collections import OrderedDict
+from urllib.parse import parse_qs
 from collections.abc import MutableMapping, Mapping
 
 _under_scorer1 = re.compile(r'(.)([A-Z][a-z]+)')
 _under_scorer2 = re.compile('([a-z0-9])([A-Z])')
 _non_alphabet = re.compile('[\x00-\x2F\x3A-\x40\x5B-\x60\x7B-\x7F]+')
+_example_filename = re.compile(r'^\d+-')
 
 
 def to_snake_case(s):
@@ -29,6 +31,14 @@ def replace_non_alphabet(string, replace):
     return _non_alphabet.sub(replace, string)
 
 
+def parse_query_string(qs):
+    return {k: v[0] if len(v) == 1 else v for k, v in parse_qs(
+        qs,
+        keep_blank_values=True,
+        strict_parsing=False
+    ).items()}
+
+
 def get_examples_dir():
     temp_dir = join(tempfile.gettempdir(), 'restiro_examples')
     makedirs(temp_dir, exist_ok=True)
@@ -39,6 +49,28 @@ def clean_examples_dir():
     rmtree(get_examples_dir())
 
 
+def list_example_files(examples_dir: str):
+    """
+    List example files sorted by index number from filename
+    (generated by middleware), filename format: {index}-{uuid}.json
+    """
+    entries = sorted(
+        (
+            entry for entry in scandir(examples_dir)
+            if entry.is_file() and _example_filename.match(entry.name)
+        ),
+        key=lambda k: example_file_seq(k.name)
+    )
+    return [entry.path for entry in entries]
+
+
+def example_file_seq(filename: str) -> int:
+    """
+    Index number of an example file, from its filename
+    """
+    return int(basename(filename).split('-')[0])
+
+
 def generate_pot(translations):
     return ''.join(['msgid "%s"\nmsgstr ""\n\n' % t for t in translations])
 
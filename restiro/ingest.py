@@ -0,0 +1,237 @@
+import json
+
+from os import close, replace, remove, stat, chmod
+from os.path import join, dirname, basename, realpath
+from tempfile import mkstemp
+from typing import Dict
+
+from restiro import DocumentationRoot, Resource, ResourceExample
+from restiro.models import ResourceResolver
+from restiro.bodies import get_bodies_dir, copy_bodies
+from restiro.compression import open_file, detect_compression
+from restiro.helpers import get_examples_dir
+from restiro.latency import latency_summary, dropped_durations
+from restiro.manifest import ManifestEntry, read_example_sources, \
+    read_dropped
+from restiro.models.example import content_hash
+from restiro.retention import RetentionPolicy
+
+
+class Ingestion:
+
+    def __init__(self, index_file: str, examples_dir: str = None,
+                 retention: RetentionPolicy = None, where=None):
+        """
+        Attach recorded examples to an existing ``index.json`` or
+        ``index.mock.json``, without parsing sources again.
+
+        Examples are routed like :meth:`restiro.models.Resources.find`,
+        examples already in the index are skipped by content hash, with a
+        manifest they are skipped before decoding.
+        Only entries of changed resources are rebuilt, then the index is
+        replaced atomically. Durations of examples which are dropped by
+        retention, here or at record time, are kept in the index for
+        latency of resources.
+
+        :param index_file: Index file, compressed or not
+        :param examples_dir: Examples directory, default: temp directory
+        :param retention: Limit examples per resource
+        :param where: Predicate of :class:`restiro.manifest.ManifestEntry`
+                      to select examples
+        """
+        self.index_file = index_file
+        self.examples_dir = examples_dir or get_examples_dir()
+        self.retention = retention
+        self.where = where
+        self.data = None
+        self.docs_root = None
+        self._resource_data = {}
+        self._hashes = {}
+        self.resolve = None
+        self.new_examples = {}
+        self.new_dropped = {}
+
+    def load_index(self):
+        with open_file(self.index_file) as f:
+            self.data = json.load(f)
+
+        # Bare resources, just for routing
+        self.docs_root = DocumentationRoot(
+            title=self.data['title'],
+            base_uri=self.data.get('base_uri')
+        )
+        for resource_data in self.data['resources']:
+            resource = Resource(
+                path=resource_data['path'],
+                method=resource_data['method']
+            )
+            self.docs_root.resources.append(resource)
+            self._resource_data[resource.__key__] = resource_data
+
+        # Implicit CORS resources are not in the index
+        self.resolve = ResourceResolver(
+            self.docs_root,
+            accept=lambda resource: resource.__key__ in self._resource_data
+        )
+
+    def get_hashes(self, resource: Resource) -> set:
+        """
+        Hashes of examples in the index, and keys of examples which are
+        dropped by retention, not to count their durations again
+        """
+        key = resource.__key__
+        if key not in self._hashes:
+            resource_data = self._resource_data[key]
+            self._hashes[key] = {
+                content_hash(example_data)
+                for example_data in resource_data['examples']
+            }
+            self._hashes[key].update(resource_data.get('dropped_keys', ()))
+        return self._hashes[key]
+
+    def is_new(self, resource: Resource, hash_: str) -> bool:
+        hashes = self.get_hashes(resource)
+        if hash_ in hashes:
+            return False
+
+        hashes.add(hash_)
+        return True
+
+    def _add(self, resource: Resource, example: ResourceExample):
+        self.new_examples.setdefault(resource.__key__, []).append(example)
+
+    def collect(self):
+        """
+        Route new examples to resources of index
+        """
+        for source in read_example_sources(self.examples_dir):
+            if isinstance(source, ManifestEntry):
+                if self.where is not None and not self.where(source):
+                    continue
+
+                resource = self.resolve(source.method, source.path)
+                if resource and self.is_new(resource, source.hash):
+                    self._add(resource, ResourceExample.load(
+                        join(self.examples_dir, source.file)
+                    ))
+                continue
+
+            # Unlisted example file
+            example = ResourceExample.load(source)
+            data = example.to_dict()
+            hash_ = content_hash(data)
+            if self.where is not None and not self.where(
+                ManifestEntry.create_from_example_file(source, data, hash_)
+            ):
+                continue
+
+            resource = self.resolve(
+                example.request.method,
+                example.request.path
+            )
+            if resource and self.is_new(resource, hash_):
+                self._add(resource, example)
+
+        # Examples which are not admitted at record time, by unique names
+        for entry in read_dropped(self.examples_dir):
+            if self.where is not None and not self.where(entry):
+                continue
+
+            resource = self.resolve(entry.method, entry.path)
+            if resource and self.is_new(resource, entry.file):
+                self.new_dropped.setdefault(resource.__key__, []).append(
+                    entry
+                )
+
+    def merge(self) -> Dict[str, int]:
+        """
+        Rebuild examples of resources with new examples
+
+        :return: Count of added examples per changed resource key
+        """
+        added = {}
+        bodies_dir = get_bodies_dir(dirname(realpath(self.index_file)))
+        keys = list(self.new_examples)
+        keys.extend(key for key in self.new_dropped if key not in keys)
+        for key in keys:
+            resource_data = self._resource_data[key]
+            new_examples = self.new_examples.get(key, [])
+            examples = [
+                ResourceExample.create_from_dict(example_data)
+                for example_data in resource_data['examples']
+            ]
+            existing_count = len(examples)
+            examples.extend(new_examples)
+            retained = (
+                self.retention.select(examples)
+                if self.retention is not None else examples
+            )
+
+            # Latency is not biased to retained examples, durations of
+            # dropped examples are kept in the index
+            retained_ids = {id(e) for e in retained}
+            dropped = [e for e in examples if id(e) not in retained_ids]
+            durations = dropped_durations(examples, retained) + [
+                entry.duration for entry in self.new_dropped.get(key, ())
+                if entry.duration is not None
+            ]
+
+            new_ids = {id(e) for e in new_examples}
+            retained_new = [e for e in retained if id(e) in new_ids]
+            if not retained_new and len(retained) == existing_count and \
+                    not durations:
+                continue
+
+            copy_bodies(retained_new, bodies_dir)
+            resource_data['examples'] = [e.to_dict() for e in retained]
+            resource_data['dropped_durations'] = \
+                resource_data.get('dropped_durations', []) + durations
+            resource_data['dropped_keys'] = \
+                resource_data.get('dropped_keys', []) + [
+                    e.content_hash for e in dropped
+                ] + [entry.file for entry in self.new_dropped.get(key, ())]
+            resource_data['latency'] = latency_summary(
+                resource_data['dropped_durations'] + [
+                    e.duration for e in retained if e.duration is not None
+                ]
+            )
+            added[key] = len(retained_new)
+
+        return added
+
+    def write_index(self):
+        """
+        Replace index file atomically, keeping its compression
+        """
+        directory = dirname(realpath(self.index_file))
+        descriptor, temp_filename = mkstemp(
+            prefix='.%s.' % basename(self.index_file),
+            dir=directory
+        )
+        try:
+            close(descriptor)
+            chmod(temp_filename, stat(self.index_file).st_mode)
+            with open_file(
+                temp_filename,
+                'w',
+                detect_compression(self.index_file)
+            ) as f:
+                json.dump(self.data, f)
+
+            replace(temp_filename, self.index_file)
+        except BaseException:
+            remove(temp_filename)
+            raise
+
+    def run(self) -> Dict[str, int]:
+        """
+        Ingest examples, the index is written only if it's changed
+
+        :return: Count of added examples per changed resource key
+        """
+        self.load_index()
+        self.collect()
+        added = self.merge()
+        if added:
+            self.write_index()
+        return added
@@ -0,0 +1,118 @@
+import json
+
+from math import ceil
+from typing import Dict, List, Union
+
+from restiro.compression import open_file
+
+percentiles = (50, 95, 99)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+    """
+    return values[max(ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def latency_summary(durations: List[float]) -> Union[dict, None]:
+    """
+    Percentiles of durations in milliseconds, e.g:
+    ``{'count': 20, 'p50': 1.2, 'p95': 3.4, 'p99': 5.1}``
+
+    :param durations: Durations in seconds
+    :return: Summary or ``None`` without any duration
+    """
+    if not durations:
+        return None
+
+    values = sorted(durations)
+    summary = {'count': len(values)}
+    for q in percentiles:
+        summary['p%s' % q] = round(percentile(values, q) * 1000, 3)
+    return summary
+
+
+def dropped_durations(examples: list, retained: list) -> List[float]:
+    """
+    Durations of examples which are not retained
+
+    :param examples: Examples before retention
+    :param retained: Retained examples, a subset of ``examples``
+    """
+    retained_ids = {id(example) for example in retained}
+    return [
+        example.duration for example in examples
+        if id(example) not in retained_ids and example.duration is not None
+    ]
+
+
+def read_latencies(filename: str) -> Dict[str, dict]:
+    """
+    Latency summaries per resource key, from ``index.json`` or a baseline
+    file of the same shape
+    """
+    with open_file(filename) as f:
+        data = json.load(f)
+
+    return {
+        '%s %s' % (resource['method'].upper(), resource['path']):
+            resource['latency']
+        for resource in data['resources']
+        if resource.get('latency')
+    }
+
+
+class Regression:
+
+    def __init__(self, resource: str, percentile_key: str, baseline: float,
+                 current: float):
+        self.resource = resource
+        self.percentile_key = percentile_key
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+    def __repr__(self):
+        return '%s %s: %.3f ms -> %.3f ms (%+.1f%%)' % (
+            self.resource,
+            self.percentile_key,
+            self.baseline,
+            self.current,
+            (self.ratio - 1) * 100
+        )
+
+
+def compare_latencies(baseline: Dict[str, dict], current: Dict[str, dict],
+                      threshold: float = 0.2,
+                      min_count: int = 1) -> List[Regression]:
+    """
+    Find resources which latency is regressed
+
+    :param baseline: Latency summaries of baseline
+    :param current: Latency summaries of current build
+    :param threshold: Allowed relative increase, e.g: ``0.2`` for 20%
+    :param min_count: Minimum count of samples in both summaries
+    """
+    regressions = []
+    for resource, current_summary in sorted(current.items()):
+        baseline_summary = baseline.get(resource)
+        if baseline_summary is None or min(
+            baseline_summary['count'],
+            current_summary['count']
+        ) < min_count:
+            continue
+
+        for q in percentiles:
+            key = 'p%s' % q
+            if current_summary[key] > baseline_summary[key] * (1 + threshold):
+                regressions.append(Regression(
+                    resource,
+                    key,
+                    baseline_summary[key],
+                    current_summary[key]
+                ))
+    return regressions
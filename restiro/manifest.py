@@ -0,0 +1,192 @@
+import json
+
+from os.path import join, exists, basename
+from typing import List, Union
+
+from restiro.helpers import example_file_seq, list_example_files
+
+manifest_filename = 'manifest.jsonl'
+dropped_filename = 'dropped.jsonl'
+
+
+class ManifestEntry:
+
+    __slots__ = (
+        'seq', 'method', 'path', 'status', 'visible', 'hash', 'file', 'offset'
+    )
+
+    def __init__(self, seq: int, method: str, path: str, status: int,
+                 visible: bool, hash: str, file: str, offset: int = 0):
+        """
+        Summary of a recorded example, to select examples without
+        decoding them
+
+        :param seq: Sequence number of example (request index)
+        :param method: Requested method
+        :param path: Requested path
+        :param status: Response status code
+        :param visible: Example is marked as visible
+        :param hash: Content hash of example
+        :param file: Filename of example, relative to examples directory
+        :param offset: Position of example in ``file``, always ``0`` for
+                       one-example-per-file stores
+        """
+        self.seq = seq
+        self.method = method
+        self.path = path
+        self.status = status
+        self.visible = visible
+        self.hash = hash
+        self.file = file
+        self.offset = offset
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in ManifestEntry.__slots__}
+
+    @classmethod
+    def create_from_dict(cls, data: dict) -> 'ManifestEntry':
+        return cls(**data)
+
+    @classmethod
+    def create_from_example_dict(cls, seq: int, data: dict, hash: str,
+                                 file: str) -> 'ManifestEntry':
+        return cls(
+            seq=seq,
+            method=data['request']['method'],
+            path=data['request']['path'],
+            status=data['response']['status'],
+            visible=data['visible'],
+            hash=hash,
+            file=file
+        )
+
+    @classmethod
+    def create_from_example_file(cls, filename: str, data: dict,
+                                 hash: str = None) -> 'ManifestEntry':
+        """
+        Entry of an example file of a directory without manifest
+
+        :param filename: Example file, named by its sequence number
+        :param data: Decoded example
+        :param hash: Content hash of example, if computed
+        """
+        return cls.create_from_example_dict(
+            seq=example_file_seq(filename),
+            data=data,
+            hash=hash,
+            file=basename(filename)
+        )
+
+
+class DroppedEntry(ManifestEntry):
+
+    __slots__ = ('duration',)
+
+    def __init__(self, duration: float, **kwargs):
+        """
+        Summary of an example which is not admitted by retention at record
+        time, only its duration is kept for latency of its resource.
+
+        Its ``file`` is a unique name, like names of example files, but the
+        example is not written.
+
+        :param duration: Duration of handling the request, in seconds
+        """
+        super().__init__(**kwargs)
+        self.duration = duration
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['duration'] = self.duration
+        return data
+
+    @classmethod
+    def create_from_example(cls, seq: int, example,
+                            file: str) -> 'DroppedEntry':
+        return cls(
+            seq=seq,
+            method=example.request.method,
+            path=example.request.path,
+            status=example.response.status,
+            visible=example.visible,
+            hash=example.content_hash,
+            file=file,
+            duration=example.duration
+        )
+
+
+def append_manifest(examples_dir: str, entries: List[ManifestEntry],
+                    filename: str = manifest_filename):
+    lines = ''.join(
+        '%s\n' % json.dumps(entry.to_dict(), separators=(',', ':'))
+        for entry in entries
+    )
+    # Single write in append mode, to not interleave with other writers
+    with open(join(examples_dir, filename), 'a') as f:
+        f.write(lines)
+
+
+def read_entries(filename: str, entry_class=ManifestEntry) -> list:
+    entries = []
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                entries.append(entry_class.create_from_dict(json.loads(line)))
+            except ValueError:
+                # Partially written line of an interrupted writer
+                continue
+
+    entries.sort(key=lambda e: e.seq)
+    return entries
+
+
+def read_manifest(examples_dir: str) -> Union[List[ManifestEntry], None]:
+    """
+    Read manifest entries ordered by sequence number,
+    ``None`` if examples directory has no manifest
+    """
+    filename = join(examples_dir, manifest_filename)
+    if not exists(filename):
+        return None
+
+    return read_entries(filename)
+
+
+def read_dropped(examples_dir: str) -> List[DroppedEntry]:
+    """
+    Read entries of examples which are not admitted by retention at record
+    time, ordered by sequence number
+    """
+    filename = join(examples_dir, dropped_filename)
+    if not exists(filename):
+        return []
+
+    return read_entries(filename, DroppedEntry)
+
+
+def read_example_sources(
+        examples_dir: str) -> List[Union[ManifestEntry, str]]:
+    """
+    Manifest entries and unlisted example files of examples directory, in
+    recording order.
+
+    Example files which are not listed by the manifest (written before it,
+    without it, or by an interrupted batch) are given by filename, to be
+    decoded before selecting and routing them.
+    """
+    entries = read_manifest(examples_dir) or []
+    listed = {entry.file for entry in entries}
+    unlisted = [
+        filename for filename in list_example_files(examples_dir)
+        if basename(filename) not in listed
+    ]
+    if not entries or not unlisted:
+        return entries or unlisted
+
+    return sorted(
+        entries + unlisted,
+        key=lambda source: (
+            source.seq if isinstance(source, ManifestEntry) else
+            example_file_seq(source)
+        )
+    )
@@ -0,0 +1,219 @@
+"""
+    Metrics of mock server in Prometheus text format
+"""
+import json
+import os
+import time
+
+from bisect import bisect_left
+from tempfile import mkstemp
+from threading import Lock, Thread
+from typing import List, Tuple
+
+#: Upper bounds of histogram buckets, in seconds
+buckets = (
+    .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5,
+    1., 2.5, 5., 10.
+)
+
+#: Name, type and help of metrics
+definitions = (
+    ('restiro_mock_hits_total', 'counter',
+     'Requests which matched an example, by route and exact or fuzzy match'),
+    ('restiro_mock_misses_total', 'counter',
+     'Requests without any example, by route'),
+    ('restiro_mock_match_seconds', 'histogram',
+     'Time of finding the example of request, by route'),
+    ('restiro_mock_request_seconds', 'histogram',
+     'Time of handling request until response is started, by route'),
+)
+
+content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+def format_labels(labels: Labels) -> str:
+    return ','.join('%s="%s"' % (k, escape_label(v)) for k, v in labels)
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+
+    def __init__(self, directory: str = None, flush_interval: float = 1.0):
+        """
+        Counters and histograms, in memory of process.
+
+        With ``directory``, each process writes its metrics into its own
+        file there every ``flush_interval`` seconds, and :meth:`render`
+        aggregates files of all processes, e.g: pre-forked workers. Files
+        of exited processes are kept, so counters never decrease.
+
+        :param directory: Shared directory of processes
+        :param flush_interval: Seconds between writing metrics of process
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._reset()
+        if directory is not None and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = time.time_ns()
+        # Counts and histograms by name and labels
+        self.counters = {}
+        self.histograms = {}
+        self._lock = Lock()
+        self._thread = None
+
+    @property
+    def filename(self) -> str:
+        # With start time, a process reusing the pid of an exited one does
+        # not overwrite its file
+        return os.path.join(
+            self.directory,
+            '%s-%s.json' % (self.pid, self.started)
+        )
+
+    def _start(self):
+        # Per process, on first record
+        self._thread = Thread(
+            target=self._run,
+            name='restiro-metrics',
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def inc(self, name: str, labels: Labels, value: int = 1):
+        key = name, labels
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            if self._thread is None and self.directory is not None:
+                self._start()
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        key = name, labels
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Counts of buckets and +Inf, then sum
+                histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+            histogram[bisect_left(buckets, seconds)] += 1
+            histogram[-1] += seconds
+            if self._thread is None and self.directory is not None:
+                self._start()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, list(histogram)]
+                    for (name, labels), histogram in self.histograms.items()
+                ]
+            }
+
+    def flush(self):
+        """
+        Write metrics of process into its file
+        """
+        data = json.dumps(self.to_dict())
+        fd, temp_filename = mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.replace(temp_filename, self.filename)
+
+    def collect(self) -> Tuple[dict, dict]:
+        """
+        Counters and histograms of all processes
+        """
+        sources = [self.to_dict()]
+        if self.directory is not None:
+            own_file = os.path.basename(self.filename)
+            for entry in os.scandir(self.directory):
+                if entry.name == own_file or \
+                        not entry.name.endswith('.json'):
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        sources.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        counters = {}
+        histograms = {}
+        for source in sources:
+            for name, labels, value in source['counters']:
+                key = name, tuple(tuple(label) for label in labels)
+                counters[key] = counters.get(key, 0) + value
+
+            for name, labels, histogram in source['histograms']:
+                key = name, tuple(tuple(label) for label in labels)
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = list(histogram)
+                else:
+                    for i, value in enumerate(histogram):
+                        merged[i] += value
+        return counters, histograms
+
+    def render(self) -> str:
+        """
+        Metrics in Prometheus text format
+        """
+        counters, histograms = self.collect()
+        lines = []
+        for name, type_, help_ in definitions:
+            lines.append('# HELP %s %s' % (name, help_))
+            lines.append('# TYPE %s %s' % (name, type_))
+            if type_ == 'counter':
+                for (key_name, labels), value in sorted(counters.items()):
+                    if key_name == name:
+                        lines.append('%s{%s} %s' % (
+                            name, format_labels(labels), value
+                        ))
+                continue
+
+            for (key_name, labels), histogram in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                lines.extend(self.render_histogram(name, labels, histogram))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def render_histogram(name: str, labels: Labels,
+                         histogram: list) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf',), histogram):
+            cumulative += count
+            lines.append('%s_bucket{%s} %s' % (
+                name,
+                format_labels(labels + (('le', str(bound)),)),
+                cumulative
+            ))
+        lines.append('%s_sum{%s} %s' % (
+            name, format_labels(labels), format_value(histogram[-1])
+        ))
+        lines.append('%s_count{%s} %s' % (
+            name, format_labels(labels), cumulative
+        ))
+        return lines
@@ -0,0 +1,393 @@
+import asyncio
+import json as json_
+
+from http import HTTPStatus
+from itertools import count
+from time import perf_counter
+from urllib.parse import urlencode, urlsplit
+
+from restiro import (
+    DocumentationRoot,
+    ResourceExample,
+    ExampleRequest,
+    ExampleResponse
+)
+from restiro.bodies import BodyStore
+from restiro.helpers import parse_query_string, CaseInsensitiveDict
+from restiro.middlewares.routes import (
+    OPTIONS_ALWAYS,
+    OptionsCaptureMixin,
+    route_key
+)
+from restiro.middlewares.wsgi import decode_body
+from restiro.retention import RetentionPolicy
+from restiro.sinks import ExampleSink, BackgroundSink, create_sink
+
+#: Key of scope extensions, ``{'visible': bool}`` overrides visibility of the
+#: recorded example
+scope_extension = 'restiro'
+
+
+def scope_headers(scope) -> dict:
+    return {
+        k.decode('latin-1').title(): v.decode('latin-1')
+        for k, v in scope.get('headers', ())
+    }
+
+
+def status_reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ''
+
+
+class RecorderMiddleware:
+
+    def __init__(self, app, sink: ExampleSink = None, examples_dir: str = None,
+                 body_store: BodyStore = None, visible: bool = False,
+                 retention: RetentionPolicy = None,
+                 docs_root: DocumentationRoot = None):
+        """
+        ASGI middleware which records HTTP requests as examples
+
+        Examples are written in a background thread, the event loop only
+        waits for the writer when its queue is full.
+
+        :param app: ASGI application
+        :param sink: Examples destination, a ``DocumentationRoot`` is
+                     filled in memory, default: ``DirectorySink``
+        :param examples_dir: Examples directory of default sink
+        :param body_store: Store large and binary bodies in sidecar files
+        :param visible: Mark recorded examples as visible, can be overridden
+                        per request by ``restiro`` scope extension
+        :param retention: Limit recorded examples per route template
+        :param docs_root: Used to resolve route templates of requests
+        """
+        self.app = app
+        self.sink = BackgroundSink(
+            create_sink(sink, examples_dir, docs_root)
+        )
+        self.body_store = body_store
+        self.visible = visible
+        self.retention = retention
+        self.docs_root = docs_root
+        self.requests_index = count(1)
+
+    def flush(self):
+        """
+        Wait for pending examples to be written, blocks the event loop when
+        called from a coroutine
+        """
+        self.sink.flush()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_chunks = []
+        captured = {'chunks': [], 'start': perf_counter()}
+
+        async def recorder_receive():
+            message = await receive()
+            if message['type'] == 'http.request':
+                request_chunks.append(message.get('body', b''))
+            return message
+
+        async def recorder_send(message):
+            if message['type'] == 'http.response.start':
+                captured['status'] = message['status']
+                captured['headers'] = message.get('headers', ())
+
+            elif message['type'] == 'http.response.body':
+                captured['chunks'].append(message.get('body', b''))
+
+            await send(message)
+
+            if message['type'] == 'http.response.body' and \
+                    not message.get('more_body', False):
+                captured['duration'] = perf_counter() - captured['start']
+                await self.record(
+                    scope,
+                    b''.join(request_chunks),
+                    captured
+                )
+
+        await self.app(scope, recorder_receive, recorder_send)
+
+    async def record(self, scope, request_body: bytes, captured: dict):
+        loop = asyncio.get_running_loop()
+        if self.body_store is None:
+            example = self.create_example(scope, request_body, captured)
+        else:
+            # Body store writes files
+            example = await loop.run_in_executor(
+                None,
+                self.create_example, scope, request_body, captured
+            )
+
+        index = next(self.requests_index)
+        if self.retention is None or self.retention.admit(
+            (example.request.method, route_key(
+                example.request.path,
+                self.docs_root
+            )),
+            example
+        ):
+            write, try_write = self.sink.write, self.sink.try_write
+        else:
+            # Only its duration is kept, for latency
+            write, try_write = \
+                self.sink.write_dropped, self.sink.try_write_dropped
+
+        if not try_write(index, example):
+            await loop.run_in_executor(None, write, index, example)
+
+    def create_example(self, scope, request_body: bytes,
+                       captured: dict) -> ResourceExample:
+        request_body, request_body_ref = decode_body(
+            request_body,
+            self.body_store
+        )
+        headers = scope_headers(scope)
+        content_type = headers.get('Content-Type', '')
+        form_params = (
+            parse_query_string(request_body)
+            if request_body and content_type.startswith(
+                'application/x-www-form-urlencoded'
+            ) else None
+        )
+        example_request = ExampleRequest(
+            path=scope.get('root_path', '') + scope['path'],
+            method=scope['method'].lower(),
+            headers=headers,
+            body=request_body,
+            body_ref=request_body_ref,
+            query_strings=parse_query_string(
+                scope.get('query_string', b'').decode('latin-1')
+            ),
+            form_params=form_params
+        )
+
+        response_body, response_body_ref = decode_body(
+            b''.join(captured['chunks']),
+            self.body_store
+        )
+        example_response = ExampleResponse(
+            status=captured['status'],
+            reason=status_reason(captured['status']),
+            headers=scope_headers(captured),
+            body=response_body,
+            body_ref=response_body_ref
+        )
+
+        extension = scope.get('extensions', {}).get(scope_extension, {})
+        return ResourceExample(
+            request=example_request,
+            response=example_response,
+            visible=extension.get('visible', self.visible),
+            duration=captured['duration']
+        )
+
+
+class AppError(AssertionError):
+    pass
+
+
+class TestResponse:
+
+    def __init__(self, status: int, headers: list, body: bytes):
+        self.status_int = status
+        self.reason = status_reason(status)
+        self.status = ('%s %s' % (status, self.reason)).strip()
+        self.headers = CaseInsensitiveDict({
+            k.decode('latin-1'): v.decode('latin-1') for k, v in headers
+        })
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        return self.body.decode()
+
+    @property
+    def json(self):
+        return json_.loads(self.text)
+
+    def __repr__(self):
+        return '<TestResponse %s>' % self.status
+
+
+class TestClient(OptionsCaptureMixin):
+
+    def __init__(self, app, examples_dir: str = None,
+                 options_policy: str = OPTIONS_ALWAYS,
+                 docs_root: DocumentationRoot = None,
+                 sink: ExampleSink = None, retention: RetentionPolicy = None,
+                 body_store: BodyStore = None):
+        """
+        In-process client of ASGI application which records requests as
+        examples, the asynchronous counterpart of
+        :class:`restiro.middlewares.webtest.TestApp`
+
+        :param app: ASGI application
+        :param examples_dir: Examples destination directory
+        :param options_policy: When to capture ``OPTIONS`` request after
+                               each request, ``always``, ``once`` per
+                               route template or ``never``
+        :param docs_root: Used to resolve route templates of requests
+        :param sink: Examples destination, a ``DocumentationRoot`` is
+                     filled in memory, default: ``DirectorySink``
+        :param retention: Limit recorded examples per route template
+        :param body_store: Store large and binary bodies in sidecar files,
+                           otherwise binary bodies are excluded
+        """
+        self.init_options_capture(options_policy, docs_root)
+        self.recorder = RecorderMiddleware(
+            app,
+            sink=sink,
+            examples_dir=examples_dir,
+            body_store=body_store,
+            retention=retention,
+            docs_root=docs_root
+        )
+        self.doc = False
+        self.force_doc = False
+
+    def flush(self):
+        """
+        Wait for pending examples to be written
+        """
+        self.recorder.flush()
+
+    # noinspection PyMethodMayBeStatic
+    def check_status(self, response: TestResponse, status=None):
+        if status == '*':
+            return
+
+        if status is None:
+            if 200 <= response.status_int < 400:
+                return
+        elif response.status_int in (
+            status if isinstance(status, (list, tuple)) else (status,)
+        ):
+            return
+
+        raise AppError(
+            'Bad response: %s (not %s)' % (response.status, status or '2xx')
+        )
+
+    async def _call(self, method: str, path: str, query: str,
+                    headers: list, body: bytes, visible: bool):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.1'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+            'root_path': '',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'headers': headers,
+            'extensions': {scope_extension: {'visible': visible}}
+        }
+        request_messages = [
+            {'type': 'http.request', 'body': body, 'more_body': False}
+        ]
+        response = {'status': None, 'headers': [], 'chunks': []}
+
+        async def receive():
+            if request_messages:
+                return request_messages.pop()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = message.get('headers', [])
+            elif message['type'] == 'http.response.body':
+                response['chunks'].append(message.get('body', b''))
+
+        await self.recorder(scope, receive, send)
+        return TestResponse(
+            response['status'],
+            response['headers'],
+            b''.join(response['chunks'])
+        )
+
+    async def request(self, method: str, url: str, params: dict = None,
+                      headers: dict = None, body: bytes = b'', json=None,
+                      form: dict = None, status=None) -> TestResponse:
+        """
+        Send request to application and record it
+
+        :param method: HTTP method
+        :param url: Path, with or without query string
+        :param params: Query string parameters
+        :param headers: Request headers
+        :param body: Raw request body
+        :param json: JSON request body
+        :param form: URL encoded form request body
+        :param status: Expected status, a list of statuses or ``*``,
+                       default: 2xx and 3xx
+        """
+        split_url = urlsplit(url)
+        query = split_url.query
+        if params:
+            query = '&'.join(filter(None, (query, urlencode(params))))
+
+        headers = dict(headers or {})
+        if json is not None:
+            body = json_.dumps(json).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        elif form is not None:
+            body = urlencode(form).encode()
+            headers.setdefault(
+                'Content-Type',
+                'application/x-www-form-urlencoded'
+            )
+
+        if body:
+            headers.setdefault('Content-Length', str(len(body)))
+
+        path = split_url.path or '/'
+        response = await self._call(
+            method.upper(),
+            path,
+            query,
+            [
+                (k.lower().encode('latin-1'), str(v).encode('latin-1'))
+                for k, v in headers.items()
+            ],
+            body,
+            any((self.doc, self.force_doc))
+        )
+        self.doc = False
+        self.check_status(response, status)
+
+        if method.upper() != 'OPTIONS' and \
+                self.should_capture_options(path):
+            await self._call('OPTIONS', path, '', [], b'', self.force_doc)
+
+        return response
+
+    async def get(self, url: str, params: dict = None, **kwargs):
+        return await self.request('GET', url, params=params, **kwargs)
+
+    async def post(self, url: str, params: dict = None, **kwargs):
+        return await self.request('POST', url, params=params, **kwargs)
+
+    async def put(self, url: str, params: dict = None, **kwargs):
+        return await self.request('PUT', url, params=params, **kwargs)
+
+    async def patch(self, url: str, params: dict = None, **kwargs):
+        return await self.request('PATCH', url, params=params, **kwargs)
+
+    async def delete(self, url: str, params: dict = None, **kwargs):
+        return await self.request('DELETE', url, params=params, **kwargs)
+
+    async def options(self, url: str, **kwargs):
+        return await self.request('OPTIONS', url, **kwargs)
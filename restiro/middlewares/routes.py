@@ -0,0 +1,72 @@
+import re
+
+from restiro import DocumentationRoot
+
+OPTIONS_ALWAYS = 'always'
+OPTIONS_ONCE = 'once'
+OPTIONS_NEVER = 'never'
+
+options_policies = (OPTIONS_ALWAYS, OPTIONS_ONCE, OPTIONS_NEVER)
+_variable_segment = re.compile(
+    r'^(\d+|[0-9a-fA-F]{8}-?([0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12})$'
+)
+
+
+def route_key(path: str, docs_root: DocumentationRoot = None):
+    """
+    Get route template of requested path, e.g: ``/user/12`` -> ``/user/:``
+
+    Resolves against ``docs_root`` resources when available, otherwise
+    numeric and UUID path segments are treated as URL parameters.
+    """
+    if docs_root is not None:
+        resource = docs_root.find_resource(path=path, method='options')
+        if resource:
+            return resource.path
+
+    return '/'.join(
+        ':' if _variable_segment.match(part) else part
+        for part in path.rstrip('/').split('/')
+    )
+
+
+def normalize_route(route: str) -> str:
+    """
+    Drop names of URL parameters, e.g: ``/user/:user_id`` -> ``/user/:``
+    """
+    return '/'.join(
+        ':' if part.startswith(':') else part
+        for part in route.rstrip('/').split('/')
+    )
+
+
+class OptionsCaptureMixin:
+    """
+    Decide to capture ``OPTIONS`` request after each request, by
+    ``options_policy``: ``always``, ``once`` per route template or ``never``
+    """
+    options_policy = OPTIONS_ALWAYS
+    docs_root = None
+
+    def init_options_capture(self, options_policy: str,
+                             docs_root: DocumentationRoot = None):
+        if options_policy not in options_policies:
+            raise ValueError('Invalid options policy %s' % options_policy)
+
+        self.options_policy = options_policy
+        self.docs_root = docs_root
+        self.captured_options = set()
+
+    def should_capture_options(self, path: str) -> bool:
+        if self.options_policy == OPTIONS_NEVER:
+            return False
+
+        if self.options_policy == OPTIONS_ALWAYS:
+            return True
+
+        key = route_key(path, self.docs_root)
+        if key in self.captured_options:
+            return False
+
+        self.captured_options.add(key)
+        return True
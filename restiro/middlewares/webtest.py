@@ -1,84 +1,161 @@
-
-from os.path import join
-from uuid import uuid4
-from urllib.parse import parse_qs
+from time import perf_counter
 
 from webtest import TestApp as WebtestApp
 
 from restiro import (
+    DocumentationRoot,
     ResourceExample,
     ExampleRequest,
     ExampleResponse
 )
-from restiro.helpers import get_examples_dir
-
-
-def parse_query_string(qs):
-    return {k: v[0] if len(v) == 1 else v for k, v in parse_qs(
-        qs,
-        keep_blank_values=True,
-        strict_parsing=False
-    ).items()}
-
+from restiro.bodies import BodyStore
+from restiro.helpers import parse_query_string
+# Options policies and route_key are re-exported, they were defined here
+from restiro.middlewares.routes import (
+    OPTIONS_ALWAYS,
+    OPTIONS_ONCE,
+    OPTIONS_NEVER,
+    OptionsCaptureMixin,
+    route_key
+)
+from restiro.retention import RetentionPolicy
+from restiro.sinks import ExampleSink, BackgroundSink, create_sink
+from restiro.stats import recording_timer
+
+__all__ = (
+    'TestApp',
+    'OPTIONS_ALWAYS',
+    'OPTIONS_ONCE',
+    'OPTIONS_NEVER',
+    'route_key'
+)
 
-class TestApp(WebtestApp):
 
-    def __init__(self, *args, examples_dir: str=None, **kwargs):
-        self._examples_dir = examples_dir or get_examples_dir()
+class TestApp(OptionsCaptureMixin, WebtestApp):
+
+    def __init__(self, *args, examples_dir: str=None,
+                 options_policy: str=OPTIONS_ALWAYS,
+                 docs_root: DocumentationRoot=None,
+                 sink: ExampleSink=None, background: bool=False,
+                 retention: RetentionPolicy=None,
+                 body_store: BodyStore=None, **kwargs):
+        """
+        Webtest application which records requests as examples
+
+        :param examples_dir: Examples destination directory
+        :param options_policy: When to capture ``OPTIONS`` request after
+                               each request, ``always``, ``once`` per
+                               route template or ``never``
+        :param docs_root: Used to resolve route templates of requests
+        :param sink: Examples destination, a ``DocumentationRoot`` is
+                     filled in memory, default: ``DirectorySink``
+        :param background: Write examples in a background thread,
+                           call ``flush`` to wait for pending examples
+        :param retention: Limit recorded examples per route template
+        :param body_store: Store large and binary bodies in sidecar files,
+                           otherwise binary bodies are excluded
+        """
+        self.init_options_capture(options_policy, docs_root)
+        self.sink = create_sink(sink, examples_dir, docs_root)
+        if background:
+            self.sink = BackgroundSink(self.sink)
+
+        self.retention = retention
+        self.body_store = body_store
         self.doc = False
         self.force_doc = False
         self.requests_index = 0
         super().__init__(*args, **kwargs)
 
+    def flush(self):
+        """
+        Wait for pending examples to be written
+        """
+        self.sink.flush()
+
     def do_request(self, req, status=None, expect_errors=None):
         self.requests_index += 1
 
-        # Exclude binary body
-        try:
-            request_body = req.body.decode()
-        except UnicodeDecodeError:
-            request_body = None
+        with recording_timer.measure('decode'):
+            if self.body_store is not None:
+                request_body, request_body_ref = \
+                    self.body_store.store(req.body)
+            else:
+                # Exclude binary body
+                request_body_ref = None
+                try:
+                    request_body = req.body.decode()
+                except UnicodeDecodeError:
+                    request_body = None
 
         # Fill example
-        example_request = ExampleRequest(
-            path=str(req.path),
-            method=str(req.method).lower(),
-            headers=dict(req.headers),
-            body=request_body,
-            query_strings=parse_query_string(req.query_string),
-            form_params=dict(req.POST) if isinstance(req.POST, dict) else None)
-
-        response = super().do_request(
-            req=req,
-            status=status,
-            expect_errors=expect_errors)
-
-        try:
-            response_body = str(response.text)
-        except UnicodeDecodeError:
-            response_body = None
-
-        example_response = ExampleResponse(
-            status=response.status_int,
-            body=response_body,
-            headers=dict(response.headers),
-            reason=response.status[3:].strip())
-
-        example_filename = join(
-            self._examples_dir,
-            '%s-%s.json' % (self.requests_index, uuid4().hex))
-
-        ResourceExample(
-            request=example_request,
-            response=example_response,
-            visible=any((self.doc, self.force_doc))
-        ).dump(
-            example_filename
-        )
+        with recording_timer.measure('build'):
+            example_request = ExampleRequest(
+                path=str(req.path),
+                method=str(req.method).lower(),
+                headers=dict(req.headers),
+                body=request_body,
+                body_ref=request_body_ref,
+                query_strings=parse_query_string(req.query_string),
+                form_params=(
+                    dict(req.POST) if isinstance(req.POST, dict) else None
+                ))
+
+        with recording_timer.measure('application'):
+            start = perf_counter()
+            response = super().do_request(
+                req=req,
+                status=status,
+                expect_errors=expect_errors)
+            duration = perf_counter() - start
+
+        with recording_timer.measure('decode'):
+            if self.body_store is not None:
+                response_body, response_body_ref = \
+                    self.body_store.store(response.body)
+            else:
+                response_body_ref = None
+                try:
+                    response_body = str(response.text)
+                except UnicodeDecodeError:
+                    response_body = None
+
+        with recording_timer.measure('build'):
+            example_response = ExampleResponse(
+                status=response.status_int,
+                body=response_body,
+                body_ref=response_body_ref,
+                headers=dict(response.headers),
+                reason=response.status[3:].strip())
+
+            resource_example = ResourceExample(
+                request=example_request,
+                response=example_response,
+                visible=any((self.doc, self.force_doc)),
+                duration=duration
+            )
+
+        with recording_timer.measure('retention'):
+            admitted = self.retention is None or self.retention.admit(
+                (example_request.method, route_key(req.path, self.docs_root)),
+                resource_example
+            )
+
+        with recording_timer.measure('sink'):
+            if admitted:
+                self.sink.write(self.requests_index, resource_example)
+            else:
+                # Only its duration is kept, for latency
+                self.sink.write_dropped(self.requests_index, resource_example)
 
         self.doc = False
 
         if req.method != 'OPTIONS':
-            super().options(url=req.path)
+            # The OPTIONS request measures its own phases
+            with recording_timer.measure('options'):
+                capture_options = self.should_capture_options(req.path)
+
+            if capture_options:
+                super().options(url=req.path)
 
         return response
@@ -0,0 +1,246 @@
+import random
+
+from functools import lru_cache, partial
+from itertools import count
+from threading import Lock
+from time import perf_counter
+from typing import Dict
+
+from restiro import (
+    Resource,
+    Resources,
+    ResourceExample,
+    ExampleRequest,
+    ExampleResponse
+)
+from restiro.bodies import BodyStore
+from restiro.helpers import parse_query_string
+from restiro.sinks import ExampleSink, BackgroundSink, create_sink
+
+
+def environ_headers(environ) -> dict:
+    headers = {
+        k[len('HTTP_'):].replace('_', '-').title(): v
+        for k, v in environ.items()
+        if k.startswith('HTTP_')
+    }
+    for key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        if environ.get(key):
+            headers[key.replace('_', '-').title()] = environ[key]
+    return headers
+
+
+def decode_body(data: bytes, body_store: BodyStore = None):
+    if body_store is not None:
+        return body_store.store(data)
+
+    # Exclude binary body
+    try:
+        return data.decode(), None
+    except UnicodeDecodeError:
+        return None, None
+
+
+class TeeInput:
+    """
+    Wrapper of ``wsgi.input`` which keeps a copy of consumed data
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = bytearray()
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self.buffer += data
+        return data
+
+    def readline(self, *args):
+        data = self.stream.readline(*args)
+        self.buffer += data
+        return data
+
+    def readlines(self, *args):
+        lines = self.stream.readlines(*args)
+        for line in lines:
+            self.buffer += line
+        return lines
+
+    def __iter__(self):
+        for line in self.stream:
+            self.buffer += line
+            yield line
+
+
+class RecordedResponse:
+    """
+    Wrapper of application response which keeps a copy of body chunks and
+    records the example when the server closes the response
+    """
+
+    def __init__(self, app_iter, on_close):
+        self.app_iter = app_iter
+        self.on_close = on_close
+        self.chunks = []
+
+    def __iter__(self):
+        for chunk in self.app_iter:
+            self.chunks.append(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+        finally:
+            self.on_close(b''.join(self.chunks))
+
+
+class RecorderMiddleware:
+
+    def __init__(self, app, rates: Dict[str, float] = None,
+                 default_rate: float = 0.0, sink: ExampleSink = None,
+                 examples_dir: str = None, body_store: BodyStore = None,
+                 visible: bool = False):
+        """
+        WSGI middleware which records a sample of requests as examples
+
+        :param app: WSGI application
+        :param rates: Sampling rate per route, e.g:
+                      ``{'GET /user/:user_id': 0.01}``
+        :param default_rate: Sampling rate of other routes
+        :param sink: Examples destination, written in a background
+                     thread, a ``DocumentationRoot`` is filled in memory,
+                     default: ``DirectorySink``. Examples are dropped and
+                     counted by ``dropped_count`` while its queue is full
+        :param examples_dir: Examples directory of default sink
+        :param body_store: Store large and binary bodies in sidecar files
+        :param visible: Mark recorded examples as visible
+        """
+        self.app = app
+        self.dropped_count = 0
+        self._lock = Lock()
+        self.default_rate = default_rate
+        self.sink = BackgroundSink(create_sink(sink, examples_dir))
+        self.body_store = body_store
+        self.visible = visible
+        self.requests_index = count(1)
+        self.routes = Resources()
+        self.rates = {}
+        for route, rate in (rates or {}).items():
+            method, path = route.split(' ', 1)
+            resource = Resource(path=path, method=method.lower())
+            self.routes.append(resource)
+            self.rates[resource.__key__] = rate
+
+        self.route_rate = lru_cache(maxsize=4096)(self.route_rate)
+
+    def route_rate(self, method: str, path: str) -> float:
+        resource = self.routes.find(path=path, method=method)
+        if resource is None:
+            return self.default_rate
+        return self.rates.get(resource.__key__, self.default_rate)
+
+    def should_record(self, environ) -> bool:
+        rate = self.route_rate(
+            environ['REQUEST_METHOD'].lower(),
+            environ.get('PATH_INFO') or '/'
+        ) if self.rates else self.default_rate
+        return rate > 0 and random.random() < rate
+
+    def flush(self):
+        self.sink.flush()
+
+    def __call__(self, environ, start_response):
+        if not self.should_record(environ):
+            return self.app(environ, start_response)
+
+        request_input = TeeInput(environ['wsgi.input'])
+        environ['wsgi.input'] = request_input
+        captured = {'start': perf_counter()}
+
+        def recorder_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            write = start_response(status, headers, exc_info)
+
+            def recorder_write(data):
+                captured.setdefault('written', []).append(data)
+                return write(data)
+
+            return recorder_write
+
+        def record(body: bytes):
+            if 'status' not in captured:
+                return
+            captured['duration'] = perf_counter() - captured['start']
+            body = b''.join(captured.get('written', ())) + body
+            self.record(dict(environ), request_input.buffer, captured, body)
+
+        return RecordedResponse(
+            self.app(environ, recorder_start_response),
+            on_close=record
+        )
+
+    def record(self, environ, request_body: bytes, captured: dict,
+               response_body: bytes):
+        # Never block the request thread, while the queue is full. The
+        # example is built by the writer thread, with its decoded bodies.
+        if not self.sink.try_write(
+            next(self.requests_index),
+            partial(
+                self.create_example,
+                environ,
+                request_body,
+                captured,
+                response_body
+            )
+        ):
+            with self._lock:
+                self.dropped_count += 1
+
+    def create_example(self, environ, request_body: bytes, captured: dict,
+                       response_body: bytes) -> ResourceExample:
+        request_body, request_body_ref = decode_body(
+            bytes(request_body),
+            self.body_store
+        )
+        headers = environ_headers(environ)
+        content_type = environ.get('CONTENT_TYPE', '')
+        form_params = (
+            parse_query_string(request_body)
+            if request_body and content_type.startswith(
+                'application/x-www-form-urlencoded'
+            ) else None
+        )
+        example_request = ExampleRequest(
+            path=environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', ''),
+            method=environ['REQUEST_METHOD'].lower(),
+            headers=headers,
+            body=request_body,
+            body_ref=request_body_ref,
+            query_strings=parse_query_string(
+                environ.get('QUERY_STRING', '')
+            ),
+            form_params=form_params
+        )
+
+        response_body, response_body_ref = decode_body(
+            response_body,
+            self.body_store
+        )
+        status = captured['status']
+        example_response = ExampleResponse(
+            status=int(status[:3]),
+            reason=status[3:].strip(),
+            headers=dict(captured['headers']),
+            body=response_body,
+            body_ref=response_body_ref
+        )
+
+        return ResourceExample(
+            request=example_request,
+            response=example_response,
+            visible=self.visible,
+            duration=captured['duration']
+        )
@@ -0,0 +1,197 @@
+import asyncio
+import os
+
+from time import perf_counter
+
+from restiro.faults import FaultProfiles, Injection
+from restiro.metrics import Metrics, content_type as metrics_content_type
+from restiro.mock_server import MockServer, Match, load_docs_root, \
+    parse_query, metrics_path
+from restiro.retention import RetentionPolicy
+from restiro.wsgi_server import DropConnection
+
+#: Headers which WSGI servers do not pass as ``HTTP_*``
+_content_headers = (b'content-type', b'content-length')
+
+
+async def read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            break
+    return bytes(body)
+
+
+class ASGIMockServer(MockServer):
+    """
+    ASGI variant of :class:`restiro.mock_server.MockServer`, with the same
+    routing and matching, response bodies are streamed
+    """
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] != 'http':
+            return
+
+        if self.metrics is not None and scope['path'] == metrics_path:
+            await read_body(receive)
+            body = self.metrics.render().encode()
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', metrics_content_type.encode()),
+                    (b'content-length', str(len(body)).encode())
+                ]
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        started_at = perf_counter()
+        body = await read_body(receive)
+        headers = {}
+        content_length = None
+        for name, value in scope.get('headers', ()):
+            if name.lower() == b'content-length':
+                content_length = value
+            if name.lower() in _content_headers:
+                continue
+            headers[name.decode('latin-1').upper()] = value.decode('latin-1')
+
+        method = scope['method'].lower()
+        # Conditional headers are not criteria of matching
+        if_none_match = headers.pop('IF-NONE-MATCH', None)
+        match = self.lookup(
+            method=method,
+            path=scope['path'],
+            query=parse_query(
+                scope.get('query_string', b'').decode('latin-1')
+            ),
+            headers=headers,
+            body=body if body or content_length is not None else None
+        )
+        matched_at = perf_counter()
+        try:
+            await self.respond_asgi(match, method, if_none_match, send)
+        finally:
+            if self.metrics is not None:
+                self.record(match, started_at, matched_at)
+
+    async def respond_asgi(self, match: Match, method: str,
+                           if_none_match: str, send):
+        if not match.found:
+            await self.send_empty(send, 404)
+            return
+
+        response = match.response
+        injection = self.inject(match)
+        if injection is not None:
+            if injection.delay:
+                await asyncio.sleep(injection.delay)
+
+            if injection.drop:
+                # The bundled server closes the connection without response,
+                # other servers respond by 500
+                raise DropConnection()
+
+            if injection.status:
+                await self.send_empty(send, injection.status)
+                return
+
+        if response.is_not_modified(method, if_none_match):
+            await send({
+                'type': 'http.response.start',
+                'status': 304,
+                'headers': response.raw_not_modified_headers
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response.raw_headers
+        })
+        if response.body_ref is None and not (
+            injection is not None and injection.bandwidth
+        ):
+            await send({'type': 'http.response.body', 'body': response.body})
+            return
+
+        chunks = (injection or Injection()).throttle(response.iter_body())
+        for chunk, delay in chunks:
+            await send({
+                'type': 'http.response.body',
+                'body': bytes(chunk),
+                'more_body': True
+            })
+            if delay:
+                await asyncio.sleep(delay)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def send_empty(send, status: int):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-length', b'0')]
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def create_app(root_file: str = None, max_examples: int = None,
+               store: str = None, profiles: str = None,
+               metrics_dir: str = None) -> ASGIMockServer:
+    """
+    Create ASGI mock server, arguments default to ``RESTIRO_MOCK_ROOT``,
+    ``RESTIRO_MOCK_MAX_EXAMPLES``, ``RESTIRO_MOCK_STORE``,
+    ``RESTIRO_MOCK_PROFILES`` and ``RESTIRO_MOCK_METRICS_DIR`` environment
+    variables, e.g: ``uvicorn --factory restiro.mock_asgi:create_app``.
+
+    Metrics are enabled by ``RESTIRO_MOCK_METRICS=1``, or a metrics
+    directory which is shared by worker processes.
+    """
+    root_file = root_file or os.environ.get(
+        'RESTIRO_MOCK_ROOT',
+        './index.json'
+    )
+    max_examples = max_examples or int(
+        os.environ.get('RESTIRO_MOCK_MAX_EXAMPLES') or 0
+    )
+    store = store or os.environ.get('RESTIRO_MOCK_STORE')
+    profiles = profiles or os.environ.get('RESTIRO_MOCK_PROFILES')
+    metrics_dir = metrics_dir or os.environ.get('RESTIRO_MOCK_METRICS_DIR')
+    metrics = None
+    if metrics_dir or os.environ.get('RESTIRO_MOCK_METRICS'):
+        metrics = Metrics(directory=metrics_dir)
+
+    if store:
+        from restiro.sqlite_store import SQLiteStore
+        store = SQLiteStore(store)
+
+    return ASGIMockServer(
+        load_docs_root(
+            root_file,
+            retention=RetentionPolicy(max_examples) if max_examples else None,
+            store=store or None
+        ),
+        profiles=FaultProfiles.load(profiles) if profiles else None,
+        metrics=metrics
+    )
@@ -0,0 +1,106 @@
+"""
+    Hot reload of mock server, by watching its index file or on request,
+    e.g: ``SIGHUP``
+"""
+import os
+
+from threading import Event, Thread
+from typing import Callable, Union
+
+from restiro import DocumentationRoot
+from restiro.mock_server import MockServer
+
+
+def file_signature(filename: str) -> Union[tuple, None]:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class Reloader:
+
+    def __init__(self, server: MockServer,
+                 load: Callable[[], DocumentationRoot],
+                 filename: str = None, interval: float = 1.0,
+                 on_reload: Callable[[], None] = None):
+        """
+        Reload documentation root of mock server in a background thread.
+        The new one is loaded and indexed before swapping, and a failed
+        load keeps serving the previous one.
+
+        :param server: Mock server
+        :param load: Loads the documentation root, e.g: a partial of
+                     :func:`restiro.mock_server.load_docs_root`
+        :param filename: File to watch, e.g: ``index.json``
+        :param interval: Seconds between checking the file
+        :param on_reload: Called after swapping
+        """
+        self.server = server
+        self.load = load
+        self.filename = filename
+        self.interval = interval
+        self.on_reload = on_reload
+        self.signature = file_signature(filename) if filename else None
+        self.reloads = 0
+        self._requested = Event()
+        self._stopped = Event()
+        self._thread = None
+
+    def request_reload(self, *args):
+        """
+        Ask for a reload, safe to be used as a signal handler
+        """
+        self._requested.set()
+
+    def file_changed(self) -> bool:
+        if self.filename is None:
+            return False
+
+        signature = file_signature(self.filename)
+        if signature is None or signature == self.signature:
+            return False
+
+        # A broken file is retried after its next change only
+        self.signature = signature
+        return True
+
+    def reload(self) -> bool:
+        try:
+            docs_root = self.load()
+        except Exception as ex:
+            print('Reloading mock server failed: %r' % ex)
+            return False
+
+        self.server.load(docs_root)
+        print('Mock server is reloaded.')
+        if self.on_reload is not None:
+            self.on_reload()
+        self.reloads += 1
+        return True
+
+    def run(self):
+        while not self._stopped.is_set():
+            requested = self._requested.wait(self.interval)
+            if requested:
+                self._requested.clear()
+            if self._stopped.is_set():
+                break
+
+            if self.file_changed() or requested:
+                self.reload()
+
+    def start(self):
+        self._thread = Thread(
+            target=self.run,
+            name='restiro-reloader',
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._requested.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,8 +1,53 @@
-from typing import Union
+import json
+import time
+
+from hashlib import sha256
+from http import HTTPStatus
+from os.path import dirname, realpath
+from time import perf_counter
+from typing import Union, List, Hashable, Tuple
 
 from urllib.parse import parse_qs
 
-from restiro import DocumentationRoot, ExampleRequest, ResourceExample
+from restiro import DocumentationRoot, ExampleRequest, ExampleResponse, \
+    ResourceExample
+from restiro.bodies import get_bodies_dir
+from restiro.compression import open_file
+from restiro.faults import FaultProfiles, Injection
+from restiro.metrics import Metrics, content_type as metrics_content_type
+from restiro.wsgi_server import DropConnection
+
+
+def load_docs_root(root_file: str, retention=None,
+                   store=None) -> DocumentationRoot:
+    """
+    Load documentation root of mock server from ``index.json`` or
+    ``index.mock.json``, compressed or not
+
+    :param root_file: Index file
+    :param retention: :class:`restiro.retention.RetentionPolicy`
+    :param store: :class:`restiro.sqlite_store.SQLiteStore` to serve its
+                  examples too
+    """
+    with open_file(root_file) as f:
+        docs_root = DocumentationRoot.create_from_dict(json.load(f))
+
+    docs_root.bind_bodies(get_bodies_dir(dirname(realpath(root_file))))
+    if store is not None:
+        docs_root.load_resource_examples(store=store)
+
+    if retention is not None:
+        docs_root.apply_retention(retention)
+
+    return docs_root
+
+
+def parse_query(query_string: str) -> dict:
+    return {k: v[0] if len(v) == 1 else v for k, v in parse_qs(
+        query_string,
+        keep_blank_values=True,
+        strict_parsing=False
+    ).items()}
 
 
 class Request:
@@ -27,11 +72,7 @@ class Request:
     def query(self):
         """Request query string
         """
-        return {k: v[0] if len(v) == 1 else v for k, v in parse_qs(
-            self.environ['QUERY_STRING'],
-            keep_blank_values=True,
-            strict_parsing=False
-        ).items()}
+        return parse_query(self.environ['QUERY_STRING'])
 
     @property
     def request_content_length(self) -> Union[int, None]:
@@ -65,81 +106,563 @@ class Request:
         ))
 
 
-class MockServer:
+_unset = object()
+
+
+def freeze(value) -> Hashable:
+    """
+    Hashable equivalent of value, equal values have equal results
+    """
+    if isinstance(value, dict):
+        return frozenset((k, freeze(v)) for k, v in value.items())
+
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+
+    return value
+
+
+def request_fingerprint(request: ExampleRequest,
+                        body=_unset) -> Hashable:
+    """
+    Normalized fingerprint of path, method, query, form, parsed body and
+    headers of request
+
+    :param body: Parsed body, if it's already parsed
+    """
+    if body is _unset:
+        body = request.formatted_body
+
+    return (
+        request.path,
+        request.method,
+        freeze(request.query_strings),
+        freeze(request.form_params),
+        freeze(body),
+        freeze(request.headers)
+    )
+
+
+#: Recorded headers which are replaced by the ones of encoded response
+_framing_headers = frozenset((
+    'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+    'etag'
+))
+
+#: Headers of ``304 Not Modified``, besides ``ETag``
+_not_modified_headers = frozenset((
+    'cache-control', 'content-location', 'date', 'expires', 'vary'
+))
+
+
+def status_reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ''
+
+
+def parse_etags(value: str) -> frozenset:
+    """
+    Entity tags of ``If-None-Match``, weak ones as strong for weak
+    comparison
+    """
+    return frozenset(
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in (t.strip() for t in value.split(','))
+        if tag
+    )
+
+
+class EncodedResponse:
+
+    def __init__(self, response: ExampleResponse):
+        """
+        Status line, headers and body of an example response, encoded once
+        at load time, with ``Content-Length`` and a strong ``ETag`` of the
+        body. Large bodies (sidecar references) are streamed.
+
+        :param response: Example response
+        """
+        self.status_code = response.status
+        self.status = '%s %s' % (
+            response.status,
+            response.reason or status_reason(response.status)
+        )
+        self.body_ref = response.body_ref
+        if self.body_ref is not None:
+            self.body = None
+            self.content_length = self.body_ref.size
+            digest = self.body_ref.digest
+        else:
+            self.body = (response.body or '').encode()
+            self.content_length = len(self.body)
+            digest = sha256(self.body).hexdigest()
+        self.etag = '"%s"' % digest[:32]
+
+        headers = [
+            (k, str(v)) for k, v in response.headers.items()
+            if k.lower() not in _framing_headers
+        ]
+        if self.has_body:
+            headers.append(('Content-Length', str(self.content_length)))
+        headers.append(('ETag', self.etag))
+        self.headers = headers
+        self.not_modified_headers = [
+            (k, v) for k, v in headers
+            if k.lower() in _not_modified_headers or k == 'ETag'
+        ]
+        self.raw_headers = self.encode_headers(self.headers)
+        self.raw_not_modified_headers = self.encode_headers(
+            self.not_modified_headers
+        )
+
+    @property
+    def has_body(self) -> bool:
+        return not (
+            100 <= self.status_code < 200 or
+            self.status_code in (204, 304)
+        )
+
+    @staticmethod
+    def encode_headers(headers) -> List[Tuple[bytes, bytes]]:
+        return [
+            (k.lower().encode('latin-1'), v.encode('latin-1'))
+            for k, v in headers
+        ]
+
+    def is_not_modified(self, method: str, if_none_match: str) -> bool:
+        """
+        Whether ``If-None-Match`` of a ``GET`` or ``HEAD`` request matches
+        """
+        if not if_none_match or method not in ('get', 'head'):
+            return False
+
+        if if_none_match.strip() == '*':
+            return True
+
+        return self.etag in parse_etags(if_none_match)
+
+    def iter_body(self):
+        if self.body_ref is not None:
+            yield from self.body_ref.iter_chunks()
+        elif self.body:
+            yield self.body
+
+
+_score_bits = 3
+_malformed = object()
+
+
+class ResourceIndex:
+
+    def __init__(self, examples: List[ResourceExample], route: str = None):
+        """
+        Index of examples of a resource, built once at load time.
+
+        Exact matches are found by fingerprint, otherwise each criterion
+        of scoring has an inverted index which maps a value to the bitset
+        of examples having it, then scores of all examples are counted by
+        bitwise additions.
+
+        :param examples: Examples of resource
+        :param route: Route of resource, e.g: ``GET /user/:user_id``
+        """
+        self.examples = examples
+        self.route = route
+        self.exact = {}
+        self.routes = {}
+        self.query_keys = {}
+        self.queries = {}
+        self.form_keys = {}
+        self.forms = {}
+        self.body_keys = {}
+        self.bodies = {}
+        self.headers = {}
+        for position, example in enumerate(examples):
+            self.add(position, example.request)
+        self.responses = [
+            EncodedResponse(example.response) for example in examples
+        ]
+
+    @staticmethod
+    def _post(postings: dict, key: Hashable, bit: int):
+        postings[key] = postings.get(key, 0) | bit
+
+    def add(self, position: int, request: ExampleRequest):
+        bit = 1 << position
+        try:
+            body = request.formatted_body
+        except (TypeError, ValueError):
+            body = _malformed
+
+        if body is not _malformed:
+            # The last one wins ties of scoring
+            self.exact[request_fingerprint(request, body)] = position
+
+        self._post(self.routes, (request.path, request.method), bit)
+        self._post(self.query_keys, frozenset(request.query_strings), bit)
+        self._post(self.queries, freeze(request.query_strings), bit)
+        if request.form_params:
+            self._post(self.form_keys, frozenset(request.form_params), bit)
+        self._post(self.forms, freeze(request.form_params), bit)
+        if hasattr(body, 'keys'):
+            self._post(self.body_keys, frozenset(body.keys()), bit)
+        if body is not _malformed:
+            self._post(self.bodies, freeze(body), bit)
+        self._post(self.headers, freeze(request.headers), bit)
+
+    def find(self, request: ExampleRequest) -> Union[None, ResourceExample]:
+        """
+        Exact match from index, otherwise the best scored example
+        """
+        position = self.locate(request)
+        return None if position is None else self.examples[position]
+
+    def locate(self, request: ExampleRequest) -> Union[None, int]:
+        """
+        Position of :meth:`find` result
+        """
+        return self.lookup(request)[0]
+
+    def lookup(self, request: ExampleRequest) -> Tuple[Union[None, int],
+                                                       bool]:
+        """
+        Position of :meth:`find` result, and whether it's an exact match
+        """
+        body = request.formatted_body
+        position = self.exact.get(request_fingerprint(request, body))
+        if position is not None:
+            return position, True
+        return self.score_position(request, body), False
+
+    def score(self, request: ExampleRequest,
+              body=_unset) -> Union[None, ResourceExample]:
+        """
+        Best scored example of the same path and method, scored by count of
+        matched criteria: query keys, query, form keys, form, body keys,
+        body and headers. Ties go to the last example.
+        """
+        position = self.score_position(request, body)
+        return None if position is None else self.examples[position]
+
+    def score_position(self, request: ExampleRequest,
+                       body=_unset) -> Union[None, int]:
+        candidates = self.routes.get((request.path, request.method), 0)
+        if not candidates:
+            return
+
+        if body is _unset:
+            body = request.formatted_body
+        form_params = request.form_params
+        matches = (
+            self.query_keys.get(frozenset(request.query_strings), 0),
+            self.queries.get(freeze(request.query_strings), 0),
+            self.form_keys.get(frozenset(form_params), 0)
+            if form_params else 0,
+            self.forms.get(freeze(form_params), 0),
+            self.body_keys.get(frozenset(body.keys()), 0)
+            if hasattr(body, 'keys') else 0,
+            self.bodies.get(freeze(body), 0),
+            self.headers.get(freeze(request.headers), 0),
+        )
+
+        # Bit-sliced counters, planes[i] is the i-th bit of scores
+        planes = [0] * _score_bits
+        for carry in matches:
+            carry &= candidates
+            for i in range(_score_bits):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+
+        best = candidates
+        for plane in reversed(planes):
+            narrowed = best & plane
+            if narrowed:
+                best = narrowed
+
+        return best.bit_length() - 1
+
+
+class Match:
+
+    def __init__(self, route: str = None, index: ResourceIndex = None,
+                 position: int = None, exact: bool = False):
+        """
+        Result of finding the example of a request
+
+        :param route: Route of requested resource, if any
+        :param index: Index of resource
+        :param position: Position of example in index, ``None`` on miss
+        :param exact: Found by fingerprint, not by scoring
+        """
+        self.route = route
+        self.index = index
+        self.position = position
+        self.exact = exact
+
+    @property
+    def found(self) -> bool:
+        return self.position is not None
+
+    @property
+    def example(self) -> ResourceExample:
+        return self.index.examples[self.position]
+
+    @property
+    def response(self) -> EncodedResponse:
+        return self.index.responses[self.position]
+
+
+class MockSnapshot:
 
     def __init__(self, docs_root: DocumentationRoot):
+        """
+        Documentation root of mock server with indexes of its resources.
+        A request is served by one snapshot from start to end, so reloading
+        swaps the whole snapshot.
+
+        :param docs_root: Documentation root
+        """
         self.docs_root = docs_root
+        self.indexes = {
+            key: self.create_index(resource)
+            for key, resource in docs_root.resources.items()
+            if resource.examples
+        }
+
+    @staticmethod
+    def get_route(resource) -> str:
+        return '%s %s' % (resource.method.upper(), resource.path)
+
+    def create_index(self, resource) -> ResourceIndex:
+        return ResourceIndex(
+            resource.examples,
+            route=self.get_route(resource)
+        )
+
+    def get_index(self, resource) -> ResourceIndex:
+        index = self.indexes.get(resource.__key__)
+        if index is None or index.examples is not resource.examples:
+            index = self.indexes[resource.__key__] = self.create_index(
+                resource
+            )
+        return index
+
+
+#: Reserved path of metrics endpoint
+metrics_path = '/__restiro/metrics'
+
+#: Route label of requests without any resource
+unmatched_route = 'unmatched'
+
+
+class MockServer:
+
+    def __init__(self, docs_root: DocumentationRoot,
+                 profiles: FaultProfiles = None, metrics: Metrics = None):
+        """
+        :param docs_root: Documentation root
+        :param profiles: Latency and fault injection profiles, injected
+                         delays are blocking, so serve it by a threaded
+                         server
+        :param metrics: Metrics, served on ``/__restiro/metrics``
+        """
+        self.snapshot = MockSnapshot(docs_root)
+        self.profiles = profiles
+        self.metrics = metrics
+
+    @property
+    def docs_root(self) -> DocumentationRoot:
+        return self.snapshot.docs_root
+
+    @property
+    def indexes(self) -> dict:
+        return self.snapshot.indexes
+
+    def build_indexes(self):
+        """
+        Index examples of resources, call it after changing examples
+        """
+        self.load(self.docs_root)
+
+    def load(self, docs_root: DocumentationRoot):
+        """
+        Serve another documentation root, it's indexed before swapping and
+        in-flight requests are finished by the previous one
+        """
+        self.snapshot = MockSnapshot(docs_root)
 
     def find_example(self, environ) -> Union[None, ResourceExample]:
         request = Request(environ)
-
-        resource = self.docs_root.resources.find(
+        return self.match(
             method=request.method,
+            path=request.path,
+            query=request.query,
+            headers=request.headers,
+            body=lambda: request.body
+        )
+
+    def lookup(self, method: str, path: str, query: dict, headers: dict,
+               body) -> Match:
+        """
+        Find the example of request, shared by WSGI and ASGI servers
+
+        :param method: Requested method, lower case
+        :param path: Requested path
+        :param query: Parsed query string
+        :param headers: Request headers, except ``Content-Type`` and
+                        ``Content-Length``
+        :param body: Request body, or a callable which reads it
+        """
+        snapshot = self.snapshot
+        docs_root = snapshot.docs_root
+        resource = docs_root.resources.find(
+            method=method,
             path=(
-                request.path[len(self.docs_root.base_uri.path):]
-                if self.docs_root.base_uri else
-                request.path
+                path[len(docs_root.base_uri.path):]
+                if docs_root.base_uri else
+                path
             )
         )
 
-        if not resource or not resource.examples:
-            return
+        if not resource:
+            return Match()
+
+        if not resource.examples:
+            return Match(route=snapshot.get_route(resource))
 
-        path = request.path
         if path.endswith('/'):
             path = path[:-1]
 
         example_request = ExampleRequest(
-            method=request.method,
+            method=method,
             path=path,
-            query_strings=request.query,
-            headers=request.headers,
-            body=request.body
+            query_strings=query,
+            headers=headers,
+            body=body() if callable(body) else body
         )
-        scores = []
-        for example in resource.examples:
-            r = example.request
-            if not all((
-                r.path == example_request.path,
-                r.method == example_request.method
-            )):
-                continue
-
-            expressions = (
-                r.query_strings.keys() == example_request.query_strings.keys(),
-                r.query_strings == example_request.query_strings,
-                (
-                    (r.form_params and example_request.form_params) and
-                    r.form_params.keys() == example_request.form_params.keys()
-                ),
-                r.form_params == example_request.form_params,
-                (
-                    (
-                        hasattr(r.formatted_body, 'keys') and
-                        hasattr(example_request.formatted_body, 'keys')
-                    ) and
-                    r.formatted_body.keys() ==
-                    example_request.formatted_body.keys()
-                ),
-                r.formatted_body == example_request.formatted_body,
-                r.headers == example_request.headers,
-            )
-            valid_expr = list(filter(lambda x: x is True, expressions))
-            scores.append((len(valid_expr), example))
+        index = snapshot.get_index(resource)
+        position, exact = index.lookup(example_request)
+        return Match(index.route, index, position, exact)
 
-        sorted_examples = list(reversed(sorted(scores, key=lambda x: x[0])))
-        return sorted_examples[0][1]
+    def locate(self, method: str, path: str, query: dict, headers: dict,
+               body) -> Union[None, Tuple[ResourceIndex, int]]:
+        """
+        Index of resource and position of example in it, see
+        :meth:`lookup`
+        """
+        match = self.lookup(method, path, query, headers, body)
+        return (match.index, match.position) if match.found else None
+
+    def match(self, method: str, path: str, query: dict, headers: dict,
+              body) -> Union[None, ResourceExample]:
+        """
+        Find the example of request, see :meth:`lookup`
+        """
+        match = self.lookup(method, path, query, headers, body)
+        return match.example if match.found else None
+
+    def inject(self, match: Match) -> Union[Injection, None]:
+        if self.profiles is None:
+            return None
+        return self.profiles.inject(match.route, match.example)
+
+    def record(self, match: Match, started_at: float, matched_at: float):
+        """
+        Record metrics of a request, times are of ``perf_counter``
+        """
+        metrics = self.metrics
+        labels = (('route', match.route or unmatched_route),)
+        if match.found:
+            metrics.inc('restiro_mock_hits_total', labels + (
+                ('match', 'exact' if match.exact else 'fuzzy'),
+            ))
+        else:
+            metrics.inc('restiro_mock_misses_total', labels)
+        metrics.observe(
+            'restiro_mock_match_seconds',
+            labels,
+            matched_at - started_at
+        )
+        metrics.observe(
+            'restiro_mock_request_seconds',
+            labels,
+            perf_counter() - started_at
+        )
+
+    @staticmethod
+    def throttle(injection: Injection, chunks):
+        for data, delay in injection.throttle(chunks):
+            yield data
+            time.sleep(delay)
 
     def __call__(self, environ, start_response):
-        example = self.find_example(environ)
+        if self.metrics is not None and \
+                environ['PATH_INFO'] == metrics_path:
+            body = self.metrics.render().encode()
+            start_response('200 OK', [
+                ('Content-Type', metrics_content_type),
+                ('Content-Length', str(len(body)))
+            ])
+            return [body]
 
-        if not example:
-            start_response('404 Example Not Found', [])
-            yield b''
-            return
+        started_at = perf_counter()
+        request = Request(environ)
+        method = request.method
+        headers = request.headers
+        # Conditional headers are not criteria of matching
+        if_none_match = headers.pop('IF-NONE-MATCH', None)
+        match = self.lookup(
+            method=method,
+            path=request.path,
+            query=request.query,
+            headers=headers,
+            body=lambda: request.body
+        )
+        matched_at = perf_counter()
+        try:
+            return self.respond(
+                match,
+                method,
+                if_none_match,
+                start_response
+            )
+        finally:
+            if self.metrics is not None:
+                self.record(match, started_at, matched_at)
+
+    def respond(self, match: Match, method: str, if_none_match: str,
+                start_response):
+        if not match.found:
+            start_response('404 Example Not Found', [('Content-Length', '0')])
+            return [b'']
+
+        response = match.response
+        injection = self.inject(match)
+        if injection is not None:
+            if injection.delay:
+                time.sleep(injection.delay)
+
+            if injection.drop:
+                raise DropConnection()
+
+            if injection.status:
+                start_response(
+                    '%s %s' % (
+                        injection.status,
+                        status_reason(injection.status)
+                    ),
+                    [('Content-Length', '0')]
+                )
+                return [b'']
+
+        if response.is_not_modified(method, if_none_match):
+            start_response('304 Not Modified', response.not_modified_headers)
+            return [b'']
 
-        response = example.response
-        status = "%s %s" % (response.status, response.reason)
-        headers = list(response.headers.items())
-        start_response(status, headers)
-        yield response.body.encode()
+        start_response(response.status, response.headers)
+        body = [response.body] if response.body_ref is None else \
+            response.iter_body()
+        if injection is not None and injection.bandwidth:
+            return self.throttle(injection, body)
+        return body
@@ -13,4 +13,4 @@ from .example import (
 )
 from .resource import Resource, Resources
 from .document import Document
-from .root import DocumentationRoot
+from .root import DocumentationRoot, ResourceResolver
@@ -1,7 +1,11 @@
 import json
 
 from typing import Union
+from hashlib import sha1
+from os.path import dirname
 
+from restiro.bodies import BodyRef, get_bodies_dir
+from restiro.compression import open_file
 from restiro.helpers import CaseInsensitiveDict
 
 
@@ -33,7 +37,7 @@ class BodyFormatYaml(BodyFormat):
 class ExampleRequest:
     def __init__(self, path: str, method: str, headers: dict = None,
                  query_strings: dict = None, form_params: dict = None,
-                 body: str = None):
+                 body: str = None, body_ref: BodyRef = None):
         self.path = path
         self.method = method
         self.headers = dict(map(
@@ -43,6 +47,7 @@ class ExampleRequest:
         self.query_strings = query_strings or {}
         self.form_params = form_params
         self.body = body
+        self.body_ref = body_ref
 
     @property
     def body_format(self) -> Union[BodyFormat, None]:
@@ -55,11 +60,18 @@ class ExampleRequest:
         }.get(content_type_raw.split(';', 1)[0], None) \
             if content_type_raw else None
 
+    @property
+    def full_body(self):
+        """ Body, read from sidecar file if body is stored there """
+        if self.body_ref is None:
+            return self.body
+        return self.body_ref.read().decode()
+
     @property
     def formatted_body(self):
         # TODO Other formats not supported at yet
         if self.body_format == BodyFormatJson:
-            return json.loads(self.body)
+            return json.loads(self.full_body)
 
     def __repr__(self):
         sections = [
@@ -81,7 +93,8 @@ class ExampleRequest:
             'query_strings': self.query_strings if self.query_strings else None,
             'form_params': self.form_params if self.form_params else None,
             'body_format': self.body_format.name if self.body_format else None,
-            'body': self.body
+            'body': self.body,
+            'body_ref': self.body_ref.to_dict() if self.body_ref else None
         }
 
     @classmethod
@@ -92,13 +105,18 @@ class ExampleRequest:
             headers=data['headers'],
             query_strings=data['query_strings'],
             form_params=data['form_params'],
-            body=data['body']
+            body=data['body'],
+            body_ref=(
+                BodyRef.create_from_dict(data['body_ref'])
+                if data.get('body_ref') else None
+            )
         )
 
 
 class ExampleResponse:
 
-    def __init__(self, status: int, headers: dict, body: str, reason: str = None):
+    def __init__(self, status: int, headers: dict, body: str,
+                 reason: str = None, body_ref: BodyRef = None):
         self.status = status
         self.headers = dict(map(
             lambda x: (x[0].lower(), x[1]),
@@ -106,6 +124,7 @@ class ExampleResponse:
         ))
         self.body = body
         self.reason = reason
+        self.body_ref = body_ref
 
     @property
     def body_format(self) -> Union[BodyFormat, None]:
@@ -128,7 +147,8 @@ class ExampleResponse:
             'reason': self.reason,
             'headers': self.headers,
             'body_format': self.body_format.name if self.body_format else None,
-            'body': self.body
+            'body': self.body,
+            'body_ref': self.body_ref.to_dict() if self.body_ref else None
         }
 
     def repr_headers(self):
@@ -146,37 +166,81 @@ class ExampleResponse:
             status=data['status'],
             headers=data['headers'],
             body=data['body'],
-            reason=data['reason']
+            reason=data['reason'],
+            body_ref=(
+                BodyRef.create_from_dict(data['body_ref'])
+                if data.get('body_ref') else None
+            )
         )
 
 
+def content_hash(data: dict) -> str:
+    """
+    Hash of exported example, regardless of its visibility
+    """
+    return sha1(json.dumps(
+        [data['request'], data['response']],
+        sort_keys=True
+    ).encode()).hexdigest()
+
+
 class ResourceExample:
     def __init__(self, request: ExampleRequest, response: ExampleResponse,
-                 visible: bool = False):
+                 visible: bool = False, duration: float = None):
+        """
+        Recorded request and response
+
+        :param request: Example request
+        :param response: Example response
+        :param visible: Show the example in documentation
+        :param duration: Duration of handling the request by application,
+                         in seconds
+        """
         self.request = request
         self.response = response
         self.visible = visible
+        self.duration = duration
 
     def to_dict(self):
         return {
             'request': self.request.to_dict(),
             'response': self.response.to_dict(),
-            'visible': self.visible
+            'visible': self.visible,
+            'duration': self.duration
         }
 
-    def dump(self, filename):
-        with open(filename, 'w') as f:
+    @property
+    def content_hash(self) -> str:
+        return content_hash(self.to_dict())
+
+    @property
+    def body_refs(self):
+        """ Sidecar references of request and response bodies """
+        return [
+            ref for ref in (self.request.body_ref, self.response.body_ref)
+            if ref is not None
+        ]
+
+    def bind_bodies(self, directory: str):
+        for ref in self.body_refs:
+            ref.directory = directory
+
+    def dump(self, filename, compression: str = None):
+        with open_file(filename, 'w', compression) as f:
             json.dump(self.to_dict(), f)
 
     @classmethod
     def load(cls, filename) -> 'ResourceExample':
-        with open(filename, 'r') as f:
-            return cls.create_from_dict(json.load(f))
+        with open_file(filename, 'r') as f:
+            example = cls.create_from_dict(json.load(f))
+        example.bind_bodies(get_bodies_dir(dirname(filename)))
+        return example
 
     @classmethod
     def create_from_dict(cls, data: dict) -> 'ResourceExample':
         return cls(
             request=ExampleRequest.create_from_dict(data['request']),
             response=ExampleResponse.create_from_dict(data['response']),
-            visible=data['visible']
+            visible=data['visible'],
+            duration=data.get('duration')
         )
@@ -2,6 +2,8 @@ from typing import List, Union, Tuple
 
 from hashlib import md5
 
+from restiro.latency import latency_summary, dropped_durations
+
 from .parameters import URLParam, FormParam, HeaderParam, QueryParam, Param
 from .example import ResourceExample
 from .translation_mixin import TranslationMixin
@@ -51,6 +53,8 @@ class Resource(TranslationMixin):
         self.security = security
         self.header_params = []
         self.examples = examples if examples else []
+        # Durations of examples which are not retained, for latency
+        self.dropped_durations = []
 
         if params:
             self.set_params(*params)
@@ -105,6 +109,8 @@ class Resource(TranslationMixin):
             'query_params': [param.to_dict() for param in self.query_params],
             'form_params': [param.to_dict() for param in self.form_params],
             'examples': [example.to_dict() for example in self.examples],
+            'dropped_durations': self.dropped_durations,
+            'latency': self.latency,
             'id': self.__id__
         }
 
@@ -134,7 +140,7 @@ class Resource(TranslationMixin):
             ResourceExample.create_from_dict(o) for o in data['examples']
         ]
 
-        return cls(
+        resource = cls(
             path=data['path'],
             method=data['method'],
             tags=data['tags'],
@@ -144,11 +150,45 @@ class Resource(TranslationMixin):
             examples=examples,
             params=params
         )
+        resource.dropped_durations = list(data.get('dropped_durations', ()))
+        return resource
+
+    @property
+    def latency(self):
+        """
+        Percentiles of handling durations of examples, in milliseconds,
+        including examples which are dropped by retention
+        """
+        return latency_summary(self.dropped_durations + [
+            example.duration for example in self.examples
+            if example.duration is not None
+        ])
+
+    def apply_retention(self, retention):
+        """
+        Drop examples which are not retained by policy, keeping their
+        durations
+
+        :param retention: :class:`restiro.retention.RetentionPolicy`
+        """
+        retained = retention.select(self.examples)
+        self.dropped_durations.extend(
+            dropped_durations(self.examples, retained)
+        )
+        self.examples = retained
 
     @property
     def summary_text(self):
+        return self.get_summary_text()
+
+    def get_summary_text(self, examples_count: int = None):
+        """
+        :param examples_count: Count of examples, default: attached ones
+        """
+        if examples_count is None:
+            examples_count = len(self.examples)
         resource = f'{self.method.upper()} {self.path}'
-        stats = f'Examples: {len(self.examples)}, Parameters: {len(self.params)}'
+        stats = f'Examples: {examples_count}, Parameters: {len(self.params)}'
         return (
             resource,
             stats
@@ -184,6 +224,7 @@ class Resources(object):
         original_resource = resource.to_dict()
         original_resource['method'] = 'options'
         original_resource['examples'] = []
+        original_resource['dropped_durations'] = []
         original_resource['params'] = []
         cors_resource = Resource.create_from_dict(original_resource)
 
@@ -1,9 +1,12 @@
 from typing import List
 from urllib.parse import urlparse, ParseResult
-from os import scandir
 from copy import deepcopy
+from os.path import join
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from restiro.helpers import get_examples_dir
+from restiro.manifest import ManifestEntry, read_example_sources, \
+    read_dropped
 from .resource import Resource, Resources
 from .document import Document, Documents
 from .translation_mixin import TranslationMixin
@@ -99,44 +102,153 @@ class DocumentationRoot(TranslationMixin):
 
         self.translate(translation.gettext)
 
-    def load_resource_examples(self, examples_dir: str=None):
+    def load_resource_examples(self, examples_dir: str=None,
+                               workers: int=None, processes: bool=False,
+                               retention=None, where=None, store=None):
         """
         Load example objects into resources
 
-        :param examples_dir:
+        Example files are read and decoded concurrently, then attached to
+        resources in the recording order, each distinct requested path is
+        resolved once.
+        When the examples directory has a manifest, ``where`` and routing
+        are evaluated against the manifest and only the selected examples
+        are decoded, example files which are not listed by the manifest are
+        decoded to be selected and routed.
+
+        :param examples_dir: Examples directory, default: temp directory
+        :param workers: Maximum count of workers, default: decided by
+                        the executor
+        :param processes: Decode examples in a process pool instead of
+                          threads
+        :param retention: Limit examples per resource by a
+                          :class:`restiro.retention.RetentionPolicy`
+        :param where: Predicate of :class:`restiro.manifest.ManifestEntry`
+                      to select examples, e.g:
+                      ``lambda entry: entry.visible``
+        :param store: Read examples from a
+                      :class:`restiro.sqlite_store.SQLiteStore` instead of
+                      examples directory
         :return:
         """
         from . import ResourceExample
         if not examples_dir:
             examples_dir = get_examples_dir()
 
-        # Sort examples by index number from filename (generated by middleware)
-        # Examples filename format: {index}-{uuid}.pickle
-        directories = sorted(scandir(examples_dir),
-                             key=lambda k: int(k.name.split('-')[0]))
-        for dir_entry in directories:
-            resource_example = ResourceExample.load(dir_entry.path)
+        resolve = ResourceResolver(self)
+        resources = []
+        sources = []
+        for source in (
+            store.read_manifest() if store is not None else
+            read_example_sources(examples_dir)
+        ):
+            if not isinstance(source, ManifestEntry):
+                # Unlisted example file, routed after decoding
+                resources.append(None)
+                sources.append(source)
+                continue
 
-            resource_path = resource_example.request.path
-            resource_method = resource_example.request.method
+            if where is not None and not where(source):
+                continue
 
-            resource = self.resources.find(
-                path=resource_path,
-                method=resource_method
+            resource = resolve(source.method, source.path)
+            if resource:
+                resources.append(resource)
+                sources.append(
+                    source if store is not None else
+                    join(examples_dir, source.file)
+                )
+
+        if store is not None:
+            examples = store.load_entries(sources)
+
+        else:
+            executor_class = (
+                ProcessPoolExecutor if processes else ThreadPoolExecutor
             )
+            with executor_class(max_workers=workers) as executor:
+                examples = list(executor.map(
+                    ResourceExample.load,
+                    sources,
+                    chunksize=64
+                ))
 
-            if not resource:
-                resource_path = resource_path[len(self.base_uri.path):]
+        for resource, source, resource_example in zip(resources, sources,
+                                                      examples):
+            if resource is None:
+                if where is not None and not where(
+                    ManifestEntry.create_from_example_file(
+                        source,
+                        resource_example.to_dict(),
+                        resource_example.content_hash
+                    )
+                ):
+                    continue
 
-                resource = self.resources.find(
-                    path=resource_path,
-                    method=resource_method
+                resource = resolve(
+                    resource_example.request.method,
+                    resource_example.request.path
                 )
+                if not resource:
+                    continue
+
+            resource.examples.append(resource_example)
 
-            if not resource:
+        # Durations of examples which are not admitted at record time
+        for entry in (
+            store.read_dropped() if store is not None else
+            read_dropped(examples_dir)
+        ):
+            if where is not None and not where(entry):
                 continue
 
-            resource.examples.append(resource_example)
+            resource = resolve(entry.method, entry.path)
+            if resource and entry.duration is not None:
+                resource.dropped_durations.append(entry.duration)
+
+        if retention is not None:
+            self.apply_retention(retention)
+
+    def iter_examples(self):
+        for _, resource in self.resources.items():
+            yield from resource.examples
+
+    def bind_bodies(self, directory: str):
+        """
+        Set directory of sidecar body files for all examples
+
+        :param directory: Sidecar files directory
+        """
+        for example in self.iter_examples():
+            example.bind_bodies(directory)
+
+    def apply_retention(self, retention):
+        """
+        Drop examples of resources which are not retained by policy, see
+        :meth:`Resource.apply_retention`
+
+        :param retention: :class:`restiro.retention.RetentionPolicy`
+        """
+        for _, resource in self.resources.items():
+            resource.apply_retention(retention)
+
+    def find_resource(self, path: str, method: str) -> Resource:
+        """
+        Find resource by requested path, with or without ``base_uri`` prefix
+
+        :param path: Requested path
+        :param method: Requested method
+        :return: Matched resource or ``None``
+        """
+        resource = self.resources.find(path=path, method=method)
+
+        if not resource:
+            resource = self.resources.find(
+                path=path[len(self.base_uri.path):],
+                method=method
+            )
+
+        return resource
 
     @classmethod
     def create_from_dict(cls, data: dict) -> 'DocumentationRoot':
@@ -153,3 +265,30 @@ class DocumentationRoot(TranslationMixin):
             )
 
         return cls(**kwargs)
+
+
+class ResourceResolver:
+
+    def __init__(self, docs_root: DocumentationRoot, accept=None):
+        """
+        Resolve requests to resources of documentation root, like
+        :meth:`DocumentationRoot.find_resource`, each distinct requested
+        method and path is resolved once
+
+        :param docs_root: Documentation root
+        :param accept: Predicate of resolved resources, others are
+                       resolved to ``None``
+        """
+        self.docs_root = docs_root
+        self.accept = accept
+        self._resolved_resources = {}
+
+    def __call__(self, method: str, path: str) -> Resource:
+        key = (method, path)
+        if key not in self._resolved_resources:
+            resource = self.docs_root.find_resource(path=path, method=method)
+            if resource and self.accept is not None and \
+                    not self.accept(resource):
+                resource = None
+            self._resolved_resources[key] = resource
+        return self._resolved_resources[key]
@@ -0,0 +1,197 @@
+"""
+    Pre-fork process supervisor of ``socketserver`` based servers, POSIX
+    only
+"""
+import os
+import selectors
+import signal
+import time
+
+from socketserver import BaseServer
+from typing import Callable
+
+#: Seconds between supervising rounds, and between checks of workers
+#: whether the supervisor is alive
+poll_interval = 0.5
+
+#: A worker which exits sooner than this many seconds is restarted after
+#: the same delay, to not fork in a tight loop when it crashes on start
+min_lifetime = 1.0
+
+
+class PreforkServer:
+
+    def __init__(self, server: BaseServer, workers: int,
+                 worker_exit: Callable[[], None] = None):
+        """
+        Serve by forked worker processes which share the listening socket
+        of server. Everything loaded before :meth:`serve_forever`, e.g:
+        documentation root and indexes of mock server, is shared by
+        workers copy-on-write.
+
+        Crashed workers are restarted, on ``SIGTERM`` or ``SIGINT`` workers
+        finish their in-flight request and exit, as do workers of a killed
+        supervisor. :meth:`roll` replaces
+        workers by new ones, forked from the current state of parent, e.g:
+        after reloading the mock server.
+
+        :param server: Bound and listening server, e.g: result of
+                       ``wsgiref.simple_server.make_server``
+        :param workers: Count of worker processes
+        :param worker_exit: Called by a worker before exiting gracefully
+        """
+        if workers < 1:
+            raise ValueError('Invalid count of workers %s' % workers)
+
+        self.server = server
+        self.workers = workers
+        self.worker_exit = worker_exit
+        # Start time by pid of workers
+        self.pids = {}
+        self.retiring = set()
+        self.restarts = []
+        self.stopping = False
+        self.roll_requested = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:  # pragma: nocover, Covered in a forked process
+            code = 1
+            try:
+                self.run_worker()
+                code = 0
+            finally:
+                os._exit(code)
+
+        self.pids[pid] = time.monotonic()
+        return pid
+
+    def run_worker(self):
+        stopping = []
+        supervisor = os.getppid()
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        # Signals wake up the worker by a self-pipe, so it stops accepting
+        # connections at once, instead of after the poll interval
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        # Only the worker which accepts a connection serves it, others
+        # return to waiting
+        self.server.socket.setblocking(False)
+        accept = self.server.get_request
+
+        def get_request():
+            connection, address = accept()
+            connection.setblocking(True)
+            return connection, address
+
+        self.server.get_request = get_request
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.server, selectors.EVENT_READ)
+            selector.register(wakeup_read, selectors.EVENT_READ)
+            while not stopping:
+                # Orphaned, e.g: the supervisor is killed
+                if os.getppid() != supervisor:
+                    break
+
+                for key, _ in selector.select(poll_interval):
+                    if stopping:
+                        break
+                    if key.fileobj is self.server:
+                        # Ignores connections accepted by other workers
+                        self.server._handle_request_noblock()
+                    else:
+                        os.read(wakeup_read, 512)
+
+        signal.set_wakeup_fd(-1)
+        os.close(wakeup_read)
+        os.close(wakeup_write)
+        self.server.server_close()
+        if self.worker_exit is not None:
+            self.worker_exit()
+
+    def stop(self, signum=signal.SIGTERM, frame=None):
+        self.stopping = True
+        self.terminate(self.pids)
+
+    @staticmethod
+    def terminate(pids):
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def roll(self, *args):
+        """
+        Ask for replacing workers, safe to be called by a signal handler or
+        another thread
+        """
+        self.roll_requested = True
+
+    def roll_workers(self):
+        # New workers are accepting before old ones stop, old ones finish
+        # their in-flight request
+        old = set(self.pids) - self.retiring
+        for _ in range(self.workers):
+            self.spawn()
+        self.retiring.update(old)
+        self.terminate(old)
+
+    def reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+
+            if pid == 0:
+                return
+
+            started_at = self.pids.pop(pid, None)
+            if started_at is None:
+                continue
+
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+
+            if not self.stopping:
+                # Delayed if it died on start
+                self.restarts.append(started_at + min_lifetime)
+
+    def serve_forever(self):
+        """
+        Fork workers and supervise them until ``SIGTERM`` or ``SIGINT``
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.pids or (self.restarts and not self.stopping):
+            if self.roll_requested and not self.stopping:
+                self.roll_requested = False
+                self.restarts.clear()
+                self.roll_workers()
+
+            self.reap()
+            now = time.monotonic()
+            for due in sorted(self.restarts):
+                if due > now or self.stopping:
+                    break
+                self.restarts.remove(due)
+                self.spawn()
+
+            time.sleep(poll_interval)
+
+        self.server.server_close()
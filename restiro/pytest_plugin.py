@@ -0,0 +1,110 @@
+"""
+    Pytest plugin of restiro, registered by ``pytest11`` entry point
+"""
+from importlib.util import find_spec
+from os import makedirs
+from os.path import dirname
+
+import pytest
+
+from restiro.stats import recording_timer
+
+
+class SessionBuild:
+
+    def __init__(self, src: str, output_dir: str, generator_type: str,
+                 title: str = None, base_uri: str = None):
+        """
+        Documentation which is built at the end of test session, from
+        examples recorded in memory
+
+        :param src: Project module name
+        :param output_dir: Output directory
+        :param generator_type: Generator, e.g: ``markdown``
+        :param title: Project title, default: ``src``
+        :param base_uri: Base URI
+        """
+        from restiro import Documentor
+        self.output_dir = output_dir
+        self.documentor = Documentor(
+            title=title or src,
+            source_dir=dirname(find_spec(src).origin),
+            base_uri=base_uri,
+            generator_type=generator_type
+        )
+        self.docs_root = None
+
+    def get_docs_root(self):
+        if self.docs_root is None:
+            self.docs_root = self.documentor.initiate_docs_root(
+                load_examples=False
+            )
+        return self.docs_root
+
+    def generate(self):
+        makedirs(self.output_dir, exist_ok=True)
+        self.documentor.generate(self.output_dir, docs_root=self.docs_root)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('restiro')
+    group.addoption(
+        '--restiro-timing', action='store_true', default=False,
+        help='Measure overhead of recording examples')
+    group.addoption(
+        '--restiro-src',
+        help='Project module name, to build documentation at the end of '
+             'session from examples recorded by restiro_docs_root fixture')
+    group.addoption(
+        '--restiro-output', default='./docs',
+        help='Output directory of documentation, default: ./docs')
+    group.addoption(
+        '--restiro-generator', default='markdown',
+        help='Generator of documentation, default: markdown')
+    group.addoption(
+        '--restiro-title', help='Project title')
+    group.addoption(
+        '--restiro-base-uri', help='Base URI')
+
+
+def pytest_configure(config):
+    if config.getoption('restiro_timing'):
+        recording_timer.enabled = True
+
+    config.restiro_build = None
+    if config.getoption('restiro_src'):
+        config.restiro_build = SessionBuild(
+            src=config.getoption('restiro_src'),
+            output_dir=config.getoption('restiro_output'),
+            generator_type=config.getoption('restiro_generator'),
+            title=config.getoption('restiro_title'),
+            base_uri=config.getoption('restiro_base_uri')
+        )
+
+
+@pytest.fixture(scope='session')
+def restiro_docs_root(request):
+    """
+    Documentation root of ``--restiro-src`` which is generated at the end
+    of session, pass it as ``sink`` of ``TestApp`` to record in memory
+    """
+    build = request.config.restiro_build
+    if build is None:
+        raise pytest.UsageError(
+            'restiro_docs_root fixture requires --restiro-src option'
+        )
+    return build.get_docs_root()
+
+
+def pytest_sessionfinish(session):
+    build = getattr(session.config, 'restiro_build', None)
+    if build is not None and build.docs_root is not None:
+        build.generate()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not recording_timer.enabled or not recording_timer.summary():
+        return
+
+    terminalreporter.write_sep('=', 'restiro recording overhead')
+    terminalreporter.write_line(recording_timer.format_summary())
@@ -0,0 +1,111 @@
+import json
+
+from typing import List, Hashable
+
+from restiro.models import ResourceExample, BodyFormatJson
+
+
+def body_shape(body: str, body_format=None):
+    """
+    Structure of body without values, e.g: ``{"id": 1, "tags": ["a"]}`` ->
+    ``(('id', 'int'), ('tags', ('list', ('str',))))``
+    """
+    if body is None:
+        return None
+
+    if not body:
+        return 'empty'
+
+    if body_format != BodyFormatJson:
+        return 'text'
+
+    try:
+        return value_shape(json.loads(body))
+    except ValueError:
+        return 'text'
+
+
+def value_shape(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, value_shape(v)) for k, v in value.items()))
+
+    if isinstance(value, list):
+        return 'list', tuple(sorted({value_shape(v) for v in value}, key=repr))
+
+    return type(value).__name__
+
+
+def fingerprint(example: ResourceExample) -> Hashable:
+    """
+    Fingerprint of example to detect near-identical examples, based on
+    response status, query-string keys, form keys and body shapes
+    """
+    request, response = example.request, example.response
+    return (
+        response.status,
+        frozenset(request.query_strings or ()),
+        frozenset(request.form_params or ()),
+        body_shape(request.body, request.body_format),
+        body_shape(response.body, response.body_format),
+    )
+
+
+class RetentionPolicy:
+
+    def __init__(self, max_examples: int = 10, max_per_fingerprint: int = 1):
+        """
+        Limit count of examples per resource, keeping a diverse subset
+
+        :param max_examples: Maximum count of examples per resource
+        :param max_per_fingerprint: Maximum count of near-identical
+                                    examples, visible examples are
+                                    kept anyway
+        """
+        self.max_examples = max_examples
+        self.max_per_fingerprint = max_per_fingerprint
+        self._recorded = {}
+
+    def select(self, examples: List[ResourceExample]) -> List[ResourceExample]:
+        """
+        Select examples to retain, visible examples first then distinct
+        fingerprints, in the original order
+        """
+        occurrences = {}
+        candidates = []
+        for position, example in enumerate(examples):
+            key = fingerprint(example)
+            rank = occurrences.get(key, 0)
+            occurrences[key] = rank + 1
+
+            if not example.visible and rank >= self.max_per_fingerprint:
+                continue
+
+            candidates.append(((not example.visible, rank, position), example))
+
+        candidates.sort(key=lambda x: x[0])
+        retained = sorted(
+            candidates[:self.max_examples],
+            key=lambda x: x[0][2]
+        )
+        return [example for _, example in retained]
+
+    def admit(self, key: Hashable, example: ResourceExample) -> bool:
+        """
+        Decide to record an example or not, at record time, visible
+        examples are recorded anyway as :meth:`select` keeps them first
+
+        :param key: Resource key, e.g: method and route template
+        :param example: Recorded example
+        """
+        state = self._recorded.setdefault(key, [0, {}])
+        count, occurrences = state
+        example_fingerprint = fingerprint(example)
+        rank = occurrences.get(example_fingerprint, 0)
+        if not example.visible and (
+                count >= self.max_examples or
+                rank >= self.max_per_fingerprint):
+            return False
+
+        occurrences[example_fingerprint] = rank + 1
+        state[0] += 1
+        return True
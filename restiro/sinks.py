@@ -0,0 +1,323 @@
+import os
+import json
+import atexit
+
+from os.path import join, basename
+from queue import Queue, Empty, Full
+from threading import Thread, Lock
+from uuid import uuid4
+
+from restiro.models import ResourceExample, DocumentationRoot, \
+    ResourceResolver
+from restiro.models.example import content_hash
+from restiro.manifest import ManifestEntry, DroppedEntry, append_manifest, \
+    dropped_filename
+from restiro.compression import compressed_filename, open_file
+from restiro.stats import recording_timer
+from restiro.helpers import get_examples_dir
+
+_stop = object()
+
+
+# noinspection PyMethodMayBeStatic
+class ExampleSink:
+    """
+    Destination of recorded examples
+    """
+
+    def write(self, index: int,
+              example: ResourceExample):  # pragma: nocover
+        raise NotImplementedError
+
+    def write_many(self, items):
+        for index, example in items:
+            self.write(index, example)
+
+    def write_dropped(self, index: int, example: ResourceExample):
+        """
+        Keep the duration of an example which is not admitted by retention,
+        for latency of its resource
+        """
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def bind_docs_root(self, docs_root: DocumentationRoot):
+        """
+        Documentation root of the recorder, to resolve route templates
+        """
+        pass
+
+
+class DirectorySink(ExampleSink):
+    """
+    Write each example into a separate JSON file,
+    filename format: {index}-{uuid}.json[.gz|.zz|.xz]
+
+    Summary of examples are appended to the manifest of directory.
+    """
+
+    def __init__(self, examples_dir: str = None, compression: str = None):
+        self.examples_dir = examples_dir or get_examples_dir()
+        self.compression = compression
+
+    def get_filename(self, index: int):
+        return join(self.examples_dir, compressed_filename(
+            '%s-%s.json' % (index, uuid4().hex),
+            self.compression
+        ))
+
+    def write_file(self, index: int,
+                   example: ResourceExample) -> ManifestEntry:
+        with recording_timer.measure('uuid'):
+            filename = self.get_filename(index)
+
+        with recording_timer.measure('serialize'):
+            data = example.to_dict()
+            serialized_data = json.dumps(data)
+
+        with recording_timer.measure('write'):
+            with open_file(filename, 'w', self.compression) as f:
+                f.write(serialized_data)
+
+        return ManifestEntry.create_from_example_dict(
+            seq=index,
+            data=data,
+            hash=content_hash(data),
+            file=basename(filename)
+        )
+
+    def write(self, index: int, example: ResourceExample):
+        self.write_many([(index, example)])
+
+    def write_many(self, items):
+        # Listed once written, a failure does not hide written files
+        for index, example in items:
+            entry = self.write_file(index, example)
+            with recording_timer.measure('manifest'):
+                append_manifest(self.examples_dir, [entry])
+
+    def write_dropped(self, index: int, example: ResourceExample):
+        append_manifest(
+            self.examples_dir,
+            [DroppedEntry.create_from_example(
+                seq=index,
+                example=example,
+                file='%s-%s' % (index, uuid4().hex)
+            )],
+            dropped_filename
+        )
+
+
+class MemorySink(ExampleSink):
+    """
+    Collect examples in memory, in recording order
+    """
+
+    def __init__(self):
+        self.items = []
+        self._lock = Lock()
+
+    @property
+    def examples(self):
+        return [example for _, example in self.items]
+
+    def write(self, index: int, example: ResourceExample):
+        with self._lock:
+            self.items.append((index, example))
+
+
+class DocumentationSink(ExampleSink):
+
+    def __init__(self, docs_root: DocumentationRoot):
+        """
+        Attach examples to resolved resources of documentation root as they
+        are recorded, examples of unknown resources are dropped
+
+        :param docs_root: Documentation root to fill
+        """
+        self.docs_root = docs_root
+        self.dropped_count = 0
+        self._resolve = ResourceResolver(docs_root)
+        self._lock = Lock()
+
+    def write(self, index: int, example: ResourceExample):
+        with self._lock:
+            resource = self._resolve(
+                example.request.method,
+                example.request.path
+            )
+            if resource:
+                resource.examples.append(example)
+            else:
+                self.dropped_count += 1
+
+    def write_dropped(self, index: int, example: ResourceExample):
+        with self._lock:
+            resource = self._resolve(
+                example.request.method,
+                example.request.path
+            )
+            if resource and example.duration is not None:
+                resource.dropped_durations.append(example.duration)
+
+
+def create_sink(sink=None, examples_dir: str = None,
+                docs_root: DocumentationRoot = None) -> ExampleSink:
+    """
+    Sink of recorders, ``DocumentationRoot`` is filled in memory
+
+    :param sink: ``ExampleSink`` or ``DocumentationRoot``,
+                 default: ``DirectorySink``
+    :param examples_dir: Examples directory of default sink
+    :param docs_root: Documentation root of the recorder, bound to the sink
+    """
+    if sink is None:
+        return DirectorySink(examples_dir)
+
+    if isinstance(sink, DocumentationRoot):
+        return DocumentationSink(sink)
+
+    if docs_root is not None:
+        sink.bind_docs_root(docs_root)
+    return sink
+
+
+class BackgroundSink(ExampleSink):
+
+    def __init__(self, sink: ExampleSink, max_size: int = 1024,
+                 batch_size: int = 64):
+        """
+        Hand examples to a background thread which writes them in batches.
+
+        The thread is started on first write of each process, so workers
+        forked by pre-forking servers have their own. Instead of an
+        example, a callable which builds it can be queued, to decode
+        bodies in the background thread too.
+
+        :param sink: The actual destination of examples
+        :param max_size: Queue capacity, ``write`` blocks while the queue
+                         is full
+        :param batch_size: Maximum count of examples per ``write_many``
+        """
+        self.sink = sink
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self._queue = None
+        self._error = None
+        self._thread = None
+        self._pid = None
+        self._lock = Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            # Queue of the parent process is not served here
+            self._queue = Queue(maxsize=self.max_size)
+            self._thread = Thread(
+                target=self._run,
+                name='restiro-writer',
+                daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.unregister(self.close)
+            atexit.register(self.close)
+
+    @property
+    def started(self) -> bool:
+        return self._pid == os.getpid()
+
+    def _put(self, item: tuple, block: bool = True) -> bool:
+        if not self.started:
+            self._start()
+        try:
+            self._queue.put(item, block)
+        except Full:
+            return False
+        return True
+
+    def write(self, index: int, example: ResourceExample):
+        self._put((index, example, False))
+
+    def try_write(self, index: int, example: ResourceExample) -> bool:
+        """
+        Queue the example without blocking, returns ``False`` if the queue
+        is full
+        """
+        return self._put((index, example, False), block=False)
+
+    def write_dropped(self, index: int, example: ResourceExample):
+        self._put((index, example, True))
+
+    def try_write_dropped(self, index: int,
+                          example: ResourceExample) -> bool:
+        """
+        Queue the dropped example without blocking, see :meth:`try_write`
+        """
+        return self._put((index, example, True), block=False)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            items = [item for item in batch if item is not _stop]
+            try:
+                # Built here if queued by callables
+                items = [
+                    (index, example() if callable(example) else example,
+                     dropped)
+                    for index, example, dropped in items
+                ]
+                written = [
+                    (index, example)
+                    for index, example, dropped in items if not dropped
+                ]
+                if written:
+                    self.sink.write_many(written)
+                for index, example, dropped in items:
+                    if dropped:
+                        self.sink.write_dropped(index, example)
+            except Exception as ex:
+                self._error = ex
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if len(items) != len(batch):
+                return
+
+    def flush(self):
+        """
+        Block until all queued examples are written
+        """
+        if self.started:
+            self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        self.sink.flush()
+
+    def bind_docs_root(self, docs_root: DocumentationRoot):
+        self.sink.bind_docs_root(docs_root)
+
+    def close(self):
+        if not self.started or not self._thread.is_alive():
+            return
+
+        self._queue.put(_stop)
+        self._thread.join()
+        atexit.unregister(self.close)
+        self.flush()
+        self.sink.close()
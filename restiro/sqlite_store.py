@@ -0,0 +1,315 @@
+import json
+import sqlite3
+
+from os.path import dirname, realpath
+from threading import Lock
+from typing import Iterator, List, Tuple, Union
+
+from restiro import DocumentationRoot, Resource, Resources, \
+    ResourceExample
+from restiro.bodies import BodyStore, get_bodies_dir
+from restiro.manifest import ManifestEntry, DroppedEntry
+from restiro.middlewares.routes import route_key, normalize_route
+from restiro.models.example import content_hash
+from restiro.sinks import ExampleSink
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS examples (
+    seq INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    route TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    visible INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    request_body BLOB,
+    response_body BLOB
+);
+CREATE INDEX IF NOT EXISTS examples_route
+    ON examples (route, method, status);
+CREATE INDEX IF NOT EXISTS examples_path ON examples (method, path);
+CREATE INDEX IF NOT EXISTS examples_visible ON examples (visible);
+CREATE INDEX IF NOT EXISTS examples_hash ON examples (hash);
+CREATE TABLE IF NOT EXISTS dropped (
+    seq INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    visible INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    duration REAL
+);
+'''
+
+_entry_columns = 'rowid, seq, method, path, status, visible, hash'
+
+
+class SQLiteStore(ExampleSink):
+
+    def __init__(self, filename: str, docs_root: DocumentationRoot = None):
+        """
+        Examples store in a SQLite database, summary of examples are
+        indexed columns and bodies are blobs.
+
+        As a sink, each ``write_many`` is a single transaction, wrap it by
+        :class:`restiro.sinks.BackgroundSink` to write in batches.
+        Large bodies (sidecar references) are materialized into ``bodies``
+        directory next to the database on load.
+
+        :param filename: Database file
+        :param docs_root: Used to resolve route templates of requests
+        """
+        self.filename = filename
+        self.docs_root = docs_root
+        self.bodies_dir = get_bodies_dir(dirname(realpath(filename)))
+        self._lock = Lock()
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(_schema)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def bind_docs_root(self, docs_root: DocumentationRoot):
+        if self.docs_root is None:
+            self.docs_root = docs_root
+
+    def get_route(self, path: str) -> str:
+        return normalize_route(route_key(path, self.docs_root))
+
+    def _route_paths(self, route: str, method: str = None) -> List[str]:
+        """
+        Recorded paths matched by route template, stored routes are only
+        guessed when the store has no documentation root
+        """
+        resources = Resources()
+        resources.append(Resource(path=route, method=method or 'get'))
+        return [
+            path
+            for path, in self._execute(
+                'SELECT DISTINCT path FROM examples %s' % (
+                    'WHERE method = ?' if method is not None else ''
+                ),
+                (method,) if method is not None else ()
+            )
+            if resources.find(path, method or 'get')
+        ]
+
+    @staticmethod
+    def _pop_body(data: dict, message) -> Union[bytes, None]:
+        if message.body_ref is not None:
+            return message.body_ref.read()
+
+        body, data['body'] = data['body'], None
+        return body.encode() if body is not None else None
+
+    def _to_row(self, index: int, example: ResourceExample) -> tuple:
+        data = example.to_dict()
+        hash_ = content_hash(data)
+        request_body = self._pop_body(data['request'], example.request)
+        response_body = self._pop_body(data['response'], example.response)
+        return (
+            index,
+            example.request.method,
+            example.request.path,
+            self.get_route(example.request.path),
+            example.response.status,
+            int(example.visible),
+            hash_,
+            json.dumps(data),
+            request_body,
+            response_body
+        )
+
+    def write(self, index: int, example: ResourceExample):
+        self.write_many([(index, example)])
+
+    def write_many(self, items):
+        rows = [self._to_row(index, example) for index, example in items]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT INTO examples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def write_dropped(self, index: int, example: ResourceExample):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO dropped VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    index,
+                    example.request.method,
+                    example.request.path,
+                    example.response.status,
+                    int(example.visible),
+                    example.content_hash,
+                    example.duration
+                )
+            )
+
+    def _execute(self, query: str, params=()) -> list:
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def _load_body(self, data: dict, body: bytes):
+        if data.get('body_ref') is None:
+            data['body'] = body.decode() if body is not None else None
+
+    def _to_example(self, data: str, request_body: bytes,
+                    response_body: bytes) -> ResourceExample:
+        data = json.loads(data)
+        self._load_body(data['request'], request_body)
+        self._load_body(data['response'], response_body)
+        example = ResourceExample.create_from_dict(data)
+
+        # Materialize large bodies as sidecar files
+        body_store = BodyStore(self.bodies_dir)
+        for message, body in (
+            (example.request, request_body),
+            (example.response, response_body)
+        ):
+            if message.body_ref is not None:
+                message.body_ref = body_store.put(body)
+        return example
+
+    def read_manifest(self, where: str = '', params=()) -> List[ManifestEntry]:
+        """
+        Summary of examples in recording order
+
+        :param where: SQL condition on indexed columns, e.g: ``visible = 1``
+        :param params: Parameters of condition
+        """
+        return [
+            ManifestEntry(
+                seq=seq,
+                method=method,
+                path=path,
+                status=status,
+                visible=bool(visible),
+                hash=hash_,
+                file=self.filename,
+                offset=rowid
+            )
+            for rowid, seq, method, path, status, visible, hash_ in
+            self._execute(
+                'SELECT %s FROM examples %s ORDER BY seq, rowid' % (
+                    _entry_columns,
+                    'WHERE %s' % where if where else ''
+                ),
+                params
+            )
+        ]
+
+    def read_dropped(self) -> List[DroppedEntry]:
+        """
+        Summary of examples which are not admitted by retention at record
+        time, in recording order
+        """
+        return [
+            DroppedEntry(
+                seq=seq,
+                method=method,
+                path=path,
+                status=status,
+                visible=bool(visible),
+                hash=hash_,
+                file=self.filename,
+                offset=rowid,
+                duration=duration
+            )
+            for rowid, seq, method, path, status, visible, hash_, duration in
+            self._execute(
+                'SELECT rowid, seq, method, path, status, visible, hash, '
+                'duration FROM dropped ORDER BY seq, rowid'
+            )
+        ]
+
+    def load_entries(self, entries: List[ManifestEntry],
+                     batch_size: int = 500) -> List[ResourceExample]:
+        """
+        Decode examples of manifest entries, in the given order
+        """
+        examples = []
+        for start in range(0, len(entries), batch_size):
+            rowids = [e.offset for e in entries[start:start + batch_size]]
+            rows = {
+                rowid: row
+                for rowid, *row in self._execute(
+                    'SELECT rowid, data, request_body, response_body '
+                    'FROM examples WHERE rowid IN (%s)' %
+                    ', '.join('?' * len(rowids)),
+                    rowids
+                )
+            }
+            examples.extend(self._to_example(*rows[rowid]) for rowid in rowids)
+        return examples
+
+    def query(self, method: str = None, route: str = None,
+              status: Union[int, Tuple[int, int]] = None,
+              visible: bool = None, newest_first: bool = False,
+              limit: int = None) -> Iterator[ResourceExample]:
+        """
+        Query examples by indexed columns
+
+        :param method: Requested method, lower case
+        :param route: Route template, e.g: ``/user/:user_id``, matched
+                      against recorded paths when the store has no
+                      documentation root
+        :param status: Status code or a ``[start, end)`` range,
+                       e.g: ``(200, 300)``
+        :param visible: Visible examples only, or invisible ones
+        :param newest_first: Order by recording, newest first
+        :param limit: Maximum count of examples
+        """
+        conditions = []
+        params = []
+        if method is not None:
+            conditions.append('method = ?')
+            params.append(method)
+
+        if route is not None and self.docs_root is not None:
+            conditions.append('route = ?')
+            params.append(normalize_route(route))
+
+        elif route is not None:
+            paths = self._route_paths(route, method)
+            conditions.append('path IN (%s)' % ', '.join('?' * len(paths)))
+            params.extend(paths)
+
+        if isinstance(status, tuple):
+            conditions.append('status >= ? AND status < ?')
+            params.extend(status)
+        elif status is not None:
+            conditions.append('status = ?')
+            params.append(status)
+
+        if visible is not None:
+            conditions.append('visible = ?')
+            params.append(int(visible))
+
+        query = 'SELECT data, request_body, response_body FROM examples'
+        if conditions:
+            query += ' WHERE %s' % ' AND '.join(conditions)
+        query += ' ORDER BY rowid %s' % ('DESC' if newest_first else 'ASC')
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+
+        for row in self._execute(query, params):
+            yield self._to_example(*row)
+
+    def resource_examples(self, resource: Resource,
+                          **kwargs) -> Iterator[ResourceExample]:
+        """
+        Query examples of resource, see :meth:`query`
+        """
+        return self.query(
+            method=resource.method,
+            route=resource.path,
+            **kwargs
+        )
+
+    def count(self) -> int:
+        return self._execute('SELECT COUNT(*) FROM examples')[0][0]
@@ -0,0 +1,101 @@
+import os
+
+from threading import Lock
+from time import perf_counter
+
+
+class _NullMeasure:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _Measure:
+
+    def __init__(self, timer: 'PhaseTimer', phase: str):
+        self.timer = timer
+        self.phase = phase
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.timer.add(self.phase, perf_counter() - self.start)
+        return False
+
+
+_null_measure = _NullMeasure()
+
+
+class PhaseTimer:
+
+    def __init__(self, enabled: bool = False):
+        """
+        Aggregate durations of named phases, per process
+
+        :param enabled: Measure phases, when disabled ``measure`` costs a
+                        single attribute check
+        """
+        self.enabled = enabled
+        self._lock = Lock()
+        self._phases = {}
+
+    def measure(self, phase: str):
+        if not self.enabled:
+            return _null_measure
+        return _Measure(self, phase)
+
+    def add(self, phase: str, duration: float):
+        with self._lock:
+            stats = self._phases.setdefault(phase, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+
+    def summary(self) -> dict:
+        """
+        Summary of phases, durations are in seconds
+        """
+        with self._lock:
+            return {
+                phase: {
+                    'count': count,
+                    'total': total,
+                    'mean': total / count,
+                    'max': maximum
+                }
+                for phase, (count, total, maximum) in self._phases.items()
+            }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = ['%-12s %10s %12s %12s %12s' % (
+            'Phase', 'Count', 'Total (ms)', 'Mean (ms)', 'Max (ms)'
+        )]
+        for phase, stats in sorted(
+            summary.items(),
+            key=lambda x: x[1]['total'],
+            reverse=True
+        ):
+            lines.append('%-12s %10d %12.2f %12.4f %12.4f' % (
+                phase,
+                stats['count'],
+                stats['total'] * 1000,
+                stats['mean'] * 1000,
+                stats['max'] * 1000
+            ))
+        return '\n'.join(lines)
+
+
+#: Durations of example recording phases, enabled by ``RESTIRO_TIMING``
+#: environment variable or ``--restiro-timing`` pytest option
+recording_timer = PhaseTimer(enabled=bool(os.environ.get('RESTIRO_TIMING')))
@@ -0,0 +1,172 @@
+import json
+import shutil
+import tempfile
+
+from collections import OrderedDict
+from os.path import join, exists
+from typing import List
+
+from restiro import DocumentationRoot, Resource, ResourceExample
+from restiro.models import ResourceResolver
+from restiro.bodies import get_bodies_dir
+from restiro.compression import open_file
+from restiro.latency import dropped_durations
+from restiro.helpers import get_examples_dir
+from restiro.manifest import ManifestEntry, read_example_sources, \
+    read_dropped
+from restiro.retention import RetentionPolicy
+
+
+class StreamingBuild:
+
+    def __init__(self, docs_root: DocumentationRoot, examples_dir: str = None,
+                 work_dir: str = None, retention: RetentionPolicy = None,
+                 where=None, max_open_files: int = 64):
+        """
+        Build documentation resource by resource, with bounded memory.
+
+        Examples are partitioned on disk by resource (keeping the
+        recording order), then each resource is rendered with only its
+        own examples loaded.
+
+        :param docs_root: Documentation root, already attached examples
+                          are kept
+        :param examples_dir: Examples directory, default: temp directory
+        :param work_dir: Directory of partition files, default: a new
+                         temporary directory which is removed on close
+        :param retention: Limit examples per resource
+        :param where: Predicate of :class:`restiro.manifest.ManifestEntry`
+                      to select examples
+        :param max_open_files: Maximum count of partition files kept open
+        """
+        self.docs_root = docs_root
+        self.examples_dir = examples_dir or get_examples_dir()
+        self.retention = retention
+        self.where = where
+        self.max_open_files = max_open_files
+        self._own_work_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='restiro-')
+        self.example_counts = {}
+        self._dropped_durations = {}
+        self.resolve = ResourceResolver(docs_root)
+        self._open_files = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._close_files()
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _close_files(self):
+        while self._open_files:
+            _, f = self._open_files.popitem(last=False)
+            f.close()
+
+    def get_partition_filename(self, resource: Resource):
+        return join(self.work_dir, '%s.jsonl' % resource.__id__)
+
+    def _append(self, resource: Resource, line: str):
+        filename = self.get_partition_filename(resource)
+        f = self._open_files.pop(filename, None)
+        if f is None:
+            if len(self._open_files) >= self.max_open_files:
+                _, oldest = self._open_files.popitem(last=False)
+                oldest.close()
+            f = open(filename, 'a', encoding='utf-8')
+
+        self._open_files[filename] = f
+        f.write(line)
+        f.write('\n')
+
+    def partition(self):
+        """
+        Append each selected example to the partition file of its resource,
+        in recording order. Examples listed by the manifest are routed by
+        their entries and only the selected ones are decoded.
+        """
+        for source in read_example_sources(self.examples_dir):
+            if isinstance(source, ManifestEntry):
+                if self.where is not None and not self.where(source):
+                    continue
+
+                resource = self.resolve(source.method, source.path)
+                if not resource:
+                    continue
+
+                # Re-serialized into a single line
+                with open_file(join(self.examples_dir, source.file)) as f:
+                    self._append(resource, json.dumps(json.load(f)))
+                continue
+
+            # Unlisted example file
+            with open_file(source) as f:
+                data = json.load(f)
+
+            if self.where is not None and not self.where(
+                ManifestEntry.create_from_example_file(source, data)
+            ):
+                continue
+
+            resource = self.resolve(
+                data['request']['method'],
+                data['request']['path']
+            )
+            if resource:
+                self._append(resource, json.dumps(data))
+
+        # Durations of examples which are not admitted at record time
+        for entry in read_dropped(self.examples_dir):
+            if self.where is not None and not self.where(entry):
+                continue
+
+            resource = self.resolve(entry.method, entry.path)
+            if resource and entry.duration is not None:
+                resource.dropped_durations.append(entry.duration)
+
+        self._close_files()
+
+    def load_examples(self, resource: Resource) -> List[ResourceExample]:
+        """
+        Examples of a resource, already attached examples followed by the
+        examples of its partition
+        """
+        filename = self.get_partition_filename(resource)
+        examples = list(resource.examples)
+        if exists(filename):
+            bodies_dir = get_bodies_dir(self.examples_dir)
+            with open(filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    example = ResourceExample.create_from_dict(
+                        json.loads(line)
+                    )
+                    example.bind_bodies(bodies_dir)
+                    examples.append(example)
+
+        if self.retention is not None:
+            retained = self.retention.select(examples)
+            # Once per resource, durations of dropped examples are kept for
+            # latency of resource
+            base = self._dropped_durations.setdefault(
+                resource.__key__,
+                list(resource.dropped_durations)
+            )
+            resource.dropped_durations = \
+                base + dropped_durations(examples, retained)
+            examples = retained
+
+        self.example_counts[resource.__key__] = len(examples)
+        return examples
+
+    def generate(self, generator):
+        """
+        Partition examples and generate output by generator
+
+        :param generator: Instance of :class:`restiro.generators.BaseGenerator`
+        """
+        self.partition()
+        generator.generate_streaming(self.load_examples)
@@ -0,0 +1,199 @@
+import asyncio
+
+from restiro.asgi_server import HTTPServer, parse_head, BadRequest
+
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    if scope['path'] == '/error':
+        raise ValueError('Application error')
+
+    headers = [(b'content-type', b'text/plain')]
+    body = b'%s %s?%s %s' % (
+        scope['method'].encode(),
+        scope['path'].encode(),
+        scope['query_string'],
+        message['body']
+    )
+    if scope['path'] != '/stream':
+        headers.append((b'content-length', str(len(body)).encode()))
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': headers
+    })
+    if scope['path'] == '/stream':
+        for chunk in (b'abc', b'def'):
+            await send({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True
+            })
+        await send({'type': 'http.response.body', 'body': b''})
+    else:
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_polling_app(disconnects: list):
+
+    async def polling_app(scope, receive, send):
+        # Listens for disconnection while responding, like Starlette
+        async def listen():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnects.append(scope['path'])
+
+        listener = asyncio.ensure_future(listen())
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-length', b'2')]
+        })
+        await asyncio.sleep(.05)
+        await send({'type': 'http.response.body', 'body': b'ok'})
+        if scope['path'] == '/wait':
+            await listener
+        listener.cancel()
+
+    return polling_app
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode().split('\r\n')
+    headers = dict(
+        line.lower().split(': ', 1) for line in header_lines if line
+    )
+    if headers.get('transfer-encoding') == 'chunked':
+        body = b''
+        while True:
+            size = int(await reader.readuntil(b'\r\n'), 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            body += chunk[:-2]
+    else:
+        body = await reader.readexactly(int(headers['content-length']))
+    return status_line, headers, body
+
+
+def test_parse_head():
+    method, target, version, headers = parse_head(
+        b'GET /user?a=b HTTP/1.1\r\nHost: localhost\r\nX-A:  1 '
+    )
+    assert (method, target, version) == ('GET', '/user?a=b', '1.1')
+    assert headers == [('host', 'localhost'), ('x-a', '1')]
+
+    for head in (b'GET /user', b'GET / HTTP/2', b'GET / HTTP/1.1\r\nHost'):
+        try:
+            parse_head(head)
+        except BadRequest:
+            pass
+        else:  # pragma: nocover
+            assert False
+
+
+def test_asgi_http_server():
+
+    async def scenario():
+        started = asyncio.get_running_loop().create_future()
+        server = HTTPServer(echo_app, host='127.0.0.1', port=0)
+        task = asyncio.ensure_future(server.serve(started.set_result))
+        port = (await started).sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        # Keep-alive, content-length body
+        writer.write(
+            b'POST /user?a=b HTTP/1.1\r\nHost: localhost\r\n'
+            b'Content-Length: 5\r\n\r\nhello'
+        )
+        status_line, headers, body = await read_response(reader)
+        assert status_line == 'HTTP/1.1 200 OK'
+        assert body == b'POST /user?a=b hello'
+
+        # Chunked request body, streamed response
+        writer.write(
+            b'PUT /stream HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3\r\nabc\r\n0\r\n\r\n'
+        )
+        status_line, headers, body = await read_response(reader)
+        assert headers['transfer-encoding'] == 'chunked'
+        assert body == b'abcdef'
+
+        # Application error
+        writer.write(b'GET /error HTTP/1.1\r\n\r\n')
+        status_line, headers, body = await read_response(reader)
+        assert status_line == 'HTTP/1.1 500 Internal Server Error'
+        assert await reader.read() == b''
+        writer.close()
+
+        # Bad request
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'BAD\r\n\r\n')
+        status_line, headers, body = await read_response(reader)
+        assert status_line == 'HTTP/1.1 400 Bad Request'
+        writer.close()
+
+        # Connection close
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /user HTTP/1.1\r\nConnection: close\r\n\r\n')
+        status_line, headers, body = await read_response(reader)
+        assert headers['connection'] == 'close'
+        assert await reader.read() == b''
+        writer.close()
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_asgi_http_server_disconnect():
+
+    async def scenario():
+        disconnects = []
+        started = asyncio.get_running_loop().create_future()
+        server = HTTPServer(
+            create_polling_app(disconnects),
+            host='127.0.0.1',
+            port=0
+        )
+        task = asyncio.ensure_future(server.serve(started.set_result))
+        port = (await started).sockets[0].getsockname()[1]
+
+        # Pipelined requests are not consumed by polling receive
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n\r\n')
+        for _ in range(2):
+            status_line, headers, body = await asyncio.wait_for(
+                read_response(reader),
+                2
+            )
+            assert body == b'ok'
+
+        # End of request cycle is a disconnection of its receive
+        writer.write(b'GET /wait HTTP/1.1\r\n\r\n')
+        await asyncio.wait_for(read_response(reader), 2)
+        assert disconnects == ['/wait']
+        writer.close()
+
+        # Lost connection
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /lost HTTP/1.1\r\n\r\n')
+        await writer.drain()
+        writer.close()
+        await asyncio.sleep(.1)
+        assert disconnects == ['/wait', '/lost']
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
@@ -0,0 +1,143 @@
+import json
+
+from os.path import join
+from threading import Thread
+
+from restiro import DocumentationRoot
+from restiro.bench import Bench, BenchReport, HTTPTarget, Sample, \
+    WSGITarget, load_examples
+from restiro.mock_server import MockServer
+from restiro.sqlite_store import SQLiteStore
+from restiro.tests.helpers import temp_dir
+from restiro.tests.test_mock_server import mockup_resources
+
+
+def create_docs_root():
+    docs_root = DocumentationRoot(title='Hello World', base_uri='')
+    docs_root.resources.extend(mockup_resources())
+    return docs_root
+
+
+def test_load_examples():
+    docs_root = create_docs_root()
+    index_file = join(temp_dir, 'index.json')
+    with open(index_file, 'w') as f:
+        json.dump(docs_root.to_dict(), f)
+
+    examples = load_examples(index_file)
+    routes = [route for route, _ in examples]
+    assert 'GET /user/:user_id' in routes
+    assert len(examples) == sum(
+        len(r.examples) for _, r in docs_root.resources.items()
+    )
+
+    filename = join(temp_dir, 'examples.db')
+    store = SQLiteStore(filename, docs_root=docs_root)
+    store.write_many(enumerate(
+        example
+        for _, resource in docs_root.resources.items()
+        for example in resource.examples
+    ))
+    store.close()
+
+    # Routes of store are normalized, without names of parameters
+    examples = load_examples(filename)
+    assert len(examples) == len(routes)
+    assert 'GET /user/:' in [route for route, _ in examples]
+
+    # Resolved by index
+    examples = load_examples(filename, index=index_file)
+    assert sorted(route for route, _ in examples) == sorted(routes)
+
+
+def test_bench_report():
+    report = BenchReport([
+        Sample('GET /user', .001, 200, 200),
+        Sample('GET /user', .003, 200, 500),
+        Sample('GET /photo', .002, 200, error='ConnectionRefusedError()'),
+    ], elapsed=.5)
+    assert report.throughput == 6
+    assert abs(report.mismatch_rate - 2 / 3) < 1e-9
+    assert report.errors == 1
+
+    resources = report.resources()
+    assert resources['GET /user']['latency']['count'] == 2
+    assert resources['GET /user']['mismatches'] == 1
+    assert resources['GET /photo']['errors'] == 1
+    assert report.to_dict()['requests'] == 3
+    assert 'GET /photo' in report.format()
+
+
+def test_bench_wsgi():
+    docs_root = create_docs_root()
+    examples = [
+        ('%s %s' % (resource.method.upper(), resource.path), example)
+        for _, resource in docs_root.resources.items()
+        for example in resource.examples
+    ]
+    report = Bench(
+        examples,
+        WSGITarget(MockServer(docs_root)),
+        concurrency=2,
+        max_requests=len(examples) * 3
+    ).run()
+    assert len(report.samples) == len(examples) * 3
+    assert report.throughput > 0
+    assert report.errors == 0
+    assert report.mismatch_rate == 0
+
+    # Rate limited
+    report = Bench(
+        examples,
+        WSGITarget(MockServer(docs_root)),
+        concurrency=2,
+        rate=50,
+        duration=.2
+    ).run()
+    assert 9 <= len(report.samples) <= 10
+
+
+def test_bench_http():
+    from restiro.wsgi_server import make_server, KeepAliveRequestHandler
+
+    class QuietHandler(KeepAliveRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    docs_root = create_docs_root()
+    examples = [
+        ('%s %s' % (resource.method.upper(), resource.path), example)
+        for _, resource in docs_root.resources.items()
+        for example in resource.examples
+    ]
+    httpd = make_server(
+        '127.0.0.1', 0, MockServer(docs_root), handler_class=QuietHandler
+    )
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        url = 'http://127.0.0.1:%s' % httpd.server_port
+        for use_asyncio in (False, True):
+            report = Bench(
+                examples,
+                HTTPTarget(url),
+                concurrency=3,
+                max_requests=len(examples) * 2,
+                use_asyncio=use_asyncio
+            ).run()
+            assert len(report.samples) == len(examples) * 2
+            assert report.errors == 0
+            assert report.mismatch_rate == 0
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    # Connection refused
+    report = Bench(
+        examples[:1],
+        HTTPTarget(url),
+        concurrency=1,
+        max_requests=2,
+        use_asyncio=True
+    ).run()
+    assert report.errors == 2
+    assert report.mismatch_rate == 1
@@ -0,0 +1,99 @@
+import json
+
+from os import makedirs, listdir
+from os.path import join, exists
+
+from webtest import TestApp as WebtestApp
+
+from restiro import DocumentationRoot, Resource
+from restiro.bodies import BodyStore, get_bodies_dir
+from restiro.generators import MarkdownGenerator, JSONGenerator
+from restiro.mock_server import MockServer
+from restiro.tests.helpers import temp_dir
+
+
+def binary_app(environ, start_response):
+    if environ['PATH_INFO'] == '/large':
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return [json.dumps(list(range(100))).encode()]
+
+    start_response('200 OK', [('Content-Type', 'application/octet-stream')])
+    return [b'\xff\xfe\x00binary']
+
+
+def test_body_store():
+    store = BodyStore(join(temp_dir, 'body_store'), threshold=10,
+                      preview_size=4)
+
+    assert store.store(b'small') == ('small', None)
+
+    assert store.store(b'10 bytes!!') == ('10 bytes!!', None)
+
+    preview, ref = store.store(b'a larger body')
+    assert preview == 'a la'
+    assert ref.size == 13
+    assert ref.read() == b'a larger body'
+    assert b''.join(ref.iter_chunks(chunk_size=5)) == b'a larger body'
+
+    # Content-addressed
+    _, same_ref = store.store(b'a larger body')
+    assert same_ref.path == ref.path
+
+    preview, ref = store.store(b'\xff\xfe')
+    assert preview is None
+    assert ref.read() == b'\xff\xfe'
+
+
+def test_sidecar_bodies():
+    from restiro.middlewares.webtest import TestApp
+
+    examples_dir = join(temp_dir, 'sidecar_examples')
+    makedirs(examples_dir, exist_ok=True)
+    test_app = TestApp(
+        app=binary_app,
+        examples_dir=examples_dir,
+        options_policy='never',
+        body_store=BodyStore(get_bodies_dir(examples_dir), threshold=64)
+    )
+    test_app.get('/binary')
+    test_app.get('/large')
+
+    docs_root = DocumentationRoot(title='Sidecar', base_uri='http://localhost')
+    docs_root.resources.extend([
+        Resource(path='/binary', method='get'),
+        Resource(path='/large', method='get')
+    ])
+    docs_root.load_resource_examples(examples_dir)
+
+    binary_example = docs_root.resources.find('/binary', 'get').examples[0]
+    assert binary_example.response.body is None
+    assert binary_example.response.body_ref.read() == b'\xff\xfe\x00binary'
+
+    large_example = docs_root.resources.find('/large', 'get').examples[0]
+    assert len(large_example.response.body) == 256
+    assert large_example.response.body_ref.size == len(
+        json.dumps(list(range(100)))
+    )
+
+    # Mock server streams body from sidecar file
+    app = WebtestApp(MockServer(docs_root))
+    assert app.get('/binary').body == b'\xff\xfe\x00binary'
+    assert app.get('/large').json == list(range(100))
+
+    # Generators copy sidecar files and link them
+    destination_dir = join(temp_dir, 'sidecar_markdown')
+    makedirs(destination_dir)
+    MarkdownGenerator(docs_root, destination_dir).generate()
+    with open(join(destination_dir, 'large-get.md')) as f:
+        assert 'bodies/%s' % large_example.response.body_ref.digest in f.read()
+    assert len(listdir(get_bodies_dir(destination_dir))) == 2
+
+    destination_dir = join(temp_dir, 'sidecar_json')
+    makedirs(destination_dir)
+    JSONGenerator(docs_root, destination_dir).generate()
+    with open(join(destination_dir, 'index.json')) as f:
+        new_docs_root = DocumentationRoot.create_from_dict(json.load(f))
+    new_docs_root.bind_bodies(get_bodies_dir(destination_dir))
+    new_example = new_docs_root.resources.find('/binary', 'get').examples[0]
+    assert exists(new_example.response.body_ref.path)
+    assert new_example.response.body_ref.read() == b'\xff\xfe\x00binary'
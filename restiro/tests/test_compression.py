@@ -0,0 +1,85 @@
+import json
+import pytest
+
+from os import makedirs
+from os.path import join
+
+from restiro import DocumentationRoot, ResourceExample
+from restiro.compression import (
+    open_file, detect_compression, compressed_filename, ZlibReader
+)
+from restiro.generators import JSONGenerator, MockGenerator
+from restiro.sinks import DirectorySink
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+@pytest.mark.parametrize('compression', ('gzip', 'zlib', 'lzma', None))
+def test_open_file(compression):
+    directory = join(temp_dir, 'compression')
+    makedirs(directory, exist_ok=True)
+    content = json.dumps([{'id': index} for index in range(10000)])
+
+    filename = join(directory, compressed_filename('data.json', compression))
+    with open_file(filename, 'w', compression) as f:
+        f.write(content)
+    assert detect_compression(filename) == compression
+
+    with open_file(filename) as f:
+        assert f.read() == content
+
+    # Detect by magic bytes
+    plain_filename = join(directory, 'data-%s.bin' % compression)
+    with open_file(plain_filename, 'w', compression) as f:
+        f.write(content)
+    assert detect_compression(plain_filename) == compression
+    with open_file(plain_filename) as f:
+        assert json.load(f) == json.loads(content)
+
+
+def test_zlib_reader():
+    import io
+    import zlib
+    data = b'restiro' * 100000
+    reader = ZlibReader(io.BytesIO(zlib.compress(data)), chunk_size=16)
+    buffer = bytearray(1024)
+    chunks = []
+    while True:
+        size = reader.readinto(buffer)
+        if not size:
+            break
+        assert size <= 1024
+        chunks.append(bytes(buffer[:size]))
+    assert b''.join(chunks) == data
+
+    reader = ZlibReader(io.BytesIO(zlib.compress(data)[:100]))
+    with pytest.raises(EOFError):
+        reader.read()
+
+
+def test_compressed_store():
+    examples_dir = join(temp_dir, 'compressed_examples')
+    makedirs(examples_dir, exist_ok=True)
+    docs_root = mockup_doc_root()
+    example = docs_root.resources.find('/photo', 'get').examples[0]
+
+    for index, compression in enumerate(('gzip', 'zlib', 'lzma', None)):
+        DirectorySink(examples_dir, compression).write(index + 1, example)
+
+    docs_root = mockup_doc_root()
+    docs_root.load_resource_examples(examples_dir)
+    assert len(docs_root.resources.find('/photo', 'get').examples) == 5
+
+    for generator in (JSONGenerator, MockGenerator):
+        destination_dir = join(temp_dir, 'compressed_%s' % generator.__name__)
+        makedirs(destination_dir)
+        generator(docs_root, destination_dir, compression='lzma').generate()
+        filename = join(destination_dir, '%s.xz' % generator(
+            docs_root, destination_dir
+        ).get_index_filename())
+        with open_file(filename) as f:
+            new_docs_root = DocumentationRoot.create_from_dict(json.load(f))
+        assert new_docs_root.to_dict() == docs_root.to_dict()
+        assert isinstance(
+            new_docs_root.resources.find('/photo', 'get').examples[0],
+            ResourceExample
+        )
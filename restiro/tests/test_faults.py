@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import time
+
+from http.client import HTTPConnection, RemoteDisconnected
+from os.path import join
+from random import Random
+from threading import Thread
+
+import pytest
+
+from webtest import TestApp
+
+from restiro import DocumentationRoot, ResourceExample, ExampleRequest, \
+    ExampleResponse
+from restiro.asgi_server import HTTPServer
+from restiro.faults import Latency, FaultProfile, FaultProfiles, Injection
+from restiro.mock_asgi import ASGIMockServer
+from restiro.mock_server import MockServer
+from restiro.tests.helpers import temp_dir
+from restiro.wsgi_server import DropConnection
+from restiro.tests.test_mock_server import mockup_resources
+
+
+def create_docs_root():
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    return docs_root
+
+
+def test_latency():
+    random = Random(1)
+    example = ResourceExample(
+        request=ExampleRequest(method='get', path='/user'),
+        response=ExampleResponse(status=200, headers={}, body=''),
+        duration=.25
+    )
+    assert Latency('fixed:20').sample(random, example) == .02
+    assert Latency('recorded').sample(random, example) == .25
+    assert Latency('recorded:2').sample(random, example) == .5
+    for _ in range(100):
+        assert .01 <= Latency('uniform:10,50').sample(random, example) <= .05
+        assert Latency('normal:1,10').sample(random, example) >= 0
+        assert Latency('lognormal:40,0.5').sample(random, example) > 0
+        assert Latency('exponential:30').sample(random, example) >= 0
+
+    for spec in ('fixed', 'uniform:10', 'normal:a,b', 'gamma:1,2'):
+        try:
+            Latency(spec)
+        except ValueError:
+            pass
+        else:  # pragma: nocover
+            assert False
+
+
+def test_fault_profile():
+    random = Random(1)
+    profile = FaultProfile(errors={'503': .2, 500: .1}, drop_rate=.1)
+    injections = [profile.inject(random, None) for _ in range(5000)]
+    drops = sum(i.drop for i in injections) / len(injections)
+    unavailable = sum(i.status == 503 for i in injections) / len(injections)
+    errors = sum(i.status == 500 for i in injections) / len(injections)
+    assert .08 < drops < .12
+    assert .18 < unavailable < .22
+    assert .08 < errors < .12
+
+    try:
+        FaultProfile(errors={503: .6}, drop_rate=.5)
+    except ValueError:
+        pass
+    else:  # pragma: nocover
+        assert False
+
+    # Throttling
+    injection = Injection(bandwidth=100)
+    assert list(injection.throttle([b'a' * 25])) == [
+        (b'a' * 10, .1),
+        (b'a' * 10, .1),
+        (b'a' * 5, .05)
+    ]
+    assert list(Injection().throttle([b'abc'])) == [(b'abc', 0)]
+
+    # Load
+    filename = join(temp_dir, 'profiles.json')
+    profiles = FaultProfiles(
+        routes={'GET /photo': FaultProfile(latency='fixed:20')},
+        default=FaultProfile(errors={503: 1})
+    )
+    with open(filename, 'w') as f:
+        json.dump(profiles.to_dict(), f)
+
+    profiles = FaultProfiles.load(filename)
+    assert profiles.get('GET /photo').latency.spec == 'fixed:20'
+    assert profiles.get('GET /user').errors == {503: 1}
+
+
+def test_mock_server_faults():
+    profiles = FaultProfiles(
+        routes={
+            'GET /user': FaultProfile(latency='fixed:100', bandwidth=100),
+            'GET /user/:user_id': FaultProfile(errors={503: 1})
+        }
+    )
+    app = TestApp(app=MockServer(create_docs_root(), profiles=profiles))
+
+    started_at = time.monotonic()
+    resp = app.get('/user')
+    assert time.monotonic() - started_at >= .1
+    assert resp.json['name'] == 'John Doe'
+
+    resp = app.get('/user/12', status=503)
+    assert resp.status == '503 Service Unavailable'
+    assert resp.body == b''
+
+    # Dropped connections, by threaded server
+    from restiro.wsgi_server import make_server, KeepAliveRequestHandler
+
+    class QuietHandler(KeepAliveRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    profiles.default = FaultProfile(drop_rate=1)
+    httpd = make_server(
+        '127.0.0.1', 0, MockServer(create_docs_root(), profiles=profiles),
+        handler_class=QuietHandler
+    )
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        connection = HTTPConnection('127.0.0.1', httpd.server_port, 10)
+        connection.request('GET', '/photo?sort=title')
+        try:
+            connection.getresponse()
+        except RemoteDisconnected:
+            pass
+        else:  # pragma: nocover
+            assert False
+        connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_asgi_mock_server_faults():
+    profiles = FaultProfiles(
+        routes={'GET /photo': FaultProfile(drop_rate=1)},
+        default=FaultProfile(latency='fixed:200', bandwidth=200)
+    )
+    mock_server = ASGIMockServer(create_docs_root(), profiles=profiles)
+
+    async def request(path):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        await mock_server({
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': []
+        }, receive, send)
+        return sent
+
+    async def scenario():
+        # Delays do not block each other
+        started_at = time.monotonic()
+        responses = await asyncio.gather(*(
+            request('/user') for _ in range(5)
+        ))
+        assert time.monotonic() - started_at < 5 * .2
+
+        for sent in responses:
+            chunks = [m['body'] for m in sent[1:] if m['body']]
+            assert b''.join(chunks) == json.dumps({
+                'name': 'John Doe',
+                'age': 18
+            }).encode()
+            assert len(chunks) > 1
+
+        with pytest.raises(DropConnection):
+            await request('/photo')
+
+        # Closed without response by the bundled server
+        started = asyncio.get_running_loop().create_future()
+        server = HTTPServer(mock_server, host='127.0.0.1', port=0)
+        task = asyncio.ensure_future(server.serve(started.set_result))
+        port = (await started).sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /photo HTTP/1.1\r\n\r\n')
+        assert await asyncio.wait_for(reader.read(), 2) == b''
+        writer.close()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_fault_profiles_fork():
+    profiles = FaultProfiles(seed=7)
+    reader, writer = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: nocover
+        try:
+            os.write(writer, repr(profiles.random.random()).encode())
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    os.close(writer)
+    with os.fdopen(reader) as f:
+        # Workers do not inject the same faults
+        assert float(f.read()) != profiles.random.random()
@@ -0,0 +1,97 @@
+import json
+
+from os import makedirs, remove, listdir
+from os.path import join
+
+from restiro import ResourceExample, ExampleRequest, ExampleResponse
+from restiro.bodies import BodyStore, get_bodies_dir
+from restiro.compression import open_file
+from restiro.generators import JSONGenerator
+from restiro.ingest import Ingestion
+from restiro.manifest import manifest_filename
+from restiro.retention import RetentionPolicy
+from restiro.sinks import DirectorySink
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+def make_example(path, index, body=None, body_ref=None, method='get'):
+    return ResourceExample(
+        request=ExampleRequest(method=method, path=path),
+        response=ExampleResponse(
+            status=200,
+            headers={'Content-Type': 'application/json'},
+            body=body or json.dumps({'index': index}),
+            body_ref=body_ref
+        )
+    )
+
+
+def read_resources(index_file):
+    with open_file(index_file) as f:
+        return {
+            '%s-%s' % (r['path'], r['method']): r
+            for r in json.load(f)['resources']
+        }
+
+
+def test_ingest():
+    base_dir = join(temp_dir, 'ingest')
+    output_dir = join(base_dir, 'output')
+    makedirs(output_dir, exist_ok=True)
+
+    docs_root = mockup_doc_root()
+    docs_root.resources.find('/user', 'get').examples.append(
+        make_example('/user', 0)
+    )
+    JSONGenerator(docs_root, output_dir, compression='gzip').generate()
+    index_file = join(output_dir, 'index.json.gz')
+    original = read_resources(index_file)
+
+    examples_dir = join(base_dir, 'examples')
+    makedirs(examples_dir, exist_ok=True)
+    body_store = BodyStore(get_bodies_dir(examples_dir), threshold=16)
+    large_body, large_body_ref = body_store.store(b'[%s]' % b'0, ' * 16)
+    sink = DirectorySink(examples_dir)
+    sink.write(1, make_example('/user', 0))  # Already in index
+    sink.write(2, make_example('/user/12', 1))
+    sink.write(3, make_example('/user/13', 2))
+    sink.write(4, make_example('/user/13', 2))  # Duplicate
+    sink.write(5, make_example(
+        '/user', 3, body=large_body, body_ref=large_body_ref
+    ))
+    sink.write(6, make_example('/not/found', 4))
+
+    added = Ingestion(index_file, examples_dir).run()
+    assert added == {'/user/:user_id-get': 2, '/user-get': 1}
+
+    resources = read_resources(index_file)
+    assert len(resources['/user-get']['examples']) == 2
+    assert resources['/user-get']['examples'][1]['response']['body_ref']
+    assert len(resources['/user/:user_id-get']['examples']) == 2
+    assert resources['/photo-get'] == original['/photo-get']
+    assert listdir(get_bodies_dir(output_dir)) == [large_body_ref.digest]
+    assert not [f for f in listdir(output_dir) if f.startswith('.')]
+
+    # Nothing new
+    assert Ingestion(index_file, examples_dir).run() == {}
+
+    # Unlisted file next to the manifest
+    sink.write_file(7, make_example('/user/14', 5))
+    added = Ingestion(index_file, examples_dir).run()
+    assert added == {'/user/:user_id-get': 1}
+
+    # Without manifest, with retention and selection
+    remove(join(examples_dir, manifest_filename))
+    sink = DirectorySink(examples_dir)
+    for index in range(8, 13):
+        sink.write(index, make_example('/photo', index))
+    remove(join(examples_dir, manifest_filename))
+
+    added = Ingestion(
+        index_file,
+        examples_dir,
+        retention=RetentionPolicy(max_examples=2),
+        where=lambda entry: entry.seq > 7
+    ).run()
+    assert added == {'/photo-get': 1}
+    assert len(read_resources(index_file)['/photo-get']['examples']) == 2
@@ -0,0 +1,137 @@
+import json
+
+from os import makedirs
+from os.path import join
+
+from webtest.debugapp import debug_app
+
+from restiro import Resource, ResourceExample, ExampleRequest, \
+    ExampleResponse
+from restiro.generators import JSONGenerator, MarkdownGenerator
+from restiro.ingest import Ingestion
+from restiro.latency import (
+    percentile,
+    latency_summary,
+    read_latencies,
+    compare_latencies
+)
+from restiro.middlewares.webtest import TestApp
+from restiro.retention import RetentionPolicy
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+def build_index(name, durations):
+    docs_root = mockup_doc_root()
+    resource = docs_root.resources.find('/user', 'get')
+    for duration in durations:
+        resource.examples.append(ResourceExample(
+            request=ExampleRequest(method='get', path='/user'),
+            response=ExampleResponse(status=200, headers={}, body=''),
+            duration=duration
+        ))
+
+    destination_dir = join(temp_dir, 'latency', name)
+    for generator_class in (JSONGenerator, MarkdownGenerator):
+        makedirs(join(destination_dir, generator_class.__name__),
+                 exist_ok=True)
+        generator_class(
+            docs_root,
+            join(destination_dir, generator_class.__name__)
+        ).generate()
+    return destination_dir
+
+
+def test_latency():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert latency_summary([]) is None
+    assert latency_summary([0.003, 0.001, 0.002]) == {
+        'count': 3, 'p50': 2.0, 'p95': 3.0, 'p99': 3.0
+    }
+
+    # Recorded durations
+    examples_dir = join(temp_dir, 'latency', 'examples')
+    makedirs(examples_dir, exist_ok=True)
+    test_app = TestApp(app=debug_app, examples_dir=examples_dir)
+    test_app.get('/user')
+    docs_root = mockup_doc_root()
+    docs_root.load_resource_examples(examples_dir)
+    example = docs_root.resources.find('/user', 'get').examples[-1]
+    assert example.duration > 0
+    assert docs_root.resources.find('/user', 'get').latency['count'] == 1
+
+    # Durations of examples dropped by retention
+    docs_root = mockup_doc_root()
+    resource = docs_root.resources.find('/user', 'get')
+    for index in range(1, 21):
+        resource.examples.append(ResourceExample(
+            request=ExampleRequest(method='get', path='/user'),
+            response=ExampleResponse(status=200, headers={}, body=''),
+            duration=index / 1000
+        ))
+    docs_root.apply_retention(RetentionPolicy(max_examples=5))
+    assert len(resource.examples) == 1
+    assert resource.latency == {
+        'count': 20, 'p50': 10.0, 'p95': 19.0, 'p99': 20.0
+    }
+    assert Resource.create_from_dict(resource.to_dict()).latency == \
+        resource.latency
+
+    # Kept in the index, then merged by ingestion
+    index_dir = join(temp_dir, 'latency', 'ingest')
+    makedirs(index_dir, exist_ok=True)
+    JSONGenerator(docs_root, index_dir).generate()
+
+    # Durations of examples dropped at record time
+    examples_dir = join(temp_dir, 'latency', 'dropped_examples')
+    makedirs(examples_dir, exist_ok=True)
+    test_app = TestApp(app=debug_app, examples_dir=examples_dir,
+                       retention=RetentionPolicy(max_examples=1),
+                       options_policy='never')
+    for _ in range(5):
+        test_app.get('/user')
+    docs_root = mockup_doc_root()
+    docs_root.load_resource_examples(examples_dir)
+    resource = docs_root.resources.find('/user', 'get')
+    assert len(resource.examples) == 1
+    assert resource.latency['count'] == 5
+
+    index_file = join(index_dir, 'index.json')
+    retention = RetentionPolicy(max_examples=5)
+    assert Ingestion(index_file, examples_dir, retention).run() == {
+        '/user-get': 1
+    }
+    assert read_latencies(index_file)['GET /user']['count'] == 25
+    assert Ingestion(index_file, examples_dir, retention).run() == {}
+    assert read_latencies(index_file)['GET /user']['count'] == 25
+
+    # Generated docs
+    baseline_dir = build_index('baseline', [0.001] * 10 + [0.002])
+    with open(join(baseline_dir, 'JSONGenerator', 'index.json')) as f:
+        resources = json.load(f)['resources']
+    assert [r['latency'] for r in resources if r['latency']] == [
+        {'count': 11, 'p50': 1.0, 'p95': 2.0, 'p99': 2.0}
+    ]
+    with open(join(baseline_dir, 'MarkdownGenerator', 'user-get.md')) as f:
+        assert '**Latency:** p50 `1.0 ms`, p95 `2.0 ms`' in f.read()
+
+    # Compare against baseline
+    baseline = read_latencies(join(baseline_dir, 'JSONGenerator', 'index.json'))
+    assert list(baseline) == ['GET /user']
+
+    current = read_latencies(join(
+        build_index('current', [0.0011] * 10 + [0.003]),
+        'JSONGenerator',
+        'index.json'
+    ))
+    regressions = compare_latencies(baseline, current, threshold=0.2)
+    assert [r.percentile_key for r in regressions] == ['p95', 'p99']
+    assert regressions[0].ratio == 1.5
+    assert repr(regressions[0]) == \
+        'GET /user p95: 2.000 ms -> 3.000 ms (+50.0%)'
+
+    assert compare_latencies(baseline, current, threshold=0.6) == []
+    assert compare_latencies(baseline, current, min_count=20) == []
+    assert compare_latencies({}, current) == []
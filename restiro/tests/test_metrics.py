@@ -0,0 +1,138 @@
+import os
+
+from webtest import TestApp
+
+from restiro import DocumentationRoot
+from restiro.metrics import Metrics
+from restiro.mock_server import MockServer
+from restiro.tests.helpers import temp_dir
+from restiro.tests.test_mock_server import mockup_resources
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        name, value = line.rsplit(' ', 1)
+        samples[name] = float(value)
+    return samples
+
+
+def test_metrics():
+    metrics = Metrics()
+    labels = (('route', 'GET /user/"a"'),)
+    metrics.inc('restiro_mock_misses_total', labels)
+    metrics.inc('restiro_mock_misses_total', labels, 2)
+    for seconds in (.0002, .003, .003, 20):
+        metrics.observe('restiro_mock_request_seconds', labels, seconds)
+
+    text = metrics.render()
+    assert '# TYPE restiro_mock_request_seconds histogram' in text
+    samples = parse_metrics(text)
+    assert samples[
+        'restiro_mock_misses_total{route="GET /user/\\"a\\""}'
+    ] == 3
+
+    def bucket(le):
+        return samples[
+            'restiro_mock_request_seconds_bucket'
+            '{route="GET /user/\\"a\\"",le="%s"}' % le
+        ]
+
+    assert bucket('0.0001') == 0
+    assert bucket('0.00025') == 1
+    assert bucket('0.0025') == 1
+    assert bucket('0.005') == 3
+    assert bucket('10.0') == 3
+    assert bucket('+Inf') == 4
+    assert samples[
+        'restiro_mock_request_seconds_count{route="GET /user/\\"a\\""}'
+    ] == 4
+    assert abs(samples[
+        'restiro_mock_request_seconds_sum{route="GET /user/\\"a\\""}'
+    ] - 20.0062) < 1e-9
+
+
+def test_metrics_processes():
+    directory = os.path.join(temp_dir, 'metrics')
+    os.makedirs(directory)
+    metrics = Metrics(directory=directory, flush_interval=60)
+    labels = (('route', 'GET /user'),)
+    metrics.inc('restiro_mock_misses_total', labels)
+
+    # Forked processes record their own metrics
+    pid = os.fork()
+    if pid == 0:  # pragma: nocover
+        try:
+            assert metrics.counters == {}
+            metrics.inc('restiro_mock_misses_total', labels, 2)
+            metrics.observe('restiro_mock_match_seconds', labels, .001)
+            metrics.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    samples = parse_metrics(metrics.render())
+    assert samples['restiro_mock_misses_total{route="GET /user"}'] == 3
+    assert samples['restiro_mock_match_seconds_count{route="GET /user"}'] == 1
+
+    # Files of exited processes are kept
+    metrics.flush()
+    metrics.pid = -1
+    metrics.counters.clear()
+    samples = parse_metrics(metrics.render())
+    assert samples['restiro_mock_misses_total{route="GET /user"}'] == 3
+
+    # Even if a new process reuses the pid
+    reused = Metrics(directory=directory, flush_interval=60)
+    reused.inc('restiro_mock_misses_total', labels)
+    reused.flush()
+    samples = parse_metrics(reused.render())
+    assert samples['restiro_mock_misses_total{route="GET /user"}'] == 4
+
+
+def test_mock_server_metrics():
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    mock_server = MockServer(docs_root, metrics=Metrics())
+    app = TestApp(app=mock_server)
+
+    # Exact, without any header
+    for _ in range(2):
+        mock_server({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': '/user',
+            'QUERY_STRING': ''
+        }, lambda status, headers: None)
+    app.get('/user')
+    app.get('/photo?sort=url')
+    app.get('/user/1/image', status=404)
+    app.get('/unknown', status=404)
+
+    resp = app.get('/__restiro/metrics')
+    assert resp.content_type == 'text/plain'
+    samples = parse_metrics(resp.text)
+    assert samples[
+        'restiro_mock_hits_total{route="GET /user",match="exact"}'
+    ] == 2
+    assert samples[
+        'restiro_mock_hits_total{route="GET /user",match="fuzzy"}'
+    ] == 1
+    assert samples[
+        'restiro_mock_hits_total{route="GET /photo",match="fuzzy"}'
+    ] == 1
+    assert samples[
+        'restiro_mock_misses_total{route="GET /user/:user_id/image"}'
+    ] == 1
+    assert samples['restiro_mock_misses_total{route="unmatched"}'] == 1
+    assert samples[
+        'restiro_mock_request_seconds_count{route="GET /user"}'
+    ] == 3
+    assert samples[
+        'restiro_mock_match_seconds_count{route="unmatched"}'
+    ] == 1
+
+    # Not served without metrics
+    app = TestApp(app=MockServer(docs_root))
+    app.get('/__restiro/metrics', status=404)
@@ -1,11 +1,15 @@
+import asyncio
+
 import pytest
 
+from os import makedirs
 from os.path import join
 
 from webtest.debugapp import debug_app
 
 from restiro import DocumentationRoot, clean_examples_dir
-from restiro.tests.helpers import package_dir, mockup_resources
+from restiro.helpers import parse_query_string
+from restiro.tests.helpers import package_dir, temp_dir, mockup_resources
 
 examples_dir = join(package_dir, 'examples')
 
@@ -97,3 +101,304 @@ def test_webtest_middleware():
 
     test_app2 = TestApp(unicode_app)
     test_app2.post('/user?a=یک')
+
+
+def test_webtest_options_policy():
+    from restiro.middlewares.webtest import TestApp, route_key
+
+    def count_options(directory):
+        docs_root = DocumentationRoot(title='Hello World')
+        docs_root.resources.extend(mockup_resources())
+        docs_root.load_resource_examples(directory)
+        return sum(
+            len(resource.examples)
+            for _, resource in docs_root.resources.items()
+            if resource.method == 'options'
+        )
+
+    assert route_key('/user/12/image/') == '/user/:/image'
+    assert route_key(
+        '/user/4b5a4c9e-1cf4-4c36-9bd6-0b1f7e0a6e27'
+    ) == '/user/:'
+
+    # Once per route template
+    once_dir = join(temp_dir, 'options_once')
+    makedirs(once_dir, exist_ok=True)
+    test_app = TestApp(app=debug_app, examples_dir=once_dir,
+                       options_policy='once')
+    test_app.get('/user/1')
+    test_app.get('/user/2')
+    test_app.get('/user/1/image')
+    assert count_options(once_dir) == 2
+
+    # Resolve route templates by documentation root
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    test_app = TestApp(app=debug_app, examples_dir=once_dir,
+                       options_policy='once', docs_root=docs_root)
+    test_app.get('/user/me/image')
+    test_app.get('/user/you/image')
+    assert test_app.captured_options == {'/user/:user_id/image'}
+
+    # Never
+    never_dir = join(temp_dir, 'options_never')
+    makedirs(never_dir, exist_ok=True)
+    test_app = TestApp(app=debug_app, examples_dir=never_dir,
+                       options_policy='never')
+    test_app.get('/user/1')
+    test_app.get('/user')
+    assert count_options(never_dir) == 0
+
+    with pytest.raises(ValueError):
+        TestApp(app=debug_app, options_policy='sometimes')
+
+
+def test_wsgi_recorder():
+    from webtest import TestApp as WebtestApp
+    from restiro.middlewares.wsgi import RecorderMiddleware
+
+    examples_dir = join(temp_dir, 'wsgi_recorder')
+    makedirs(examples_dir, exist_ok=True)
+    recorder = RecorderMiddleware(
+        debug_app,
+        rates={'GET /user/:user_id': 1.0, 'POST /user': 1.0},
+        examples_dir=examples_dir
+    )
+    app = WebtestApp(recorder)
+
+    # Not sampled
+    app.get('/user')
+    app.get('/photo')
+
+    # Sampled
+    app.get('/user/12?a=b')
+    app.post('/user', {'full_name': 'Meyti'})
+    app.post('/user?status=400+Bad+name', {'full_name': 'Meyti2'},
+             status=400)
+    recorder.flush()
+
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    docs_root.load_resource_examples(examples_dir)
+    assert len(docs_root.resources.find('/user', 'get').examples) == 0
+
+    example = docs_root.resources.find('/user/12', 'get').examples[0]
+    assert example.request.query_strings == {'a': 'b'}
+    assert example.response.status == 200
+    assert 'PATH_INFO: /user/12' in example.response.body
+
+    examples = docs_root.resources.find('/user', 'post').examples
+    assert examples[0].request.form_params == {'full_name': 'Meyti'}
+    assert examples[0].request.body == 'full_name=Meyti'
+    assert 'full_name=Meyti' in examples[0].response.body
+    assert examples[1].response.status == 400
+    assert examples[1].response.reason == 'Bad name'
+
+    # Default rate
+    recorder = RecorderMiddleware(debug_app, default_rate=1.0,
+                                  examples_dir=examples_dir)
+    WebtestApp(recorder).get('/photo')
+    recorder.flush()
+    docs_root.load_resource_examples(examples_dir)
+    assert len(docs_root.resources.find('/photo', 'get').examples) == 2
+
+    # Dropped while the queue is full, instead of blocking the request
+    from threading import Event
+    from restiro.sinks import MemorySink
+
+    class BlockedSink(MemorySink):
+        released = Event()
+
+        def write_many(self, items):
+            self.released.wait()
+            super().write_many(items)
+
+    sink = BlockedSink()
+    recorder = RecorderMiddleware(debug_app, default_rate=1.0, sink=sink)
+    recorder.sink.max_size = 2
+    app = WebtestApp(recorder)
+    for _ in range(5):
+        app.get('/photo')
+    assert recorder.dropped_count >= 2
+    sink.released.set()
+    recorder.flush()
+    assert len(sink.items) + recorder.dropped_count == 5
+
+    # Bodies are stored by the writer thread
+    from threading import current_thread
+    from restiro.bodies import BodyStore, get_bodies_dir
+
+    class ThreadBodyStore(BodyStore):
+        threads = set()
+
+        def store(self, data):
+            self.threads.add(current_thread().name)
+            return super().store(data)
+
+    body_store = ThreadBodyStore(get_bodies_dir(examples_dir))
+    sink = MemorySink()
+    recorder = RecorderMiddleware(debug_app, default_rate=1.0, sink=sink,
+                                  body_store=body_store)
+    WebtestApp(recorder).get('/photo')
+    recorder.flush()
+    assert len(sink.items) == 1
+    assert body_store.threads == {'restiro-writer'}
+
+
+async def echo_asgi_app(scope, receive, send):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    status = int(parse_query_string(
+        scope['query_string'].decode()
+    ).get('status', 200))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain')]
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': b'%s %s\n' % (scope['method'].encode(), scope['path'].encode()),
+        'more_body': True
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def test_asgi_test_client():
+    from restiro.middlewares.asgi import TestClient, AppError
+
+    examples_dir = join(temp_dir, 'asgi_client')
+    makedirs(examples_dir, exist_ok=True)
+    client = TestClient(echo_asgi_app, examples_dir=examples_dir,
+                        options_policy='once')
+
+    async def scenario():
+        response = await client.get('/user')
+        assert response.status_int == 200
+        assert response.text == 'GET /user\n'
+
+        client.doc = True
+        await client.get('/user/12', params={'a': 'b'})
+
+        client.doc = True
+        response = await client.post('/user', json={'full_name': 'Meyti'})
+        assert 'Meyti' in response.text
+
+        client.doc = True
+        await client.post('/user', form={'full_name': 'Meyti2'},
+                          params={'status': 400}, status=400)
+
+        try:
+            await client.get('/user', params={'status': 404})
+        except AppError:
+            pass
+        else:  # pragma: nocover
+            assert False
+
+    asyncio.run(scenario())
+    client.flush()
+
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    docs_root.load_resource_examples(examples_dir)
+
+    examples = docs_root.resources.find('/user', 'get').examples
+    assert len(examples) == 2
+    assert not examples[0].visible
+    assert examples[1].response.status == 404
+    assert examples[1].response.reason == 'Not Found'
+
+    example = docs_root.resources.find('/user/12', 'get').examples[0]
+    assert example.visible
+    assert example.request.query_strings == {'a': 'b'}
+    assert example.response.body == 'GET /user/12\n'
+
+    examples = docs_root.resources.find('/user', 'post').examples
+    assert examples[0].request.headers['content-type'] == 'application/json'
+    assert 'Meyti' in examples[0].response.body
+    assert examples[1].request.form_params == {'full_name': 'Meyti2'}
+    assert examples[1].response.status == 400
+    assert examples[1].response.reason == 'Bad Request'
+
+    # Once per route template
+    assert len(docs_root.resources.find('/user', 'options').examples) == 1
+    assert len(docs_root.resources.find('/user/1', 'options').examples) == 1
+
+    # Failed requests raise before capturing OPTIONS, like webtest
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    client = TestClient(echo_asgi_app, sink=docs_root)
+
+    async def failed_request():
+        with pytest.raises(AppError):
+            await client.get('/user', params={'status': 404})
+
+    asyncio.run(failed_request())
+    client.flush()
+    assert len(docs_root.resources.find('/user', 'get').examples) == 1
+    assert len(docs_root.resources.find('/user', 'options').examples) == 0
+
+
+def test_asgi_recorder():
+    from restiro.middlewares.asgi import RecorderMiddleware
+    from restiro.sinks import ExampleSink
+
+    class ListSink(ExampleSink):
+        def __init__(self):
+            self.examples = []
+
+        def write(self, index, example):
+            self.examples.append((index, example))
+
+    sink = ListSink()
+    recorder = RecorderMiddleware(echo_asgi_app, sink=sink, visible=True)
+    sent = []
+
+    async def scenario():
+        chunks = [
+            {'type': 'http.request', 'body': b'a=', 'more_body': True},
+            {'type': 'http.request', 'body': b'b'}
+        ]
+
+        async def receive():
+            return chunks.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await recorder({
+            'type': 'http',
+            'method': 'PUT',
+            'path': '/user/1',
+            'query_string': b'',
+            'headers': [
+                (b'content-type', b'application/x-www-form-urlencoded')
+            ]
+        }, receive, send)
+
+        # Not HTTP
+        async def lifespan_app(scope, receive, send):
+            sent.append(scope['type'])
+
+        await RecorderMiddleware(lifespan_app, sink=sink)(
+            {'type': 'lifespan'}, receive, send
+        )
+
+    asyncio.run(scenario())
+    recorder.flush()
+
+    assert sent[-1] == 'lifespan'
+    assert len(sink.examples) == 1
+    index, example = sink.examples[0]
+    assert index == 1
+    assert example.visible
+    assert example.request.method == 'put'
+    assert example.request.body == 'a=b'
+    assert example.request.form_params == {'a': 'b'}
+    assert example.response.body == 'PUT /user/1\na=b'
+    assert example.response.headers == {'content-type': 'text/plain'}
@@ -0,0 +1,96 @@
+import json
+import time
+
+from os.path import join
+
+from webtest import TestApp
+
+from restiro import DocumentationRoot, Resource, ResourceExample, \
+    ExampleRequest, ExampleResponse
+from restiro.mock_server import MockServer
+from restiro.mock_reload import Reloader
+from restiro.tests.helpers import temp_dir
+
+
+def create_docs_root(name):
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.append(Resource(
+        path='/user',
+        method='get',
+        examples=[ResourceExample(
+            request=ExampleRequest(method='get', path='/user'),
+            response=ExampleResponse(
+                status=200,
+                reason='OK',
+                headers={'Content-Type': 'application/json'},
+                body=json.dumps({'name': name})
+            )
+        )]
+    ))
+    return docs_root
+
+
+def test_mock_server_load():
+    mock_server = MockServer(create_docs_root('John'))
+    app = TestApp(app=mock_server)
+    assert app.get('/user').json['name'] == 'John'
+
+    # In-flight request is finished by the previous snapshot
+    index, position = mock_server.locate('get', '/user', {}, {}, None)
+    mock_server.load(create_docs_root('Ella'))
+    assert index.examples[position].response.body == '{"name": "John"}'
+    assert app.get('/user').json['name'] == 'Ella'
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(.01)
+
+
+def test_reloader():
+    filename = join(temp_dir, 'names.txt')
+    with open(filename, 'w') as f:
+        f.write('John')
+
+    def load():
+        with open(filename) as f:
+            name = f.read()
+        if not name:
+            raise ValueError('Empty file')
+        return create_docs_root(name)
+
+    reloaded = []
+    mock_server = MockServer(load())
+    app = TestApp(app=mock_server)
+    reloader = Reloader(
+        mock_server,
+        load,
+        filename=filename,
+        interval=.01,
+        on_reload=lambda: reloaded.append(True)
+    )
+    reloader.start()
+    try:
+        # File changed
+        with open(filename, 'w') as f:
+            f.write('Ella Smith')
+        wait_for(lambda: reloader.reloads == 1)
+        assert app.get('/user').json['name'] == 'Ella Smith'
+        assert reloaded == [True]
+
+        # Broken file keeps the previous one
+        with open(filename, 'w') as f:
+            f.write('')
+        wait_for(lambda: reloader.signature[1] == 0)
+        assert app.get('/user').json['name'] == 'Ella Smith'
+
+        # On request, e.g: SIGHUP
+        with open(filename, 'w') as f:
+            f.write('Bella')
+        reloader.request_reload()
+        wait_for(lambda: reloader.reloads == 2)
+        assert app.get('/user').json['name'] == 'Bella'
+    finally:
+        reloader.stop()
@@ -239,3 +239,278 @@ def test_mock_server():
 
     resp = app.options('/user', status=404)
     assert resp.status == '404 Example Not Found'
+
+
+def test_mock_server_etag():
+    from webtest import TestApp
+
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    app = TestApp(app=MockServer(docs_root))
+
+    resp = app.get('/user')
+    etag = resp.headers['ETag']
+    assert etag.startswith('"') and etag.endswith('"')
+    assert resp.headers['Content-Length'] == str(len(resp.body))
+
+    # Same body, same tag
+    assert app.get('/user').headers['ETag'] == etag
+    assert app.get('/user/12').headers['ETag'] != etag
+
+    # Conditional requests, which are not criteria of matching
+    resp = app.get('/user', headers={'If-None-Match': etag}, status=304)
+    assert resp.body == b''
+    assert resp.headers['ETag'] == etag
+    assert 'Content-Type' not in resp.headers
+
+    for if_none_match in ('"other", W/%s' % etag, '*'):
+        app.get('/user', headers={'If-None-Match': if_none_match}, status=304)
+
+    resp = app.get('/user', headers={'If-None-Match': '"other"'})
+    assert resp.json['name'] == 'John Doe'
+
+    # Only safe methods
+    resp = app.post_json(
+        '/user',
+        params={'name': 'Ella', 'age': 16},
+        headers={'If-None-Match': '*'}
+    )
+    assert resp.json['name'] == 'Ella'
+
+    # No content
+    resp = app.delete('/user/10', status=204)
+    assert 'ETag' in resp.headers
+    assert resp.body == b''
+
+
+def reference_score(examples, request):
+    """ Scoring of examples, one by one """
+    scores = []
+    for example in examples:
+        r = example.request
+        if not all((r.path == request.path, r.method == request.method)):
+            continue
+
+        expressions = (
+            r.query_strings.keys() == request.query_strings.keys(),
+            r.query_strings == request.query_strings,
+            (
+                (r.form_params and request.form_params) and
+                r.form_params.keys() == request.form_params.keys()
+            ),
+            r.form_params == request.form_params,
+            (
+                (
+                    hasattr(r.formatted_body, 'keys') and
+                    hasattr(request.formatted_body, 'keys')
+                ) and
+                r.formatted_body.keys() == request.formatted_body.keys()
+            ),
+            r.formatted_body == request.formatted_body,
+            r.headers == request.headers,
+        )
+        valid_expr = list(filter(lambda x: x is True, expressions))
+        scores.append((len(valid_expr), example))
+
+    if scores:
+        return list(reversed(sorted(scores, key=lambda x: x[0])))[0][1]
+
+
+def test_mock_server_exact_index():
+    from restiro import (
+        Resource,
+        ResourceExample,
+        ExampleRequest,
+        ExampleResponse
+    )
+    from restiro.mock_server import ResourceIndex, request_fingerprint
+
+    def create_example(name, query=None, body=None, headers=None):
+        return ResourceExample(
+            request=ExampleRequest(
+                method='post',
+                path='/user',
+                query_strings=query,
+                headers=headers,
+                body=json.dumps(body) if body is not None else None
+            ),
+            response=ExampleResponse(
+                status=200,
+                reason='OK',
+                headers={'content-type': 'application/json'},
+                body=json.dumps({'name': name})
+            )
+        )
+
+    json_headers = {'Content-Type': 'application/json'}
+    examples = [
+        create_example('a', query={'sort': 'name'}),
+        create_example('b', query={'sort': 'name'}),
+        create_example('c', body={'name': 'c', 'age': 1},
+                       headers=json_headers),
+        create_example('d', body={'age': 1, 'name': 'c'},
+                       headers=json_headers),
+        create_example('e', query={'sort': 'age', 'page': ['1', '2']}),
+    ]
+    index = ResourceIndex(examples)
+    assert len(index.exact) == 3
+
+    requests = [
+        ExampleRequest('/user', 'post', query_strings={'sort': 'name'}),
+        ExampleRequest('/user', 'post', query_strings={'sort': 'other'}),
+        ExampleRequest('/user', 'post', headers=json_headers,
+                       body=json.dumps({'name': 'c', 'age': 1})),
+        ExampleRequest('/user', 'post', headers=json_headers,
+                       body=json.dumps({'name': 'x', 'age': 2})),
+        ExampleRequest('/user', 'post',
+                       query_strings={'page': ['1', '2'], 'sort': 'age'}),
+        ExampleRequest('/user', 'post'),
+    ]
+    for request in requests:
+        assert index.find(request) is reference_score(examples, request)
+        assert index.score(request) is reference_score(examples, request)
+
+    # Ties go to the last example, as scoring does
+    assert index.find(requests[0]) is examples[1]
+    assert index.find(requests[2]) is examples[3]
+    assert index.find(requests[4]) is examples[4]
+    assert request_fingerprint(requests[4]) in index.exact
+    assert request_fingerprint(requests[1]) not in index.exact
+
+    # No example of requested path
+    assert index.find(ExampleRequest('/user/1', 'post')) is None
+
+    # Through the server
+    from webtest import TestApp
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.append(Resource(
+        path='/user',
+        method='post',
+        examples=examples
+    ))
+    mock_server = MockServer(docs_root)
+    assert len(mock_server.indexes) == 1
+    resp = TestApp(app=mock_server).post('/user?sort=name')
+    assert resp.json['name'] == 'b'
+
+
+def test_mock_server_bitset_scoring():
+    import random
+    from restiro import ResourceExample, ExampleRequest, ExampleResponse
+    from restiro.mock_server import ResourceIndex
+
+    rand = random.Random(7)
+    json_headers = {'Content-Type': 'application/json'}
+
+    def create_request():
+        body = rand.choice((
+            None,
+            {'name': rand.choice('ab')},
+            {'name': rand.choice('ab'), 'age': rand.choice((1, 2))},
+            [1, 2],
+        ))
+        return ExampleRequest(
+            path=rand.choice(('/user', '/user/')),
+            method=rand.choice(('get', 'post')),
+            query_strings=rand.choice((
+                None,
+                {'sort': rand.choice('ab')},
+                {'sort': rand.choice('ab'), 'page': rand.choice('12')}
+            )),
+            form_params=rand.choice((
+                None,
+                {},
+                {'full_name': rand.choice('ab')},
+                {'full_name': 'a', 'avatar': rand.choice('ab')}
+            )),
+            headers=rand.choice((
+                None,
+                {'x-token': rand.choice('ab')}
+            )) if body is None else json_headers,
+            body=json.dumps(body) if body is not None else None
+        )
+
+    examples = [
+        ResourceExample(
+            request=create_request(),
+            response=ExampleResponse(status=200, headers={}, body='')
+        )
+        for _ in range(200)
+    ]
+    index = ResourceIndex(examples)
+    for _ in range(500):
+        request = create_request()
+        assert index.find(request) is reference_score(examples, request)
+
+
+def test_asgi_mock_server():
+    import asyncio
+    from restiro.mock_asgi import ASGIMockServer
+
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.resources.extend(mockup_resources())
+    mock_server = ASGIMockServer(docs_root)
+
+    async def request(method, path, query_string=b'', body=b''):
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message)
+
+        await mock_server({
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'localhost:80')]
+        }, receive, send)
+        body = b''.join(m.get('body', b'') for m in sent[1:])
+        assert not sent[-1].get('more_body')
+        return sent[0]['status'], dict(sent[0]['headers']), body
+
+    async def lifespan():
+        messages = [
+            {'type': 'lifespan.shutdown'},
+            {'type': 'lifespan.startup'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message['type'])
+
+        await mock_server({'type': 'lifespan'}, receive, send)
+        return sent
+
+    async def scenario():
+        status, headers, body = await request('GET', '/user')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert json.loads(body)['name'] == 'John Doe'
+
+        status, _, body = await request('GET', '/photo', b'sort=url')
+        assert json.loads(body) == ['photo A', 'photo B']
+
+        status, _, body = await request(
+            'POST', '/user', body=json.dumps({'name': 'Bella'}).encode()
+        )
+        assert json.loads(body)['name'] == 'Ella'
+
+        status, _, _ = await request('GET', '/photo')
+        assert status == 401
+
+        status, _, _ = await request('OPTIONS', '/user')
+        assert status == 404
+
+        assert await lifespan() == [
+            'lifespan.startup.complete',
+            'lifespan.shutdown.complete'
+        ]
+
+    asyncio.run(scenario())
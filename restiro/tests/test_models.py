@@ -84,7 +84,7 @@ def test_model():
     )
 
     assert user_resource_get.__filename__ == 'user-me-get'
-    assert len(user_resource_get.to_dict().keys()) == 12
+    assert len(user_resource_get.to_dict().keys()) == 14
     assert user_resource_get.__repr__() == 'GET /user/me'
 
     # Append resources
@@ -281,8 +281,8 @@ def test_resource_example():
 
     _ = resource_example.response.body_json
 
-    assert len(resource_example.response.to_dict().keys()) == 5
-    assert len(resource_example.to_dict().keys()) == 3
+    assert len(resource_example.response.to_dict().keys()) == 6
+    assert len(resource_example.to_dict().keys()) == 4
 
     # Check body format recognize
     response_example = ExampleResponse(
@@ -304,3 +304,127 @@ authorization: Bearer <token>'''
     example_dict = resource_example.to_dict()
     new_example = resource_example.create_from_dict(example_dict)
     assert example_dict == new_example.to_dict()
+
+
+def test_load_resource_examples():
+    from os import makedirs
+    from os.path import join
+    from restiro.sinks import DirectorySink
+    from restiro.tests.helpers import temp_dir, mockup_resources
+
+    examples_dir = join(temp_dir, 'load_examples')
+    makedirs(examples_dir, exist_ok=True)
+    sink = DirectorySink(examples_dir)
+    paths = ['/user/%s' % (index % 3) for index in range(30)]
+    paths.append('/not/found')
+    for index, path in enumerate(paths, start=1):
+        sink.write(index, ResourceExample(
+            request=ExampleRequest(method='get', path=path),
+            response=ExampleResponse(status=200, headers={}, body=str(index))
+        ))
+
+    for kwargs in ({}, {'workers': 1}, {'processes': True, 'workers': 2}):
+        docs_root = DocumentationRoot(title='My App')
+        docs_root.resources.extend(mockup_resources())
+        docs_root.load_resource_examples(examples_dir, **kwargs)
+        resource = docs_root.resources.find('/user/1', 'get')
+        assert [e.response.body for e in resource.examples] == [
+            str(index) for index in range(1, 31)
+        ]
+
+
+def test_load_resource_examples_manifest():
+    from os import makedirs, remove
+    from os.path import join
+    from restiro.manifest import manifest_filename, read_manifest
+    from restiro.sinks import DirectorySink
+    from restiro.tests.helpers import temp_dir, mockup_resources
+
+    examples_dir = join(temp_dir, 'manifest_examples')
+    makedirs(examples_dir, exist_ok=True)
+    sink = DirectorySink(examples_dir)
+    for index in range(1, 11):
+        sink.write(index, ResourceExample(
+            request=ExampleRequest(method='get', path='/user/%s' % index),
+            response=ExampleResponse(
+                status=200 if index % 2 else 404,
+                headers={},
+                body=str(index)
+            ),
+            visible=index > 5
+        ))
+    sink.write(11, ResourceExample(
+        request=ExampleRequest(method='get', path='/not/found'),
+        response=ExampleResponse(status=200, headers={}, body='11')
+    ))
+
+    def load(where=None):
+        docs_root = DocumentationRoot(title='My App')
+        docs_root.resources.extend(mockup_resources())
+        docs_root.load_resource_examples(examples_dir, where=where)
+        return [
+            e.response.body
+            for e in docs_root.resources.find('/user/1', 'get').examples
+        ]
+
+    # Only selected examples are decoded
+    filename = join(examples_dir, read_manifest(examples_dir)[2].file)
+    with open(filename) as f:
+        content = f.read()
+    with open(filename, 'w') as f:
+        f.write('{')
+
+    def where(entry):
+        return entry.visible and entry.status == 200
+
+    assert load(where) == ['7', '9']
+    with open(filename, 'w') as f:
+        f.write(content)
+
+    # Unlisted files, e.g: written before the manifest, are decoded
+    entry = sink.write_file(10, ResourceExample(
+        request=ExampleRequest(method='get', path='/user/10'),
+        response=ExampleResponse(status=200, headers={}, body='10.5'),
+        visible=True
+    ))
+    assert load(where) == ['7', '9', '10.5']
+    assert load() == [str(index) for index in range(1, 11)] + ['10.5']
+
+    # Without manifest
+    remove(join(examples_dir, entry.file))
+    assert load() == [str(index) for index in range(1, 11)]
+    remove(join(examples_dir, manifest_filename))
+    assert load(where) == ['7', '9']
+    assert load() == [str(index) for index in range(1, 11)]
+
+
+def test_resource_resolver():
+    from restiro.manifest import ManifestEntry
+    from restiro.models import ResourceResolver
+    from restiro.tests.helpers import mockup_resources
+
+    docs_root = DocumentationRoot(title='My App')
+    docs_root.resources.extend(mockup_resources())
+    resolve = ResourceResolver(docs_root)
+    resource = resolve('get', '/user/1')
+    assert resource is docs_root.resources.find('/user/1', 'get')
+    assert resolve('get', '/user/1') is resource
+    assert resolve('get', '/not/found') is None
+
+    resolve = ResourceResolver(
+        docs_root,
+        accept=lambda r: r is not resource
+    )
+    assert resolve('get', '/user/1') is None
+
+    example = ResourceExample(
+        request=ExampleRequest(method='get', path='/user/1'),
+        response=ExampleResponse(status=200, headers={}, body='')
+    )
+    entry = ManifestEntry.create_from_example_file(
+        '/tmp/examples/12-abc.json.gz',
+        example.to_dict()
+    )
+    assert entry.seq == 12
+    assert entry.file == '12-abc.json.gz'
+    assert entry.path == '/user/1'
@@ -0,0 +1,106 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from http.client import HTTPConnection
+
+server_script = '''
+import os
+import signal
+import sys
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+from restiro.prefork import PreforkServer
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+
+httpd = make_server('127.0.0.1', 0, app, handler_class=QuietHandler)
+print(httpd.server_port, flush=True)
+prefork = PreforkServer(httpd, workers=int(sys.argv[1]))
+signal.signal(signal.SIGHUP, prefork.roll)
+prefork.serve_forever()
+'''
+
+
+def get_pid(port):
+    connection = HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request('GET', '/')
+    response = connection.getresponse()
+    assert response.status == 200
+    pid = int(response.read())
+    connection.close()
+    return pid
+
+
+def test_prefork_server():
+    process = subprocess.Popen(
+        [sys.executable, '-c', server_script, '2'],
+        stdout=subprocess.PIPE,
+        env=dict(os.environ, PYTHONPATH=os.getcwd())
+    )
+    try:
+        port = int(process.stdout.readline())
+
+        pids = {get_pid(port) for _ in range(20)}
+        assert process.pid not in pids
+
+        # Crashed workers are restarted
+        for pid in pids:
+            os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while get_pid(port) in pids:
+            assert time.monotonic() < deadline
+
+        # Rolling workers, without failing requests
+        pids = {get_pid(port) for _ in range(20)}
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 10
+        while get_pid(port) in pids:
+            assert time.monotonic() < deadline
+
+        # Old workers stop accepting at once
+        for _ in range(20):
+            assert get_pid(port) not in pids
+
+        # Graceful shutdown
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:  # pragma: nocover
+            process.kill()
+        process.stdout.close()
+
+
+def test_prefork_orphaned_workers():
+    process = subprocess.Popen(
+        [sys.executable, '-c', server_script, '2'],
+        stdout=subprocess.PIPE,
+        env=dict(os.environ, PYTHONPATH=os.getcwd())
+    )
+    try:
+        port = int(process.stdout.readline())
+        get_pid(port)
+    finally:
+        process.kill()
+        process.wait()
+        process.stdout.close()
+
+    # Workers exit without their supervisor
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            get_pid(port)
+        except ConnectionRefusedError:
+            break
+        assert time.monotonic() < deadline
+        time.sleep(.1)
@@ -0,0 +1,103 @@
+import json
+
+from os import makedirs
+from os.path import join
+
+from webtest.debugapp import debug_app
+
+from restiro import ResourceExample, ExampleRequest, ExampleResponse
+from restiro.retention import RetentionPolicy, fingerprint, body_shape
+from restiro.helpers import list_example_files
+from restiro.tests.helpers import temp_dir
+
+
+def create_example(status=200, query=None, body=None, visible=False):
+    return ResourceExample(
+        request=ExampleRequest(
+            method='get',
+            path='/user',
+            query_strings=query
+        ),
+        response=ExampleResponse(
+            status=status,
+            headers={'Content-Type': 'application/json'},
+            body=json.dumps(body)
+        ),
+        visible=visible
+    )
+
+
+def test_fingerprint():
+    assert body_shape(None) is None
+    assert body_shape('') == 'empty'
+    assert body_shape('Hello') == 'text'
+
+    a = create_example(body={'id': 1, 'tags': ['a', 'b']})
+    b = create_example(body={'tags': ['c'], 'id': 2})
+    c = create_example(body={'id': 1, 'tags': [1]})
+    d = create_example(body={'id': 1}, query={'page': '1'})
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(c)
+    assert fingerprint(a) != fingerprint(d)
+    assert fingerprint(a) != fingerprint(create_example(status=404))
+
+
+def test_retention_select():
+    examples = [create_example(body={'id': index}) for index in range(10)]
+    examples.append(create_example(status=404, body={'message': 'No'}))
+    examples.append(create_example(body={'id': 1}, visible=True))
+    examples.append(create_example(body={'id': 1}, query={'page': '1'}))
+
+    retained = RetentionPolicy(max_examples=3).select(examples)
+    assert retained == [examples[0], examples[10], examples[11]]
+
+    retained = RetentionPolicy(max_examples=10).select(examples)
+    assert retained == [examples[0], examples[10], examples[11], examples[12]]
+
+    retained = RetentionPolicy(
+        max_examples=5,
+        max_per_fingerprint=2
+    ).select(examples)
+    assert retained == [
+        examples[0], examples[1], examples[10], examples[11], examples[12]
+    ]
+
+
+def test_retention_admit():
+    examples = [
+        create_example(body={'id': 1}),
+        create_example(status=404, body={'message': 'No'}),
+        create_example(body={'id': 2}, visible=True),
+        create_example(body={'id': 3}, query={'page': '1'}),
+    ]
+    policy = RetentionPolicy(max_examples=2)
+    assert [policy.admit('GET /user', e) for e in examples] == [
+        True, True, True, False
+    ]
+    assert examples[2] in policy.select(examples)
+
+
+def test_retention_record():
+    from restiro.middlewares.webtest import TestApp
+
+    examples_dir = join(temp_dir, 'retention')
+    makedirs(examples_dir, exist_ok=True)
+    test_app = TestApp(
+        app=debug_app,
+        examples_dir=examples_dir,
+        options_policy='never',
+        retention=RetentionPolicy(max_examples=2)
+    )
+    for index in range(5):
+        test_app.get('/user/%s' % index)
+
+    test_app.get('/user/1', status=404, expect_errors=True, params={
+        'status': '404 Not Found'
+    })
+    assert len(list_example_files(examples_dir)) == 2
+
+    # Visible examples are recorded beyond the maximum
+    test_app.doc = True
+    test_app.get('/user/1')
+    test_app.get('/photo')
+    assert len(list_example_files(examples_dir)) == 4
@@ -0,0 +1,203 @@
+import os
+import signal
+
+import pytest
+
+from os import makedirs
+from os.path import join, basename, exists
+
+from webtest.debugapp import debug_app
+
+from restiro import ResourceExample, ExampleRequest, ExampleResponse
+from restiro.sinks import (
+    ExampleSink,
+    DirectorySink,
+    BackgroundSink,
+    MemorySink,
+    DocumentationSink,
+    create_sink
+)
+from restiro.helpers import list_example_files
+from restiro.manifest import read_manifest
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+def create_example(path='/user'):
+    return ResourceExample(
+        request=ExampleRequest(method='get', path=path),
+        response=ExampleResponse(status=200, headers={}, body='')
+    )
+
+
+class CollectorSink(ExampleSink):
+
+    def __init__(self):
+        self.batches = []
+
+    def write_many(self, items):
+        self.batches.append(list(items))
+
+
+class BrokenSink(ExampleSink):
+
+    def write(self, index, example):
+        raise IOError('Disk is full')
+
+
+def test_directory_sink():
+    examples_dir = join(temp_dir, 'directory_sink')
+    makedirs(examples_dir, exist_ok=True)
+
+    sink = DirectorySink(examples_dir)
+    sink.write(1, create_example())
+    sink.write_many([(2, create_example()), (3, create_example())])
+
+    filenames = list_example_files(examples_dir)
+    assert len(filenames) == 3
+    assert basename(filenames[0]).startswith('1-')
+    assert ResourceExample.load(filenames[0]).request.path == '/user'
+
+    # Manifest
+    entries = read_manifest(examples_dir)
+    assert [entry.seq for entry in entries] == [1, 2, 3]
+    assert entries[0].file == basename(filenames[0])
+    assert entries[0].method == 'get'
+    assert entries[0].path == '/user'
+    assert entries[0].status == 200
+    assert entries[0].visible is False
+    assert entries[0].offset == 0
+    assert entries[0].hash == create_example().content_hash
+
+    # Written files of a failed batch are listed
+    def items():
+        yield 4, create_example()
+        raise IOError('Disk is full')
+
+    with pytest.raises(IOError):
+        sink.write_many(items())
+    assert [entry.seq for entry in read_manifest(examples_dir)] == \
+        [1, 2, 3, 4]
+
+
+def test_background_sink():
+    collector = CollectorSink()
+    sink = BackgroundSink(collector, max_size=4, batch_size=3)
+    for index in range(10):
+        sink.write(index, create_example())
+
+    sink.flush()
+    written = [index for batch in collector.batches for index, _ in batch]
+    assert written == list(range(10))
+    assert max(len(batch) for batch in collector.batches) <= 3
+
+    sink.close()
+    sink.close()
+
+    # Writer errors raised on flush
+    sink = BackgroundSink(BrokenSink())
+    sink.write(1, create_example())
+    with pytest.raises(IOError):
+        sink.flush()
+    sink.close()
+
+
+def test_background_sink_fork():
+    collector = CollectorSink()
+    sink = BackgroundSink(collector, max_size=2)
+    sink.write(1, create_example())
+    sink.flush()
+
+    # Forked processes write by their own thread
+    pid = os.fork()
+    if pid == 0:  # pragma: nocover
+        try:
+            signal.alarm(10)
+            for index in range(5):
+                sink.write(index, create_example())
+            sink.flush()
+            os._exit(0 if len(collector.batches) > 1 else 1)
+        finally:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+    sink.close()
+
+
+def test_webtest_background():
+    from restiro.middlewares.webtest import TestApp
+
+    examples_dir = join(temp_dir, 'background_sink')
+    makedirs(examples_dir, exist_ok=True)
+
+    test_app = TestApp(app=debug_app, examples_dir=examples_dir,
+                       background=True)
+    test_app.get('/user')
+    test_app.get('/user/1')
+    test_app.flush()
+    assert len(list_example_files(examples_dir)) == 4
+
+
+def test_memory_sinks():
+    from restiro.middlewares.webtest import TestApp
+
+    sink = MemorySink()
+    test_app = TestApp(app=debug_app, sink=sink, options_policy='never')
+    test_app.get('/user')
+    test_app.get('/photo')
+    assert [e.request.path for e in sink.examples] == ['/user', '/photo']
+    assert [index for index, _ in sink.items] == [1, 2]
+
+    # Fill documentation root
+    docs_root = mockup_doc_root()
+    assert isinstance(create_sink(docs_root), DocumentationSink)
+    assert isinstance(create_sink(examples_dir=temp_dir), DirectorySink)
+    assert create_sink(sink) is sink
+
+    photo_examples = len(docs_root.resources.find('/photo', 'get').examples)
+    test_app = TestApp(app=debug_app, sink=docs_root, background=True)
+    test_app.doc = True
+    test_app.get('/user/12')
+    test_app.get('/photo')
+    test_app.get('/not/found')
+    test_app.flush()
+
+    example, = docs_root.resources.find('/user/1', 'get').examples
+    assert example.visible
+    assert 'PATH_INFO: /user/12' in example.response.body
+    assert len(docs_root.resources.find('/photo', 'get').examples) == \
+        photo_examples + 1
+    assert len(docs_root.resources.find('/user/1', 'options').examples) == 1
+    assert test_app.sink.sink.dropped_count == 2
+
+
+def test_pytest_session_build():
+    from restiro.middlewares.webtest import TestApp
+    from restiro.pytest_plugin import SessionBuild, pytest_sessionfinish
+
+    class Config:
+        restiro_build = SessionBuild(
+            src='restiro.tests.stuff.online_store',
+            output_dir=join(temp_dir, 'session_build'),
+            generator_type='markdown',
+            title='Online Store'
+        )
+
+    class Session:
+        config = Config
+
+    # Nothing recorded
+    pytest_sessionfinish(Session)
+    assert not exists(Config.restiro_build.output_dir)
+
+    docs_root = Config.restiro_build.get_docs_root()
+    assert Config.restiro_build.get_docs_root() is docs_root
+    test_app = TestApp(app=debug_app, sink=docs_root)
+    test_app.doc = True
+    test_app.get('/product/12')
+
+    pytest_sessionfinish(Session)
+    with open(join(
+        Config.restiro_build.output_dir,
+        'product-:productId-get.md'
+    )) as f:
+        assert 'PATH_INFO: /product/12' in f.read()
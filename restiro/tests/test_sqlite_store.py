@@ -0,0 +1,129 @@
+import json
+
+from os import makedirs
+from os.path import join
+
+from webtest.debugapp import debug_app
+
+from restiro import ResourceExample, ExampleRequest, ExampleResponse
+from restiro.bodies import BodyStore, get_bodies_dir
+from restiro.middlewares.webtest import TestApp
+from restiro.retention import RetentionPolicy
+from restiro.sqlite_store import SQLiteStore
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+def test_sqlite_store():
+    base_dir = join(temp_dir, 'sqlite_store')
+    makedirs(base_dir, exist_ok=True)
+    filename = join(base_dir, 'examples.db')
+    store = SQLiteStore(filename, docs_root=mockup_doc_root())
+
+    # Batched writes of test application
+    test_app = TestApp(app=debug_app, sink=store, background=True,
+                       options_policy='never')
+    test_app.get('/user')
+    test_app.doc = True
+    test_app.get('/user/me')
+    test_app.get('/user/12?status=404+Not+Found', status=404)
+    test_app.doc = True
+    test_app.post('/user', {'full_name': 'Meyti'})
+    test_app.flush()
+    assert store.count() == 4
+
+    # Large bodies
+    body_store = BodyStore(get_bodies_dir(join(base_dir, 'examples')),
+                           threshold=16)
+    body, body_ref = body_store.store(json.dumps(list(range(20))).encode())
+    store.write(5, ResourceExample(
+        request=ExampleRequest(method='get', path='/photo'),
+        response=ExampleResponse(
+            status=200,
+            headers={'Content-Type': 'application/json'},
+            body=body,
+            body_ref=body_ref
+        )
+    ))
+
+    # Queries
+    examples = list(store.query(method='get', route='/user/:user_id',
+                                status=(200, 300), newest_first=True))
+    assert [e.request.path for e in examples] == ['/user/me']
+    assert 'PATH_INFO: /user/me' in examples[0].response.body
+    assert examples[0].visible
+
+    examples = list(store.query(route='/user/:', newest_first=True))
+    assert [e.response.status for e in examples] == [404, 200]
+    assert len(list(store.query(visible=True))) == 2
+    assert len(list(store.query(status=404))) == 1
+    assert len(list(store.query(limit=2))) == 2
+
+    docs_root = mockup_doc_root()
+    resource = docs_root.resources.find('/user', 'post')
+    example, = store.resource_examples(resource)
+    assert example.request.body == 'full_name=Meyti'
+
+    example, = store.query(route='/photo')
+    assert example.response.body_ref.digest == body_ref.digest
+    assert example.response.body_ref.directory == store.bodies_dir
+    assert json.loads(example.response.body_ref.read()) == list(range(20))
+
+    # Load into documentation root
+    docs_root.load_resource_examples(
+        store=store,
+        where=lambda entry: entry.visible or entry.status == 404
+    )
+    assert len(docs_root.resources.find('/user/1', 'get').examples) == 2
+    assert len(docs_root.resources.find('/user', 'post').examples) == 1
+    assert len(docs_root.resources.find('/user', 'get').examples) == 0
+
+    docs_root = mockup_doc_root()
+    docs_root.load_resource_examples(
+        store=store,
+        retention=RetentionPolicy(max_examples=1)
+    )
+    assert len(docs_root.resources.find('/user/1', 'get').examples) == 1
+
+    # Durations of examples dropped at record time
+    store.write_dropped(6, ResourceExample(
+        request=ExampleRequest(method='get', path='/user'),
+        response=ExampleResponse(status=200, headers={}, body=''),
+        duration=0.002
+    ))
+    entry, = store.read_dropped()
+    assert entry.duration == 0.002
+    docs_root = mockup_doc_root()
+    docs_root.load_resource_examples(store=store)
+    assert docs_root.resources.find('/user', 'get').latency['count'] == 2
+
+    # Reopen
+    store.close()
+    assert SQLiteStore(filename).count() == 5
+
+
+def test_sqlite_store_routes():
+    base_dir = join(temp_dir, 'sqlite_store_routes')
+    makedirs(base_dir, exist_ok=True)
+
+    # Documentation root of recorder is bound to the store
+    store = SQLiteStore(join(base_dir, 'bound.db'))
+    test_app = TestApp(app=debug_app, sink=store, options_policy='never',
+                       docs_root=mockup_doc_root())
+    test_app.get('/user/me')
+    assert store.docs_root is test_app.docs_root
+    example, = store.query(route='/user/:user_id')
+    assert example.request.path == '/user/me'
+    store.close()
+
+    # Routes are matched by recorded paths without documentation root
+    store = SQLiteStore(join(base_dir, 'unbound.db'))
+    test_app = TestApp(app=debug_app, sink=store, options_policy='never')
+    test_app.get('/user/me')
+    test_app.get('/user/12')
+    test_app.get('/user')
+    assert len(list(store.query(route='/user/:user_id'))) == 2
+    assert len(list(store.query(method='post', route='/user/:'))) == 0
+
+    resource = mockup_doc_root().resources.find('/user/1', 'get')
+    assert len(list(store.resource_examples(resource))) == 2
+    store.close()
@@ -0,0 +1,80 @@
+from os import makedirs
+from os.path import join
+
+from webtest.debugapp import debug_app
+
+from restiro.stats import PhaseTimer, recording_timer
+from restiro.tests.helpers import temp_dir
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.measure('disabled'):
+        pass
+    assert timer.summary() == {}
+
+    timer.enabled = True
+    for _ in range(3):
+        with timer.measure('phase'):
+            pass
+    timer.add('other', 0.5)
+
+    summary = timer.summary()
+    assert summary['phase']['count'] == 3
+    assert summary['other']['total'] == 0.5
+    assert summary['other']['mean'] == 0.5
+    assert timer.format_summary().splitlines()[1].startswith('other')
+
+    timer.reset()
+    assert timer.summary() == {}
+
+
+def test_recording_timer():
+    from restiro.middlewares.webtest import TestApp
+
+    examples_dir = join(temp_dir, 'recording_timer')
+    makedirs(examples_dir, exist_ok=True)
+    enabled = recording_timer.enabled
+    recording_timer.enabled = True
+    recording_timer.reset()
+    try:
+        test_app = TestApp(app=debug_app, examples_dir=examples_dir)
+        test_app.get('/user')
+        summary = recording_timer.summary()
+    finally:
+        recording_timer.enabled = enabled
+        recording_timer.reset()
+
+    assert summary['application']['count'] == 2
+    assert summary['options']['count'] == 1
+    for phase in ('decode', 'build', 'retention', 'sink', 'uuid',
+                  'serialize', 'write'):
+        assert summary[phase]['count'] >= 2
+
+
+def test_pytest_plugin():
+    from restiro import pytest_plugin
+
+    class Reporter:
+        lines = []
+
+        def write_sep(self, sep, title):
+            self.lines.append(title)
+
+        def write_line(self, line):
+            self.lines.append(line)
+
+    reporter = Reporter()
+    pytest_plugin.pytest_terminal_summary(reporter)
+    assert reporter.lines == []
+
+    enabled = recording_timer.enabled
+    recording_timer.enabled = True
+    recording_timer.add('write', 0.1)
+    try:
+        pytest_plugin.pytest_terminal_summary(reporter)
+    finally:
+        recording_timer.enabled = enabled
+        recording_timer.reset()
+    assert reporter.lines[0] == 'restiro recording overhead'
+    assert 'write' in reporter.lines[1]
@@ -0,0 +1,115 @@
+import json
+
+from os import makedirs, listdir, remove
+from os.path import join, exists
+
+from restiro import ResourceExample, ExampleRequest, ExampleResponse
+from restiro.generators import MarkdownGenerator, JSONGenerator, MockGenerator
+from restiro.helpers import list_example_files
+from restiro.manifest import manifest_filename
+from restiro.retention import RetentionPolicy
+from restiro.sinks import DirectorySink
+from restiro.streaming import StreamingBuild
+from restiro.tests.helpers import temp_dir, mockup_doc_root
+
+
+def record_examples(examples_dir):
+    makedirs(examples_dir, exist_ok=True)
+    sink = DirectorySink(examples_dir)
+    for index in range(1, 21):
+        path = ('/user/%s' % index, '/user', '/photo', '/not/found')[index % 4]
+        sink.write(index, ResourceExample(
+            request=ExampleRequest(method='get', path=path),
+            response=ExampleResponse(
+                status=200,
+                headers={'Content-Type': 'application/json'},
+                body=json.dumps({'index': index})
+            ),
+            visible=index % 3 == 0
+        ))
+
+
+def read_files(directory):
+    result = {}
+    for filename in listdir(directory):
+        with open(join(directory, filename)) as f:
+            result[filename] = f.read()
+    return result
+
+
+def build(generator_class, examples_dir, destination_dir, streaming,
+          **kwargs):
+    docs_root = mockup_doc_root()
+    makedirs(destination_dir, exist_ok=True)
+    generator = generator_class(docs_root, destination_dir)
+    if streaming:
+        with StreamingBuild(docs_root, examples_dir, **kwargs) as build:
+            build.generate(generator)
+            assert exists(build.work_dir)
+        assert not exists(build.work_dir)
+        assert sum(len(r.examples) for _, r in docs_root.resources.items()) == 1
+        return build.example_counts
+
+    docs_root.load_resource_examples(examples_dir, **kwargs)
+    generator.generate()
+
+
+def test_streaming_build():
+    examples_dir = join(temp_dir, 'streaming_examples')
+    record_examples(examples_dir)
+
+    for generator_class in (MarkdownGenerator, JSONGenerator, MockGenerator):
+        name = generator_class.__name__
+        build(generator_class, examples_dir,
+              join(temp_dir, 'memory', name), streaming=False)
+        counts = build(generator_class, examples_dir,
+                       join(temp_dir, 'streaming', name), streaming=True)
+        assert counts['/user/:user_id-get'] == 5
+        assert counts['/photo-get'] == 6
+
+        expected = read_files(join(temp_dir, 'memory', name))
+        result = read_files(join(temp_dir, 'streaming', name))
+        assert expected.keys() == result.keys()
+        for filename in expected:
+            if filename.endswith('.json'):
+                expected_resources = sorted(
+                    json.loads(expected[filename])['resources'],
+                    key=lambda r: r['id']
+                )
+                result_resources = sorted(
+                    json.loads(result[filename])['resources'],
+                    key=lambda r: r['id']
+                )
+                assert expected_resources == result_resources
+            else:
+                assert expected[filename] == result[filename]
+
+    # Pretty-printed example files
+    for filename in list_example_files(examples_dir):
+        with open(filename) as f:
+            data = json.load(f)
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+    counts = build(JSONGenerator, examples_dir, join(temp_dir, 'indented'),
+                   streaming=True)
+    assert counts['/user/:user_id-get'] == 5
+
+    # Filters and retention
+    counts = build(
+        JSONGenerator, examples_dir, join(temp_dir, 'filtered'),
+        streaming=True,
+        where=lambda entry: entry.visible,
+        retention=RetentionPolicy(max_examples=1)
+    )
+    assert counts['/user/:user_id-get'] == 1
+    assert counts['/user-get'] == 1
+
+    # Without manifest
+    remove(join(examples_dir, manifest_filename))
+    counts = build(
+        JSONGenerator, examples_dir, join(temp_dir, 'no_manifest'),
+        streaming=True,
+        where=lambda entry: entry.visible
+    )
+    assert counts['/user/:user_id-get'] == 1
+    assert counts['/photo-get'] == 3
@@ -0,0 +1,151 @@
+import socket
+import time
+
+from http.client import HTTPConnection
+from threading import Thread
+
+from restiro.wsgi_server import make_server, KeepAliveRequestHandler
+
+
+class QuietHandler(KeepAliveRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def app(environ, start_response):
+    path = environ['PATH_INFO']
+    if path == '/error':
+        raise ValueError('Application error')
+
+    if path == '/stream':
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return (chunk for chunk in (b'abc', b'', b'def'))
+
+    if path == '/ignore-body':
+        start_response('200 OK', [])
+        return [b'ignored']
+
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    body = environ['wsgi.input'].read(length)
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'%s %s' % (environ['REQUEST_METHOD'].encode(), body)]
+
+
+def test_keep_alive_server():
+    httpd = make_server(
+        '127.0.0.1', 0, app,
+        threads=2,
+        idle_timeout=0.3,
+        handler_class=QuietHandler
+    )
+    thread = Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    port = httpd.server_port
+
+    try:
+        connection = HTTPConnection('127.0.0.1', port, timeout=10)
+
+        def request(method, path, body=None, headers=None):
+            connection.request(
+                method, path, body, headers or {},
+                encode_chunked=bool(headers)
+            )
+            response = connection.getresponse()
+            return response, response.read()
+
+        response, body = request('POST', '/echo', b'hello')
+        assert response.status == 200
+        assert response.getheader('Content-Length') == '10'
+        assert body == b'POST hello'
+        sock = connection.sock
+        assert sock is not None
+
+        # Streamed response
+        response, body = request('GET', '/stream')
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+        assert body == b'abcdef'
+
+        # Request body which is not read by application
+        response, body = request('PUT', '/ignore-body', b'x' * 1000)
+        assert body == b'ignored'
+
+        # Chunked request body
+        response, body = request(
+            'POST', '/echo', iter([b'abc', b'def']),
+            {'Transfer-Encoding': 'chunked'}
+        )
+        assert body == b'POST abcdef'
+
+        # Head
+        response, body = request('HEAD', '/echo')
+        assert response.getheader('Content-Length') == '5'
+        assert body == b''
+
+        assert connection.sock is sock
+
+        # Application error closes connection
+        response, body = request('GET', '/error')
+        assert response.status == 500
+        assert response.getheader('Connection') == 'close'
+        connection.close()
+
+        # HTTP/1.0 client
+        with socket.create_connection(('127.0.0.1', port), 10) as client:
+            client.sendall(b'GET /stream HTTP/1.0\r\n\r\n')
+            data = b''
+            while True:
+                chunk = client.recv(1024)
+                if not chunk:
+                    break
+                data += chunk
+            assert b'Connection: close' in data
+            assert data.endswith(b'\r\n\r\nabcdef')
+
+        # Idle timeout
+        with socket.create_connection(('127.0.0.1', port), 10) as client:
+            started_at = time.monotonic()
+            assert client.recv(1024) == b''
+            assert time.monotonic() - started_at < 5
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_idle_connections():
+    httpd = make_server(
+        '127.0.0.1', 0, app,
+        threads=2,
+        idle_timeout=3,
+        handler_class=QuietHandler
+    )
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        # Idle persistent connections do not hold threads
+        connections = [
+            HTTPConnection('127.0.0.1', httpd.server_port, timeout=10)
+            for _ in range(5)
+        ]
+        for _ in range(3):
+            for connection in connections:
+                started_at = time.monotonic()
+                connection.request('POST', '/echo', b'hello')
+                response = connection.getresponse()
+                assert response.read() == b'POST hello'
+                assert time.monotonic() - started_at < 1
+        sockets = {connection.sock for connection in connections}
+        assert None not in sockets and len(sockets) == 5
+
+        # Pipelined requests
+        with socket.create_connection(
+            ('127.0.0.1', httpd.server_port), 10
+        ) as client:
+            client.sendall(b'GET /a HTTP/1.1\r\n\r\n' * 2)
+            data = b''
+            while data.count(b'GET ') < 2:
+                data += client.recv(1024)
+
+        for connection in connections:
+            connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
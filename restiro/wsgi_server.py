@@ -0,0 +1,441 @@
+"""
+    Threaded HTTP/1.1 WSGI server with persistent connections, built on
+    ``wsgiref``
+"""
+import selectors
+import socket
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock, Thread
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, \
+    ServerHandler
+
+max_request_line = 65536
+
+#: Statuses which have no body, so no framing either
+_bodiless_statuses = ('204', '304')
+
+
+class DropConnection(Exception):
+    """
+    Raised by application to close the connection without a response
+    """
+
+
+def read_chunked(rfile) -> bytes:
+    body = bytearray()
+    while True:
+        size_line = rfile.readline(max_request_line + 1)
+        size = int(size_line.split(b';', 1)[0], 16)
+        if size == 0:
+            # Trailers
+            while rfile.readline(max_request_line + 1) not in \
+                    (b'\r\n', b'\n', b''):
+                pass
+            return bytes(body)
+
+        body += rfile.read(size)
+        rfile.readline(max_request_line + 1)
+
+
+class KeepAliveServerHandler(ServerHandler):
+    """
+    Response writer of a request, frames the body by ``Content-Length``
+    or chunked encoding to keep the connection open
+    """
+
+    http_version = '1.1'
+    chunked = False
+
+    @property
+    def head_only(self) -> bool:
+        return self.environ['REQUEST_METHOD'] == 'HEAD'
+
+    @property
+    def bodiless(self) -> bool:
+        return self.status[:3] in _bodiless_statuses
+
+    def cleanup_headers(self):
+        request_handler = self.request_handler
+        if 'Content-Length' not in self.headers and not self.bodiless:
+            self.set_content_length()
+
+        if 'Content-Length' not in self.headers and not self.head_only \
+                and not self.bodiless:
+            if request_handler.request_version == 'HTTP/1.1':
+                self.chunked = True
+                self.headers['Transfer-Encoding'] = 'chunked'
+            else:
+                # Body ends by closing the connection
+                request_handler.close_connection = True
+
+        if request_handler.close_connection:
+            self.headers['Connection'] = 'close'
+
+    def write(self, data):
+        assert type(data) is bytes, \
+            'write() argument must be a bytes instance'
+
+        if not self.status:
+            raise AssertionError('write() before start_response()')
+
+        if not self.headers_sent:
+            self.bytes_sent = len(data)
+            self.send_headers()
+        else:
+            self.bytes_sent += len(data)
+
+        if self.head_only or not data:
+            return
+
+        if self.chunked:
+            self._write(b'%x\r\n%s\r\n' % (len(data), data))
+        else:
+            self._write(data)
+        self._flush()
+
+    def finish_content(self):
+        if not self.headers_sent and self.bodiless:
+            self.send_headers()
+            return
+
+        super().finish_content()
+        if self.chunked and not self.head_only:
+            self._write(b'0\r\n\r\n')
+            self._flush()
+
+    def handle_error(self):
+        # The response may be broken
+        self.request_handler.close_connection = True
+        if isinstance(sys.exc_info()[1], DropConnection):
+            return
+        super().handle_error()
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    Handle requests of a connection until the client closes it or it is
+    idle for ``idle_timeout`` seconds of server.
+
+    With a server which parks idle connections, e.g:
+    :class:`ThreadPoolMixIn`, the handler returns once the connection is
+    idle, then :meth:`resume` handles its next requests.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    parked = False
+
+    def setup(self):
+        self.timeout = self.server.idle_timeout
+        super().setup()
+
+    def handle(self):
+        self.close_connection = False
+        self.parked = False
+        can_park = hasattr(self.server, 'park')
+        while not self.close_connection:
+            self.handle_one_request()
+            if can_park and not self.close_connection and \
+                    not self.has_pending_input():
+                self.parked = True
+                return
+
+    def resume(self):
+        """
+        Handle the next requests of a parked connection
+        """
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def finish(self):
+        # Streams of a parked connection are kept for its next request
+        if not self.parked:
+            super().finish()
+
+    def has_pending_input(self) -> bool:
+        """
+        Whether the next request is already received, e.g: pipelined
+        """
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(max_request_line + 1)
+            if len(self.raw_requestline) > max_request_line:
+                self.requestline = ''
+                self.request_version = ''
+                self.command = ''
+                self.send_error(414)
+                self.close_connection = True
+                return
+
+            if not self.raw_requestline:
+                self.close_connection = True
+                return
+
+            if not self.parse_request():
+                self.close_connection = True
+                return
+
+            self.run_application()
+        except socket.timeout:
+            # Idle connection, or a too slow client
+            self.close_connection = True
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            return read_chunked(self.rfile)
+
+        length = self.headers.get('Content-Length')
+        if not length:
+            return b''
+
+        length = int(length)
+        if length < 0:
+            raise ValueError('Invalid content length %s' % length)
+        return self.rfile.read(length)
+
+    def run_application(self):
+        # Read the whole body, the next request of connection starts
+        # right after it, whether the application reads it or not
+        try:
+            body = self.read_body()
+        except ValueError:
+            self.send_error(400, 'Invalid request body')
+            self.close_connection = True
+            return
+
+        environ = self.get_environ()
+        if 'HTTP_TRANSFER_ENCODING' in environ:
+            del environ['HTTP_TRANSFER_ENCODING']
+            environ['CONTENT_LENGTH'] = str(len(body))
+
+        handler = KeepAliveServerHandler(
+            BytesIO(body), self.wfile, self.get_stderr(), environ,
+            multithread=True
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+class IdleConnections:
+    """
+    Parked persistent connections of a server, watched by a single thread
+    until their next request, or closed after ``idle_timeout`` seconds
+    """
+
+    def __init__(self, server: 'ThreadPoolMixIn'):
+        self.server = server
+        self.closed = False
+        self.deadlines = {}
+        self._pending = []
+        self._lock = Lock()
+        self._selector = None
+        self._wakeup = None
+        self._thread = None
+
+    def _start(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup = socket.socketpair()
+        for s in self._wakeup:
+            s.setblocking(False)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+        self._thread = Thread(
+            target=self._run,
+            name='restiro-idle',
+            daemon=True
+        )
+        self._thread.start()
+
+    def _wake(self):
+        try:
+            self._wakeup[1].send(b'\0')
+        except BlockingIOError:
+            # Already woken up
+            pass
+
+    def park(self, handler: KeepAliveRequestHandler):
+        with self._lock:
+            if not self.closed:
+                if self._thread is None:
+                    self._start()
+                self._pending.append(handler)
+                self._wake()
+                return
+        self.server.close_parked(handler)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self.closed:
+                    return
+
+                # Registered by this thread only
+                now = time.monotonic()
+                for handler in self._pending:
+                    self._selector.register(
+                        handler.connection,
+                        selectors.EVENT_READ,
+                        handler
+                    )
+                    self.deadlines[handler] = now + self.server.idle_timeout
+                self._pending.clear()
+                deadline = min(self.deadlines.values(), default=None)
+
+            events = self._selector.select(
+                None if deadline is None else
+                max(deadline - time.monotonic(), 0)
+            )
+            ready = []
+            with self._lock:
+                if self.closed:
+                    return
+
+                for key, _ in events:
+                    if key.data is None:
+                        self._wakeup[0].recv(512)
+                        continue
+                    self._selector.unregister(key.fileobj)
+                    del self.deadlines[key.data]
+                    ready.append(key.data)
+
+                now = time.monotonic()
+                expired = [h for h, d in self.deadlines.items() if d <= now]
+                for handler in expired:
+                    self._selector.unregister(handler.connection)
+                    del self.deadlines[handler]
+
+            for handler in ready:
+                self.server.resume_request(handler)
+            for handler in expired:
+                self.server.close_parked(handler)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            handlers = list(self.deadlines) + self._pending
+            self.deadlines.clear()
+            self._pending.clear()
+            thread = self._thread
+
+        if thread is None:
+            return
+
+        self._wake()
+        thread.join()
+        self._selector.close()
+        for s in self._wakeup:
+            s.close()
+        for handler in handlers:
+            self.server.close_parked(handler)
+
+
+class ThreadPoolMixIn:
+    """
+    Handle connections by a bounded pool of threads, the pool is created
+    on first connection, so it is safe to fork before serving.
+
+    Idle persistent connections do not hold a thread, they are parked
+    until their next request, see :class:`IdleConnections`.
+    """
+
+    threads = 8
+    idle_timeout = 5.0
+    executor = None
+
+    def __init__(self, *args, **kwargs):
+        self.idle_connections = IdleConnections(self)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.threads,
+                thread_name_prefix='restiro-server'
+            )
+        self.executor.submit(
+            self.process_request_thread,
+            request,
+            client_address
+        )
+
+    def process_request_thread(self, request, client_address,
+                               handler: KeepAliveRequestHandler = None):
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(
+                    request,
+                    client_address,
+                    self
+                )
+            else:
+                handler.resume()
+
+            if handler.parked:
+                self.park(handler)
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self.shutdown_request(request)
+
+    def park(self, handler: KeepAliveRequestHandler):
+        self.idle_connections.park(handler)
+
+    def resume_request(self, handler: KeepAliveRequestHandler):
+        try:
+            self.executor.submit(
+                self.process_request_thread,
+                handler.request,
+                handler.client_address,
+                handler
+            )
+        except RuntimeError:
+            # Closing server
+            self.close_parked(handler)
+
+    def close_parked(self, handler: KeepAliveRequestHandler):
+        handler.parked = False
+        handler.finish()
+        self.shutdown_request(handler.request)
+
+    def server_close(self):
+        super().server_close()
+        self.idle_connections.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class ThreadPoolWSGIServer(ThreadPoolMixIn, WSGIServer):
+    request_queue_size = 128
+
+
+def make_server(host: str, port: int, app, threads: int = 8,
+                idle_timeout: float = 5.0,
+                handler_class=KeepAliveRequestHandler
+                ) -> ThreadPoolWSGIServer:
+    """
+    Create a threaded HTTP/1.1 WSGI server
+
+    :param host: Listen host
+    :param port: Listen port
+    :param app: WSGI application
+    :param threads: Count of threads, each one serves a request at a time
+    :param idle_timeout: Seconds to keep an idle connection open
+    :param handler_class: Request handler
+    """
+    server = ThreadPoolWSGIServer((host, port), handler_class)
+    server.threads = threads
+    server.idle_timeout = idle_timeout
+    server.set_app(app)
+    return server
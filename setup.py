@@ -38,7 +38,13 @@ setup(
     entry_points={
         'console_scripts': [
             'restiro = restiro.cli:main',
-            'restiro-mock = restiro.cli:mock'
+            'restiro-mock = restiro.cli:mock',
+            'restiro-ingest = restiro.cli:ingest',
+            'restiro-latency = restiro.cli:latency',
+            'restiro-bench = restiro.cli:bench'
+        ],
+        'pytest11': [
+            'restiro = restiro.pytest_plugin'
         ]
     }
 )